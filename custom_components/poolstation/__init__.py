@@ -1,95 +1,467 @@
 """The Poolstation integration."""
+from __future__ import annotations
+
 import logging
+import time
+from collections.abc import Callable
 from datetime import timedelta
-from typing import Final
+from functools import partial
+from typing import Any, Final, NoReturn
 
 import aiohttp
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import CONF_EMAIL, CONF_PASSWORD, CONF_TOKEN
-from homeassistant.core import HomeAssistant
+from homeassistant.const import CONF_TOKEN
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.exceptions import ConfigEntryAuthFailed, ConfigEntryNotReady
-from homeassistant.helpers.aiohttp_client import async_create_clientsession
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.typing import ConfigType
 from homeassistant.helpers.update_coordinator import (
     DataUpdateCoordinator,
     UpdateFailed,
 )
-from pypoolstation import Account, AuthenticationException, Pool, TwoFactorAuthRequiredException
+from homeassistant.util.async_ import gather_with_limited_concurrency
+from pypoolstation import Account, AuthenticationException, Pool
 
-from .const import AUTH_RETRIES, COORDINATORS, DEVICES, DOMAIN
-from .util import create_account
+from .auth import PoolstationAuth
+from .backoff import Backoff, CircuitBreaker
+from .cache import POOL_ATTRIBUTES, PoolCache
+from .const import (
+    ACCOUNT_COORDINATOR,
+    AUTH,
+    AUTH_RETRIES,
+    BREAKER,
+    CACHE,
+    CONF_ACCOUNT_COORDINATOR,
+    CONF_ADAPTIVE_POLLING,
+    CONF_MAX_SCAN_INTERVAL,
+    CONF_MIN_SCAN_INTERVAL,
+    CONF_POOL_SCAN_INTERVALS,
+    CONF_POOLS,
+    CONF_REFRESH_CONCURRENCY,
+    CONF_SCAN_INTERVAL,
+    COORDINATORS,
+    DEFAULT_MAX_SCAN_INTERVAL,
+    DEFAULT_MIN_SCAN_INTERVAL,
+    DEFAULT_REFRESH_CONCURRENCY,
+    DEFAULT_SCAN_INTERVAL,
+    DEVICES,
+    DOMAIN,
+    FLOW_POOLS,
+    LIMITER,
+    OPTIONS,
+    READY_POOLS,
+    SIGNAL_POOL_READY,
+    SYNCED_POOLS,
+)
+from .ratelimit import Priority, RateLimiter
+from .services import async_setup_services
+from .session import async_acquire_session, async_release_session
+from .stats import FetchStats
+from .write_queue import PoolWriteQueue, WriteQueueStore
 
 PLATFORMS: Final = ["sensor", "number", "switch", "binary_sensor"]
 
 _LOGGER: Final = logging.getLogger(__name__)
 
-SCAN_INTERVAL: Final = timedelta(seconds=60)
+SCAN_INTERVAL: Final = timedelta(seconds=DEFAULT_SCAN_INTERVAL)
+
+# Adaptive polling: poll at the minimum interval for this long after a
+# write, and stretch the interval by this factor on every poll that returns
+# unchanged values.
+ADAPTIVE_WRITE_WINDOW: Final = timedelta(minutes=2)
+ADAPTIVE_BACKOFF_FACTOR: Final = 1.5
+
+# Successful refreshes a reading (or relay) must be missing from before its
+# entities are removed; the cloud leaves values out now and then.
+CAPABILITY_GRACE_REFRESHES: Final = 3
+
+CONFIG_SCHEMA: Final = cv.config_entry_only_config_schema(DOMAIN)
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the Poolstation services."""
+    async_setup_services(hass)
+    return True
+
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Poolstation from a config entry."""
-    session = async_create_clientsession(hass, cookie_jar=aiohttp.DummyCookieJar())
-    account = Account(session, token=entry.data[CONF_TOKEN], logger=_LOGGER)
+    session = async_acquire_session(hass)
+    entry.async_on_unload(partial(async_release_session, hass))
+    cache = PoolCache(hass, entry.entry_id)
+    auth = PoolstationAuth(hass, entry, session)
+    breaker = CircuitBreaker(hass)
+    limiter = RateLimiter(hass)
+    write_store = WriteQueueStore(hass, entry.entry_id)
 
     _LOGGER.info("Pool station setup init.")
 
+    # Start from the last known state when there is one, so entities are
+    # created right away regardless of the cloud's latency or availability.
+    # The pools are then refreshed in the background.
+    # Pools synced by the config flow that created the entry need no first
+    # refresh.
+    fresh: set[str] = set()
+    if (flow_pools := hass.data.get(FLOW_POOLS, {}).pop(entry.unique_id, None)) is not None:
+        # The config flow that created the entry just fetched the pools, and
+        # held their session until now.
+        await async_release_session(hass)
+        pools = _selected_pools(entry, flow_pools)
+        fresh = {pool.id for pool in pools if pool.alias is not None}
+        from_cache = False
+    elif pools := _selected_pools(
+        entry, await cache.async_load(session, entry.data[CONF_TOKEN], _LOGGER)
+    ):
+        _LOGGER.debug("Restored %d pools from the cache", len(pools))
+        from_cache = True
+    else:
+        pools = _selected_pools(entry, await async_get_pools(session, auth))
+        from_cache = False
+    auth.pools = pools
+
+    concurrency = entry.options.get(
+        CONF_REFRESH_CONCURRENCY, DEFAULT_REFRESH_CONCURRENCY
+    )
+    account_coordinator: PoolstationAccountCoordinator | None = None
+
+    if entry.options.get(CONF_ACCOUNT_COORDINATOR, False):
+        # A single scheduler for the whole account. The per-pool coordinators
+        # don't poll on their own; they only hand the account coordinator's
+        # results to their entities.
+        coordinators = {
+            pool.id: PoolstationDataUpdateCoordinator(
+                hass, pool, update_interval=None, auth=auth, limiter=limiter
+            )
+            for pool in pools
+        }
+        account_coordinator = PoolstationAccountCoordinator(
+            hass, coordinators, concurrency, breaker=breaker, limiter=limiter
+        )
+        # Nothing subscribes to the account coordinator directly, and a
+        # coordinator without listeners never schedules its next refresh.
+        entry.async_on_unload(account_coordinator.async_add_listener(lambda: None))
+    else:
+        coordinators = {
+            pool.id: PoolstationDataUpdateCoordinator(
+                hass, pool, auth=auth, breaker=breaker, limiter=limiter
+            )
+            for pool in pools
+        }
+
+    # Writes still queued when Home Assistant stopped are sent once their
+    # pool can be fetched again.
+    await write_store.async_load()
+    for coordinator in coordinators.values():
+        write_store.async_attach(coordinator.writes, breaker)
+    entry.async_on_unload(write_store.async_save)
+
+    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = {
+        ACCOUNT_COORDINATOR: account_coordinator,
+        AUTH: auth,
+        BREAKER: breaker,
+        CACHE: cache,
+        COORDINATORS: coordinators,
+        DEVICES: {pool.id: pool for pool in pools},
+        LIMITER: limiter,
+        # Pools announced to the platforms, and the pools that have data.
+        # Cached pools have data already; the others are announced one by
+        # one as their first refresh comes in (or fails).
+        READY_POOLS: set(coordinators) if from_cache else set(),
+        # A pool cached before it could ever be fetched has no alias.
+        SYNCED_POOLS: (
+            {pool.id for pool in pools if pool.alias is not None} if from_cache else set()
+        ),
+        OPTIONS: dict(entry.options),
+    }
+    _async_remove_stale_devices(hass, entry, pools)
+    # Polling intervals and modes are options, applied here and again
+    # whenever they change.
+    _async_apply_options(hass, entry)
+    entry.async_on_unload(entry.add_update_listener(_async_update_listener))
+
+    for coordinator in coordinators.values():
+        entry.async_on_unload(
+            coordinator.async_add_listener(partial(cache.async_save, pools))
+        )
+        entry.async_on_unload(
+            coordinator.async_add_listener(
+                partial(_async_pool_updated, hass, entry, coordinator)
+            )
+        )
+
+    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+
+    for pool_id in fresh:
+        coordinators[pool_id].async_set_updated_data(None)
+    if not from_cache:
+        try:
+            await _async_first_refresh(
+                hass, entry, coordinators, account_coordinator, concurrency, fresh
+            )
+        except Exception:
+            # The entry is set up again from scratch, platforms included.
+            await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+            hass.data[DOMAIN].pop(entry.entry_id)
+            raise
+        cache.async_save(pools)
+
+    if from_cache:
+        entry.async_create_background_task(
+            hass,
+            _async_refresh_cached_pools(hass, entry, session, auth),
+            name=f"{DOMAIN} {entry.title} refresh cached pools",
+        )
+
+    return True
+
+
+def _selected_pools(entry: ConfigEntry, pools: list[Pool]) -> list[Pool]:
+    """Return the pools of the account that the entry imports."""
+    if (selected := entry.options.get(CONF_POOLS)) is None:
+        return pools
+    return [pool for pool in pools if pool.id in selected]
+
+
+@callback
+def _async_remove_stale_devices(
+    hass: HomeAssistant, entry: ConfigEntry, pools: list[Pool]
+) -> None:
+    """Remove the devices of pools the entry no longer imports."""
+    pool_ids = {pool.id for pool in pools}
+    device_registry = dr.async_get(hass)
+    for device in dr.async_entries_for_config_entry(device_registry, entry.entry_id):
+        if not any(
+            domain == DOMAIN and identifier in pool_ids
+            for domain, identifier in device.identifiers
+        ):
+            device_registry.async_update_device(
+                device.id, remove_config_entry_id=entry.entry_id
+            )
+
+
+@callback
+def _async_apply_options(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Apply the entry's polling options to its running coordinators."""
+    data = hass.data[DOMAIN][entry.entry_id]
+    options = entry.options
+    interval = timedelta(seconds=options.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL))
+    overrides = options.get(CONF_POOL_SCAN_INTERVALS, {})
+    if (account_coordinator := data[ACCOUNT_COORDINATOR]) is not None:
+        account_coordinator.concurrency = options.get(
+            CONF_REFRESH_CONCURRENCY, DEFAULT_REFRESH_CONCURRENCY
+        )
+        account_coordinator.async_set_interval(interval)
+        # Pools without an override are synced on every account cycle.
+        interval = None
+    for pool_id, coordinator in data[COORDINATORS].items():
+        override = overrides.get(pool_id)
+        coordinator.async_set_polling(
+            timedelta(seconds=override) if override else interval,
+            adaptive=options.get(CONF_ADAPTIVE_POLLING, False),
+            min_interval=timedelta(
+                seconds=options.get(CONF_MIN_SCAN_INTERVAL, DEFAULT_MIN_SCAN_INTERVAL)
+            ),
+            max_interval=timedelta(
+                seconds=options.get(CONF_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL)
+            ),
+        )
+
+
+@callback
+def async_update_token(hass: HomeAssistant, entry: ConfigEntry, token: str) -> bool:
+    """Hand a new token to a running entry and resume polling with it.
+
+    Returns False if the entry isn't loaded, so it has to be set up again.
+    """
+    if (data := hass.data.get(DOMAIN, {}).get(entry.entry_id)) is None:
+        return False
+    data[AUTH].async_set_token(token)
+    # A coordinator stops polling once it gives up on the old token.
+    if (account_coordinator := data[ACCOUNT_COORDINATOR]) is not None:
+        coordinators = [account_coordinator]
+    else:
+        coordinators = list(data[COORDINATORS].values())
+    for coordinator in coordinators:
+        coordinator.auth_retries = AUTH_RETRIES
+        entry.async_create_background_task(
+            hass,
+            coordinator.async_refresh(),
+            name=f"{DOMAIN} {coordinator.name} refresh with new token",
+        )
+    return True
+
+
+async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Apply changed options to the running entry without reloading it."""
+    data = hass.data[DOMAIN][entry.entry_id]
+    if entry.options == data[OPTIONS]:
+        # Only the entry's data changed, such as a refreshed token.
+        return
+    if entry.options.get(CONF_ACCOUNT_COORDINATOR, False) != (
+        data[ACCOUNT_COORDINATOR] is not None
+    ) or entry.options.get(CONF_POOLS) != data[OPTIONS].get(CONF_POOLS):
+        # Switching schedulers, or pools, takes a different set of
+        # coordinators.
+        await hass.config_entries.async_reload(entry.entry_id)
+        return
+    data[OPTIONS] = dict(entry.options)
+    _async_apply_options(hass, entry)
+    # Have the platforms add and remove entities for the entity groups that
+    # were switched on or off.
+    for pool_id in list(data[READY_POOLS]):
+        _async_announce_pool(hass, entry, pool_id)
+
+
+async def _async_first_refresh(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    coordinators: dict[str, PoolstationDataUpdateCoordinator],
+    account_coordinator: PoolstationAccountCoordinator | None,
+    concurrency: int,
+    fresh: set[str],
+) -> None:
+    """Fetch every pool that isn't ``fresh`` for the first time.
+
+    A pool that fails doesn't hold back the others: it is announced to the
+    platforms anyway, so its device shows up unavailable, and its
+    coordinator keeps retrying it with its own backoff. Only rejected
+    credentials, or every pool failing, fail the entry.
+    """
+    if set(coordinators) <= fresh:
+        return
+    if account_coordinator is not None:
+        await account_coordinator.async_refresh()
+        if isinstance(account_coordinator.last_exception, ConfigEntryAuthFailed):
+            raise account_coordinator.last_exception
+    else:
+        # Every first refresh is a cloud round trip, so run them side by
+        # side (bounded, to avoid bursting poolstation.net on large
+        # accounts) instead of one after the other.
+        await gather_with_limited_concurrency(
+            concurrency,
+            *(
+                coordinator.async_refresh()
+                for pool_id, coordinator in coordinators.items()
+                if pool_id not in fresh
+            ),
+        )
+
+    failed = [
+        coordinator for coordinator in coordinators.values() if not coordinator.last_update_success
+    ]
+    for coordinator in failed:
+        if isinstance(coordinator.last_exception, ConfigEntryAuthFailed):
+            raise coordinator.last_exception
+    if failed and len(failed) == len(coordinators):
+        raise ConfigEntryNotReady(
+            f"Could not fetch any of the {len(failed)} pools"
+        ) from failed[0].last_exception
+    for coordinator in failed:
+        _LOGGER.warning(
+            "Could not fetch pool %s, retrying in the background: %s",
+            coordinator.pool.id,
+            coordinator.last_exception,
+        )
+        _async_announce_pool(hass, entry, coordinator.pool.id)
+
+
+@callback
+def _async_announce_pool(hass: HomeAssistant, entry: ConfigEntry, pool_id: str) -> None:
+    """Have the platforms add the entities of a pool."""
+    hass.data[DOMAIN][entry.entry_id][READY_POOLS].add(pool_id)
+    async_dispatcher_send(hass, SIGNAL_POOL_READY.format(entry.entry_id), pool_id)
+
+
+@callback
+def _async_pool_updated(
+    hass: HomeAssistant, entry: ConfigEntry, coordinator: PoolstationDataUpdateCoordinator
+) -> None:
+    """Announce a pool to the platforms when it first has data or its capabilities change."""
+    data = hass.data[DOMAIN][entry.entry_id]
+    pool = coordinator.pool
+    if not coordinator.last_update_success:
+        return
+    # The pool can be reached again; send what was written while it couldn't.
+    coordinator.writes.async_replay()
+    changed = coordinator.async_update_capabilities()
+    if pool.id not in data[SYNCED_POOLS]:
+        data[SYNCED_POOLS].add(pool.id)
+        if pool.id in data[READY_POOLS]:
+            # The pool failed its first refresh and its device was named
+            # after its id; now its alias is known.
+            device_registry = dr.async_get(hass)
+            if device := device_registry.async_get_device(identifiers={(DOMAIN, pool.id)}):
+                device_registry.async_update_device(device.id, name=pool.alias)
+    elif not changed:
+        return
+    _async_announce_pool(hass, entry, pool.id)
+
+
+async def async_get_pools(
+    session: aiohttp.ClientSession, auth: PoolstationAuth
+) -> list[Pool]:
+    """Fetch the account's pools, logging in again if the token expired."""
+    generation = auth.generation
+    account = Account(session, token=auth.token, logger=_LOGGER)
     try:
-        pools = await Pool.get_all_pools(session, account=account)
+        return await Pool.get_all_pools(session, account=account)
     except aiohttp.ClientError as err:
         _LOGGER.warning("Pool station Client error: %s", err)
-        await session.close()  # Ensure session is closed on error
         raise ConfigEntryNotReady from err
 
     except AuthenticationException as err:
         _LOGGER.warning("Pool station Auth error: %s", err)
-        account = create_account(
-            session, entry.data[CONF_EMAIL], entry.data[CONF_PASSWORD], _LOGGER
-        )
         try:
-            token = await account.login()
-        except TwoFactorAuthRequiredException as mfa_err:
-            _LOGGER.warning("Pool station 2FA required: %s", mfa_err)
-            raise ConfigEntryAuthFailed from mfa_err
-        except AuthenticationException as login_err:
-            _LOGGER.warning("Pool station Auth retry error: %s", login_err)
-            # Unfortunately the poolstation API is crap and logging in with wrong credentials
-            # returns a 500 instead of a 401. That's why this block is probably never being
-            # called. Instead the next except will.
-            raise ConfigEntryAuthFailed from login_err
+            await auth.async_relogin(generation)
         except aiohttp.ClientResponseError as response_err:
+            # Unfortunately the poolstation API is crap and logging in with wrong credentials
+            # returns a 500 instead of a 401, so this is how bad credentials usually show up.
             _LOGGER.warning("Pool station Client retry error: %s", response_err)
             raise ConfigEntryAuthFailed from response_err
-        else:
-            hass.config_entries.async_update_entry(
-                entry,
-                data={
-                    CONF_TOKEN: token,
-                    CONF_EMAIL: entry.data[CONF_EMAIL],
-                    CONF_PASSWORD: entry.data[CONF_PASSWORD],
-                },
+        account = Account(session, token=auth.token, logger=_LOGGER)
+        try:
+            return await Pool.get_all_pools(session, account=account)
+        except aiohttp.ClientError as err:
+            _LOGGER.warning(
+                "Pool station fetch error after relogin: %s", err
             )
-            try:
-                pools = await Pool.get_all_pools(session, account=account)
-            except aiohttp.ClientError as err:
-                _LOGGER.warning(
-                    "Pool station fetch error after relogin: %s", err
-                )
-                raise ConfigEntryNotReady from err
+            raise ConfigEntryNotReady from err
 
-    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = {
-        COORDINATORS: {},
-        DEVICES: {},
-    }
 
-    for pool in pools:
-        pool_id = pool.id
-        coordinator = PoolstationDataUpdateCoordinator(hass, pool)
-        await coordinator.async_config_entry_first_refresh()
+async def _async_refresh_cached_pools(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    session: aiohttp.ClientSession,
+    auth: PoolstationAuth,
+) -> None:
+    """Bring pools restored from the cache up to date."""
+    data = hass.data[DOMAIN][entry.entry_id]
+    coordinators: dict[str, PoolstationDataUpdateCoordinator] = data[COORDINATORS]
 
-        hass.data[DOMAIN][entry.entry_id][DEVICES][pool_id] = pool
-        hass.data[DOMAIN][entry.entry_id][COORDINATORS][pool_id] = coordinator
-
-    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    try:
+        pools = _selected_pools(entry, await async_get_pools(session, auth))
+    except ConfigEntryAuthFailed:
+        entry.async_start_reauth(hass)
+        return
+    except ConfigEntryNotReady:
+        # The coordinators keep retrying on their own schedule.
+        _LOGGER.debug("Pool station unreachable, keeping cached pools for now")
+    else:
+        if {pool.id for pool in pools} != set(coordinators):
+            _LOGGER.info("Pool station pools changed since they were cached, reloading")
+            await data[CACHE].async_remove()
+            hass.config_entries.async_schedule_reload(entry.entry_id)
+            return
 
-    return True
+    if (account_coordinator := data[ACCOUNT_COORDINATOR]) is not None:
+        await account_coordinator.async_refresh()
+    else:
+        await gather_with_limited_concurrency(
+            entry.options.get(CONF_REFRESH_CONCURRENCY, DEFAULT_REFRESH_CONCURRENCY),
+            *(coordinator.async_refresh() for coordinator in coordinators.values()),
+        )
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
@@ -101,22 +473,107 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     return unload_ok
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Delete the pool cache and queued writes of a removed config entry."""
+    await PoolCache(hass, entry.entry_id).async_remove()
+    await WriteQueueStore(hass, entry.entry_id).async_remove()
+
+
+def _raise_auth_error(
+    coordinator: PoolstationDataUpdateCoordinator | PoolstationAccountCoordinator,
+    subject: str,
+    err: AuthenticationException,
+) -> NoReturn:
+    """Spend one auth retry, or give up and ask for reauthentication."""
+    if coordinator.auth_retries > 0:
+        coordinator.auth_retries -= 1
+        raise UpdateFailed(
+            f"Authentication error for {subject} "
+            f"({coordinator.auth_retries} retries left): {err}"
+        ) from err
+    _LOGGER.warning(
+        "Max retries (%d) reached for %s, raising authentication error: %s",
+        AUTH_RETRIES,
+        subject,
+        err,
+    )
+    raise ConfigEntryAuthFailed from err
+
+
+def _is_throttled(err: BaseException) -> bool:
+    """Tell whether a request failed because poolstation.net is throttling it."""
+    return isinstance(err, aiohttp.ClientResponseError) and err.status == 429
+
+
+def _raise_if_throttled(limiter: RateLimiter) -> None:
+    """Skip an update while poolstation.net asks for requests to be held back."""
+    if (throttled := limiter.throttled_for()) is not None:
+        raise UpdateFailed(
+            "Pool station is throttling requests, pausing updates", retry_after=throttled
+        )
+
+
 class PoolstationDataUpdateCoordinator(DataUpdateCoordinator):
     """Class to manage fetching Poolstation device info."""
 
-    def __init__(self, hass: HomeAssistant, pool: Pool) -> None:
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        pool: Pool,
+        update_interval: timedelta | None = SCAN_INTERVAL,
+        auth: PoolstationAuth | None = None,
+        breaker: CircuitBreaker | None = None,
+        limiter: RateLimiter | None = None,
+        adaptive: bool = False,
+        min_interval: timedelta = timedelta(seconds=DEFAULT_MIN_SCAN_INTERVAL),
+        max_interval: timedelta = timedelta(seconds=DEFAULT_MAX_SCAN_INTERVAL),
+    ) -> None:
         """Initialize global Poolstation data updater."""
         self.pool = pool
+        self.auth = auth
+        self.breaker = breaker
+        # Shared by every pool of the account; a pool set up on its own gets
+        # its own.
+        self.limiter = limiter or RateLimiter(hass)
+        self.backoff = Backoff()
+        self.stats = FetchStats()
+        self.writes = PoolWriteQueue(hass, self)
         self.auth_retries = AUTH_RETRIES  # Initialize auth_retries here
+        # When the account coordinator may try this pool again after it
+        # failed on its own, and when it last synced it (time.monotonic()
+        # values).
+        self.retry_at: float | None = None
+        self.synced_at: float | None = None
+        # How often the account coordinator syncs this pool; None for every
+        # account cycle. Pools with their own timer use update_interval.
+        self.poll_interval: timedelta | None = None
+        # Adaptive polling only makes sense for a coordinator with its own timer.
+        self.adaptive = adaptive and update_interval is not None
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self._base_interval = update_interval
+        self._fast_poll_until: float | None = None
+        self._last_values: dict | None = None
+        # Last (availability, value) written by each entity, by unique id.
+        self._entity_snapshots: dict[str, tuple[bool, Any]] = {}
+        # Readings and relays the pool reports, and for how many refreshes
+        # each of them has been missing.
+        self.capabilities: frozenset[str] = frozenset()
+        self._missing_capabilities: dict[str, int] = {}
         super().__init__(
             hass,
             _LOGGER,
             # pool.alias is only populated after the first sync, so fall
             # back to the pool id for the initial (logging) name.
             name=f"{DOMAIN}-{pool.alias or pool.id}",
-            update_interval=SCAN_INTERVAL,
+            update_interval=update_interval,
         )
 
+    async def async_shutdown(self) -> None:
+        """Stop polling and replaying queued writes."""
+        await super().async_shutdown()
+        self.writes.async_cancel()
+
     async def _async_update_data(self) -> dict | None:
         """Fetch data from poolstation.net."""
         _LOGGER.debug(
@@ -124,8 +581,16 @@ class PoolstationDataUpdateCoordinator(DataUpdateCoordinator):
             self.pool.alias,
             self.auth_retries,
         )
+        # Before asking the breaker, which may make this update its probe.
+        _raise_if_throttled(self.limiter)
+        if self.breaker is not None and (pause := self.breaker.async_pause()):
+            raise UpdateFailed(
+                "Pool station unreachable, pausing updates", retry_after=pause
+            )
+        reachable: bool | None = None
         try:
-            await self.pool.sync_info()
+            await self.async_sync_pool()
+            reachable = True
             _LOGGER.debug(
                 "Successfully updated pool data for: %s (auth_retries: %d)",
                 self.pool.alias,
@@ -133,17 +598,309 @@ class PoolstationDataUpdateCoordinator(DataUpdateCoordinator):
             )
             # reset counter
             self.auth_retries = AUTH_RETRIES
+            self.backoff.reset()
+        except (aiohttp.ClientError, TimeoutError) as err:
+            # Back off instead of retrying at the normal interval through a
+            # whole outage. A throttled request did reach poolstation.net;
+            # the rate limiter holds requests back for it.
+            reachable = _is_throttled(err)
+            raise UpdateFailed(
+                f"Error communicating with poolstation.net: {err}",
+                retry_after=self.backoff.next_delay(),
+            ) from err
         except AuthenticationException as err:
-            if self.auth_retries > 0:
-                self.auth_retries -= 1
-                raise UpdateFailed(
-                    f"Authentication error for pool {self.pool.alias} "
-                    f"({self.auth_retries} retries left): {err}"
-                ) from err
-            _LOGGER.warning(
-                "Max retries (%d) reached for pool %s, raising authentication error: %s",
-                AUTH_RETRIES,
-                self.pool.alias,
-                err,
+            reachable = True
+            _raise_auth_error(self, f"pool {self.pool.alias}", err)
+        except ConfigEntryAuthFailed:
+            reachable = True
+            raise
+        finally:
+            if self.breaker is not None:
+                self.breaker.async_record(reachable)
+
+        if self.adaptive:
+            self._adapt_interval()
+
+    async def async_sync_pool(self) -> None:
+        """Sync the pool, logging in again once if its token was rejected."""
+        generation = self.auth.generation if self.auth is not None else 0
+        started = time.time()
+        start = time.monotonic()
+        success = False
+        try:
+            try:
+                async with self.limiter.async_request(Priority.POLL):
+                    await self.pool.sync_info()
+            except AuthenticationException as err:
+                if self.auth is None:
+                    raise
+                try:
+                    await self.auth.async_relogin(generation)
+                except (aiohttp.ClientError, TimeoutError) as login_err:
+                    _LOGGER.debug("Pool station re-login error: %s", login_err)
+                    raise err from login_err
+                async with self.limiter.async_request(Priority.POLL):
+                    await self.pool.sync_info()
+            success = True
+        finally:
+            self.stats.record(started, time.monotonic() - start, success)
+
+    @callback
+    def async_snapshot_changed(
+        self,
+        key: str,
+        snapshot: tuple[bool, Any],
+        significant: Callable[[Any, Any], bool] | None = None,
+    ) -> bool:
+        """Record an entity's latest snapshot and tell whether it changed.
+
+        Lets entities skip state writes (and recorder rows) on polls that
+        returned the same value as last time. ``significant`` can further
+        dismiss value changes: it gets the last recorded and the new value,
+        and the snapshot is kept unless it returns True.
+        """
+        if (previous := self._entity_snapshots.get(key)) is not None:
+            if previous == snapshot:
+                return False
+            if (
+                significant is not None
+                and previous[0] == snapshot[0]
+                and not significant(previous[1], snapshot[1])
+            ):
+                return False
+        self._entity_snapshots[key] = snapshot
+        return True
+
+    @callback
+    def async_forget_snapshot(self, key: str) -> None:
+        """Drop the snapshot of an entity that was removed."""
+        self._entity_snapshots.pop(key, None)
+
+    def reports(self, attribute: str) -> bool:
+        """Tell whether the pool reports a reading, or did within the grace refreshes."""
+        return attribute in self.capabilities or getattr(self.pool, attribute) is not None
+
+    @callback
+    def async_update_capabilities(self) -> bool:
+        """Track the readings and relays the pool reports; return whether they changed.
+
+        New ones count right away; missing ones only once they have been
+        missing for CAPABILITY_GRACE_REFRESHES refreshes.
+        """
+        seen = {
+            attribute
+            for attribute in POOL_ATTRIBUTES
+            if getattr(self.pool, attribute) is not None
+        } | {f"relay {relay.id}" for relay in self.pool.relays}
+        for capability in self.capabilities - seen:
+            self._missing_capabilities[capability] = (
+                self._missing_capabilities.get(capability, 0) + 1
+            )
+        for capability in seen:
+            self._missing_capabilities.pop(capability, None)
+        gone = {
+            capability
+            for capability, refreshes in self._missing_capabilities.items()
+            if refreshes >= CAPABILITY_GRACE_REFRESHES
+        }
+        for capability in gone:
+            del self._missing_capabilities[capability]
+        previous = self.capabilities
+        self.capabilities = frozenset((previous - gone) | seen)
+        return self.capabilities != previous
+
+    @callback
+    def async_set_polling(
+        self,
+        interval: timedelta | None,
+        *,
+        adaptive: bool = False,
+        min_interval: timedelta = timedelta(seconds=DEFAULT_MIN_SCAN_INTERVAL),
+        max_interval: timedelta = timedelta(seconds=DEFAULT_MAX_SCAN_INTERVAL),
+    ) -> None:
+        """Change how often the pool is polled, starting from now."""
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        if self._base_interval is None:
+            # Polled by the account coordinator.
+            self.poll_interval = interval
+            return
+        if interval is None:
+            interval = SCAN_INTERVAL
+        self.adaptive = adaptive
+        self._base_interval = interval
+        if adaptive:
+            interval = max(min_interval, min(max_interval, interval))
+        else:
+            self._fast_poll_until = None
+        if interval == self.update_interval:
+            return
+        self.update_interval = interval
+        if self._listeners:
+            self._schedule_refresh()
+
+    @callback
+    def async_note_write(self) -> None:
+        """Poll at the minimum interval for a while after a write.
+
+        Called by entities after changing a setpoint or relay, so the
+        controller's confirmation shows up quickly.
+        """
+        if not self.adaptive:
+            return
+        self._fast_poll_until = (
+            self.hass.loop.time() + ADAPTIVE_WRITE_WINDOW.total_seconds()
+        )
+        self.update_interval = self.min_interval
+        if self._listeners:
+            self._schedule_refresh()
+
+    def _adapt_interval(self) -> None:
+        """Pick the next polling interval from the values just fetched."""
+        values = dict(self.pool.raw_vars)
+        changed = values != self._last_values
+        self._last_values = values
+
+        if (
+            self._fast_poll_until is not None
+            and self.hass.loop.time() < self._fast_poll_until
+        ):
+            interval = self.min_interval
+        elif changed:
+            self._fast_poll_until = None
+            interval = self._base_interval
+        else:
+            # Back off gradually while readings stay flat.
+            interval = self.update_interval * ADAPTIVE_BACKOFF_FACTOR
+
+        self.update_interval = max(self.min_interval, min(self.max_interval, interval))
+        _LOGGER.debug(
+            "Next update for pool %s in %s", self.pool.alias, self.update_interval
+        )
+
+
+class PoolstationAccountCoordinator(DataUpdateCoordinator[None]):
+    """Refresh every pool of an account in a single polling cycle.
+
+    Owns the account's only refresh timer and auth retry counter. Each cycle
+    syncs all pools (bounded by ``concurrency``) and hands every pool's
+    outcome to its PoolstationDataUpdateCoordinator, which notifies that
+    pool's entities.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        coordinators: dict[str, PoolstationDataUpdateCoordinator],
+        concurrency: int,
+        breaker: CircuitBreaker | None = None,
+        limiter: RateLimiter | None = None,
+    ) -> None:
+        """Initialize the account-wide Poolstation data updater."""
+        self.coordinators = coordinators
+        self.concurrency = concurrency
+        self.breaker = breaker
+        self.limiter = limiter or RateLimiter(hass)
+        self.backoff = Backoff()
+        self.auth_retries = AUTH_RETRIES
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=f"{DOMAIN}-account",
+            update_interval=SCAN_INTERVAL,
+        )
+
+    @callback
+    def async_set_interval(self, interval: timedelta) -> None:
+        """Change the account's polling interval, starting from now."""
+        if interval == self.update_interval:
+            return
+        self.update_interval = interval
+        if self._listeners:
+            self._schedule_refresh()
+
+    def _is_due(self, coordinator: PoolstationDataUpdateCoordinator, now: float) -> bool:
+        """Tell whether a pool should be synced in the cycle starting at ``now``."""
+        if coordinator.retry_at is not None:
+            # A pool failing on its own waits out its backoff instead of
+            # being retried every cycle.
+            return coordinator.retry_at <= now
+        if coordinator.poll_interval is None or coordinator.synced_at is None:
+            return True
+        # Cycles don't start exactly on time; a pool's own interval is
+        # rounded to the nearest cycle.
+        slack = self.update_interval.total_seconds() / 2
+        return now - coordinator.synced_at >= coordinator.poll_interval.total_seconds() - slack
+
+    async def _async_sync_pool(self, coordinator: PoolstationDataUpdateCoordinator) -> None:
+        """Sync a pool and hand it to its entities without waiting for the others."""
+        await coordinator.async_sync_pool()
+        coordinator.backoff.reset()
+        coordinator.retry_at = None
+        coordinator.synced_at = time.monotonic()
+        coordinator.async_set_updated_data(None)
+
+    async def _async_update_data(self) -> None:
+        """Fetch data for all pools from poolstation.net."""
+        # Before asking the breaker, which may make this update its probe.
+        _raise_if_throttled(self.limiter)
+        if self.breaker is not None and (pause := self.breaker.async_pause()):
+            raise UpdateFailed(
+                "Pool station unreachable, pausing updates", retry_after=pause
+            )
+        now = time.monotonic()
+        coordinators = [
+            coordinator
+            for coordinator in self.coordinators.values()
+            if self._is_due(coordinator, now)
+        ]
+        try:
+            results = await gather_with_limited_concurrency(
+                self.concurrency,
+                *(self._async_sync_pool(coordinator) for coordinator in coordinators),
+                return_exceptions=True,
+            )
+        except BaseException:
+            if self.breaker is not None:
+                self.breaker.async_record(None)
+            raise
+        # The cloud is down when no pool could reach it at all.
+        unreachable = bool(coordinators) and all(
+            isinstance(result, (aiohttp.ClientError, TimeoutError))
+            and not _is_throttled(result)
+            for result in results
+        )
+        if self.breaker is not None:
+            self.breaker.async_record(not unreachable)
+
+        auth_failed: ConfigEntryAuthFailed | None = None
+        auth_error: AuthenticationException | None = None
+        failures = 0
+        for coordinator, result in zip(coordinators, results, strict=True):
+            if isinstance(result, BaseException):
+                failures += 1
+                if isinstance(result, ConfigEntryAuthFailed):
+                    auth_failed = result
+                elif isinstance(result, AuthenticationException):
+                    auth_error = result
+                coordinator.async_set_update_error(result)
+                if not unreachable and isinstance(
+                    result, (aiohttp.ClientError, TimeoutError)
+                ):
+                    coordinator.retry_at = time.monotonic() + coordinator.backoff.next_delay()
+
+        if auth_failed is not None:
+            raise auth_failed
+        # The token is shared by every pool, so one auth failure in a cycle
+        # costs the account a single retry no matter how many pools saw it.
+        if auth_error is not None:
+            _raise_auth_error(self, "account", auth_error)
+        self.auth_retries = AUTH_RETRIES
+        if unreachable:
+            raise UpdateFailed(
+                f"Error communicating with poolstation.net for all {failures} pools",
+                retry_after=self.backoff.next_delay(),
             )
-            raise ConfigEntryAuthFailed from err
+        self.backoff.reset()
+        if coordinators and failures == len(coordinators):
+            raise UpdateFailed(f"Error fetching all {failures} pools")
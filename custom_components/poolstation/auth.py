@@ -0,0 +1,95 @@
+"""Account-wide authentication for the Poolstation integration."""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Final
+
+import aiohttp
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_EMAIL, CONF_PASSWORD, CONF_TOKEN
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import ConfigEntryAuthFailed
+from pypoolstation import AuthenticationException, Pool, TwoFactorAuthRequiredException
+
+from .const import DOMAIN
+from .util import create_account
+
+_LOGGER: Final = logging.getLogger(__name__)
+
+
+class PoolstationAuth:
+    """Owns the token of an account and renews it for all of its pools.
+
+    Every pool of an account shares one token, so when it expires all of them
+    fail at once. Only the first of them logs in again; the others wait for
+    that login and share its outcome.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, entry: ConfigEntry, session: aiohttp.ClientSession
+    ) -> None:
+        """Initialize the account's authentication."""
+        self._hass = hass
+        self._entry = entry
+        self._session = session
+        self._login: asyncio.Task[None] | None = None
+        self.pools: list[Pool] = []
+        # Bumped on every new token, so a caller can tell whether the token it
+        # failed with has already been replaced.
+        self.generation = 0
+
+    @property
+    def token(self) -> str:
+        """Return the current token."""
+        return self._entry.data[CONF_TOKEN]
+
+    async def async_relogin(self, generation: int) -> None:
+        """Replace the token that was current at ``generation``.
+
+        Returns right away if it was replaced already. Raises
+        ConfigEntryAuthFailed if the credentials are rejected or 2FA is
+        required, and aiohttp.ClientError or TimeoutError if poolstation.net
+        couldn't be reached.
+        """
+        if generation != self.generation:
+            return
+        if (login := self._login) is None:
+            login = self._login = self._hass.async_create_task(
+                self._async_login(), f"{DOMAIN} {self._entry.title} login"
+            )
+        try:
+            # Shielded so a cancelled waiter doesn't cancel the others' login.
+            await asyncio.shield(login)
+        finally:
+            if self._login is login and login.done():
+                self._login = None
+
+    async def _async_login(self) -> None:
+        """Log in with the entry's credentials and use the new token."""
+        _LOGGER.debug("Pool station token rejected, logging in again")
+        account = create_account(
+            self._session,
+            self._entry.data[CONF_EMAIL],
+            self._entry.data[CONF_PASSWORD],
+            _LOGGER,
+        )
+        try:
+            token = await account.login()
+        except TwoFactorAuthRequiredException as err:
+            _LOGGER.warning("Pool station 2FA required: %s", err)
+            raise ConfigEntryAuthFailed from err
+        except AuthenticationException as err:
+            _LOGGER.warning("Pool station Auth retry error: %s", err)
+            raise ConfigEntryAuthFailed from err
+        self.async_set_token(token)
+
+    @callback
+    def async_set_token(self, token: str) -> None:
+        """Hand a new token to every pool and persist it to the entry."""
+        self.generation += 1
+        self._hass.config_entries.async_update_entry(
+            self._entry, data={**self._entry.data, CONF_TOKEN: token}
+        )
+        for pool in self.pools:
+            pool.update_token(token)
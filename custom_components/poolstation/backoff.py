@@ -0,0 +1,133 @@
+"""Retry pacing for when poolstation.net can't be reached."""
+from __future__ import annotations
+
+import logging
+import random
+from enum import StrEnum
+from typing import Final
+
+from homeassistant.core import HomeAssistant, callback
+
+_LOGGER: Final = logging.getLogger(__name__)
+
+# Seconds between retries of a pool that can't be reached: doubling from the
+# base up to the cap, each delay randomized within its upper half so pools
+# that failed together don't retry together.
+BACKOFF_BASE: Final = 60.0
+BACKOFF_CAP: Final = 900.0
+BACKOFF_FACTOR: Final = 2.0
+
+# Consecutive unreachable requests, with no successful one in between, after
+# which the account's circuit breaker opens.
+BREAKER_THRESHOLD: Final = 5
+
+# Seconds a paused pool waits for the circuit breaker's probe to finish.
+PROBE_WAIT: Final = 5.0
+
+
+class Backoff:
+    """Exponential delay with jitter and a cap."""
+
+    def __init__(
+        self,
+        base: float = BACKOFF_BASE,
+        cap: float = BACKOFF_CAP,
+        factor: float = BACKOFF_FACTOR,
+    ) -> None:
+        """Initialize the backoff."""
+        self.base = base
+        self.cap = cap
+        self.factor = factor
+        self.attempts = 0
+
+    def next_delay(self) -> float:
+        """Count a failed attempt and return the seconds to wait before the next."""
+        delay = min(self.cap, self.base * self.factor**self.attempts)
+        self.attempts += 1
+        return random.uniform(delay / 2, delay)
+
+    def reset(self) -> None:
+        """Start over after a successful attempt."""
+        self.attempts = 0
+
+
+class CircuitState(StrEnum):
+    """State of a CircuitBreaker."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Pauses every pool of an account while poolstation.net is down.
+
+    Opens after ``threshold`` consecutive requests couldn't reach the cloud.
+    While open every request is refused, until the open period (which grows
+    on every reopening) ends. The next request is then let through as a
+    probe: if it reaches the cloud the breaker closes and all pools resume,
+    otherwise it opens again.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        threshold: int = BREAKER_THRESHOLD,
+        backoff: Backoff | None = None,
+    ) -> None:
+        """Initialize the circuit breaker."""
+        self._hass = hass
+        self.threshold = threshold
+        self.backoff = backoff or Backoff()
+        self.state = CircuitState.CLOSED
+        self.failures = 0
+        self._retry_at = 0.0
+
+    @callback
+    def async_pause(self) -> float | None:
+        """Return the seconds to wait before sending a request, or None to send it.
+
+        The first caller after the open period ends gets None and becomes the
+        probe; async_record must then be called with its outcome.
+        """
+        if self.state is CircuitState.CLOSED:
+            return None
+        if self.state is CircuitState.HALF_OPEN:
+            return PROBE_WAIT
+        if (remaining := self._retry_at - self._hass.loop.time()) > 0:
+            return remaining
+        _LOGGER.debug("Probing whether poolstation.net is reachable again")
+        self.state = CircuitState.HALF_OPEN
+        return None
+
+    @callback
+    def async_record(self, reachable: bool | None) -> None:
+        """Record the outcome of a request.
+
+        ``reachable`` is None when the request ended without telling either
+        way, for instance because it was cancelled.
+        """
+        if reachable:
+            if self.state is not CircuitState.CLOSED:
+                _LOGGER.info("Pool station is reachable again, resuming updates")
+            self.state = CircuitState.CLOSED
+            self.failures = 0
+            self.backoff.reset()
+        elif reachable is None:
+            if self.state is CircuitState.HALF_OPEN:
+                # Let the next request probe instead.
+                self.state = CircuitState.OPEN
+        else:
+            self.failures += 1
+            if self.state is CircuitState.HALF_OPEN or (
+                self.state is CircuitState.CLOSED and self.failures >= self.threshold
+            ):
+                delay = self.backoff.next_delay()
+                _LOGGER.warning(
+                    "Pool station unreachable after %d attempts, pausing updates "
+                    "for %.0f seconds",
+                    self.failures,
+                    delay,
+                )
+                self.state = CircuitState.OPEN
+                self._retry_at = self._hass.loop.time() + delay
@@ -16,8 +16,8 @@ from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from pypoolstation import Pool
 
 from . import PoolstationDataUpdateCoordinator
-from .const import COORDINATORS, DEVICES, DOMAIN
-from .entity import PoolEntity
+from .const import GROUP_DIGITAL_INPUTS, GROUP_UV
+from .entity import PoolEntity, async_add_pool_entities
 
 
 @dataclass
@@ -25,7 +25,9 @@ class PoolstationentityDescriptionMixin:
     """Mixin values for Poolstation entities."""
 
     is_on_fn: Callable[[Pool], bool]
-    has_fn: Callable[[Pool], bool]
+    # The Pool attribute the reading comes from; the binary sensor exists
+    # while the pool reports it.
+    attribute: str
 
 @dataclass
 class PoolstationBinarySensorEntityDescription(
@@ -33,6 +35,8 @@ class PoolstationBinarySensorEntityDescription(
 ):
     """Class describing Poolstation binary sensor entities."""
 
+    group: str | None = None
+
 ENTITY_DESCRIPTIONS = (
     PoolstationBinarySensorEntityDescription(
         key="water_flow",
@@ -40,49 +44,56 @@ ENTITY_DESCRIPTIONS = (
         device_class=BinarySensorDeviceClass.PROBLEM,
         entity_category=EntityCategory.DIAGNOSTIC,
         is_on_fn=lambda pool: pool.waterflow_problem,
-        has_fn=lambda pool: pool.waterflow_problem is not None,
+        attribute="waterflow_problem",
     ),
     PoolstationBinarySensorEntityDescription(
         key="binary_input_1",
         name="Digital input 1",
         is_on_fn=lambda pool: pool.binary_input_1,
-        has_fn=lambda pool: pool.binary_input_1 is not None,
+        attribute="binary_input_1",
+        group=GROUP_DIGITAL_INPUTS,
     ),
     PoolstationBinarySensorEntityDescription(
         key="binary_input_2",
         name="Digital input 2",
         is_on_fn=lambda pool: pool.binary_input_2,
-        has_fn=lambda pool: pool.binary_input_2 is not None,
+        attribute="binary_input_2",
+        group=GROUP_DIGITAL_INPUTS,
     ),
     PoolstationBinarySensorEntityDescription(
         key="binary_input_3",
         name="Digital input 3",
         is_on_fn=lambda pool: pool.binary_input_3,
-        has_fn=lambda pool: pool.binary_input_3 is not None,
+        attribute="binary_input_3",
+        group=GROUP_DIGITAL_INPUTS,
     ),
     PoolstationBinarySensorEntityDescription(
         key="binary_input_4",
         name="Digital input 4",
         is_on_fn=lambda pool: pool.binary_input_4,
-        has_fn=lambda pool: pool.binary_input_4 is not None,
+        attribute="binary_input_4",
+        group=GROUP_DIGITAL_INPUTS,
     ),
     PoolstationBinarySensorEntityDescription(
         key="uv_available",
         name="UV Available",
         is_on_fn=lambda pool: pool.uv_available,
-        has_fn=lambda pool: pool.uv_available is not None,
+        attribute="uv_available",
+        group=GROUP_UV,
     ),
     PoolstationBinarySensorEntityDescription(
         key="uv_enabled",
         name="UV Enabled",
         is_on_fn=lambda pool: pool.uv_enabled,
-        has_fn=lambda pool: pool.uv_enabled is not None,
+        attribute="uv_enabled",
+        group=GROUP_UV,
     ),
     PoolstationBinarySensorEntityDescription(
         key="uv_light",
         name="UV Light",
         is_on_fn=lambda pool: pool.uv_on,
-        has_fn=lambda pool: pool.uv_on is not None,
+        attribute="uv_on",
+        group=GROUP_UV,
     ),
     PoolstationBinarySensorEntityDescription(
         key="uv_ballast",
@@ -90,7 +101,8 @@ ENTITY_DESCRIPTIONS = (
         device_class=BinarySensorDeviceClass.PROBLEM,
         entity_category=EntityCategory.DIAGNOSTIC,
         is_on_fn=lambda pool: pool.uv_ballast_problem,
-        has_fn=lambda pool: pool.uv_ballast_problem is not None,
+        attribute="uv_ballast_problem",
+        group=GROUP_UV,
     ),
     PoolstationBinarySensorEntityDescription(
         key="uv_fuse",
@@ -98,7 +110,8 @@ ENTITY_DESCRIPTIONS = (
         device_class=BinarySensorDeviceClass.PROBLEM,
         entity_category=EntityCategory.DIAGNOSTIC,
         is_on_fn=lambda pool: pool.uv_fuse_problem,
-        has_fn=lambda pool: pool.uv_fuse_problem is not None,
+        attribute="uv_fuse_problem",
+        group=GROUP_UV,
     ),
 )
 
@@ -109,19 +122,18 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up the pool binary sensors."""
-    pools = hass.data[DOMAIN][config_entry.entry_id][DEVICES]
-    coordinators = hass.data[DOMAIN][config_entry.entry_id][COORDINATORS]
-    entities: list[PoolEntity] = []
-    for pool_id, pool in pools.items():
-        coordinator = coordinators[pool_id]
-        for description in ENTITY_DESCRIPTIONS:
+    async_add_pool_entities(
+        hass,
+        config_entry,
+        async_add_entities,
+        lambda pool, coordinator: (
+            PoolBinarySensorEntity(pool, coordinator, description)
+            for description in ENTITY_DESCRIPTIONS
             # Skip attributes this pool doesn't have (they would stay
             # stuck on unknown).
-            if not description.has_fn(pool):
-                continue
-            entities.append(PoolBinarySensorEntity(pool, coordinator, description))
-
-    async_add_entities(entities)
+            if coordinator.reports(description.attribute)
+        ),
+    )
 
 
 
@@ -139,9 +151,13 @@ class PoolBinarySensorEntity(PoolEntity, BinarySensorEntity):
         """Initialize the pool binary sensor"""
         super().__init__(pool, coordinator, " " + description.name)
         self.entity_description = description
+        self.entity_group = description.group
 
 
     @property
     def is_on(self) -> bool:
         """Return the state of the binary sensor."""
         return self.entity_description.is_on_fn(self.coordinator.pool)
+
+    def _state_value(self) -> bool:
+        return self.is_on
@@ -0,0 +1,135 @@
+"""Persistent cache of the last known state of a Poolstation account's pools."""
+from __future__ import annotations
+
+import logging
+from functools import partial
+from typing import Any, Final
+
+from aiohttp import ClientSession
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from pypoolstation import Pool, Relay
+
+from .const import DOMAIN
+
+STORAGE_VERSION: Final = 1
+
+# Seconds from a change of the pools to writing the cache to disk. Pools are
+# synced every minute; writing on every sync would be pointless churn.
+SAVE_DELAY: Final = 60
+
+# Everything the entities read from a pool (has_fn, value_fn, is_on_fn and
+# names), so a cached pool creates the same entities as a freshly synced one.
+POOL_ATTRIBUTES: Final = (
+    "alias",
+    "temperature",
+    "salt_concentration",
+    "current_ph",
+    "target_ph",
+    "current_orp",
+    "target_orp",
+    "current_clppm",
+    "target_clppm",
+    "percentage_electrolysis",
+    "target_percentage_electrolysis",
+    "binary_input_1",
+    "binary_input_1_name",
+    "binary_input_2",
+    "binary_input_2_name",
+    "binary_input_3",
+    "binary_input_3_name",
+    "binary_input_4",
+    "binary_input_4_name",
+    "waterflow_problem",
+    "uv_available",
+    "uv_on",
+    "uv_enabled",
+    "current_uv_timer",
+    "total_uv_timer",
+    "uv_ballast_problem",
+    "uv_fuse_problem",
+    "raw_vars",
+)
+
+
+class PoolCache:
+    """Last known state of a config entry's pools, kept in HA's storage."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialize the cache of a config entry."""
+        self._store: Store[dict[str, Any]] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}"
+        )
+        self._save_scheduled = False
+
+    async def async_load(
+        self, session: ClientSession, token: str, logger: logging.Logger
+    ) -> list[Pool]:
+        """Rebuild the cached pools, or return an empty list if there are none."""
+        data = await self._store.async_load()
+        if not data:
+            return []
+        return [
+            _pool_from_dict(session, token, logger, pool_data)
+            for pool_data in data["pools"]
+        ]
+
+    @callback
+    def async_save(self, pools: list[Pool]) -> None:
+        """Schedule writing the current state of ``pools`` to disk.
+
+        The cache is written SAVE_DELAY after the first change since it was
+        last written. Later changes go out with that write instead of
+        pushing it back, which pools updating at different times would
+        otherwise keep doing.
+        """
+        if self._save_scheduled:
+            return
+        self._save_scheduled = True
+        self._store.async_delay_save(partial(self._data_to_save, pools), SAVE_DELAY)
+
+    def _data_to_save(self, pools: list[Pool]) -> dict[str, Any]:
+        self._save_scheduled = False
+        return {"pools": [_pool_to_dict(pool) for pool in pools]}
+
+    async def async_remove(self) -> None:
+        """Delete the cache."""
+        await self._store.async_remove()
+
+
+def _pool_to_dict(pool: Pool) -> dict[str, Any]:
+    """Serialize the state of a pool."""
+    return {
+        "id": pool.id,
+        **{attribute: getattr(pool, attribute) for attribute in POOL_ATTRIBUTES},
+        "relays": [
+            {
+                "id": relay.id,
+                "name": relay.name,
+                "sign": relay.sign,
+                "active": relay.active,
+            }
+            for relay in pool.relays
+        ],
+    }
+
+
+def _pool_from_dict(
+    session: ClientSession, token: str, logger: logging.Logger, data: dict[str, Any]
+) -> Pool:
+    """Rebuild a pool from its serialized state."""
+    pool = Pool(session, token, data["id"], logger)
+    for attribute in POOL_ATTRIBUTES:
+        setattr(pool, attribute, data.get(attribute))
+    pool.raw_vars = pool.raw_vars or {}
+    pool.relays = [
+        Relay(
+            id=relay["id"],
+            pool=pool,
+            name=relay["name"],
+            sign=relay["sign"],
+            active=relay["active"],
+        )
+        for relay in data["relays"]
+    ]
+    return pool
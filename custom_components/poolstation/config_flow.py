@@ -5,14 +5,47 @@ import logging
 from typing import Any, Final
 
 import voluptuous as vol
-from aiohttp import ClientResponseError, DummyCookieJar
+from aiohttp import ClientError, ClientResponseError
 from homeassistant import config_entries
 from homeassistant.const import CONF_EMAIL, CONF_PASSWORD
+from homeassistant.core import callback
 from homeassistant.data_entry_flow import FlowResult
-from homeassistant.helpers.aiohttp_client import async_create_clientsession
-from pypoolstation import AuthenticationException, TwoFactorAuthRequiredException
+from homeassistant.exceptions import ConfigEntryAuthFailed, ConfigEntryNotReady
+from homeassistant.helpers.selector import (
+    SelectOptionDict,
+    SelectSelector,
+    SelectSelectorConfig,
+)
+from homeassistant.util.async_ import gather_with_limited_concurrency
+from pypoolstation import AuthenticationException, Pool, TwoFactorAuthRequiredException
 
-from .const import CONF_AUTH_CODE, DOMAIN, TOKEN
+from . import async_get_pools, async_update_token
+from .const import (
+    AUTH,
+    CONF_ACCOUNT_COORDINATOR,
+    CONF_ADAPTIVE_POLLING,
+    CONF_AUTH_CODE,
+    CONF_DEADBANDS,
+    CONF_DISABLED_GROUPS,
+    CONF_MAX_SCAN_INTERVAL,
+    CONF_MIN_SCAN_INTERVAL,
+    CONF_POOL_SCAN_INTERVALS,
+    CONF_POOLS,
+    CONF_REFRESH_CONCURRENCY,
+    CONF_SCAN_INTERVAL,
+    DEADBAND_SENSORS,
+    DEFAULT_MAX_SCAN_INTERVAL,
+    DEFAULT_MIN_SCAN_INTERVAL,
+    DEFAULT_REFRESH_CONCURRENCY,
+    DEFAULT_SCAN_INTERVAL,
+    DEVICES,
+    DOMAIN,
+    ENTITY_GROUPS,
+    FLOW_POOLS,
+    TOKEN,
+)
+from .entity import pool_name
+from .session import async_acquire_session, async_hold_session, async_release_session
 from .util import create_account
 
 _LOGGER: Final = logging.getLogger(__name__)
@@ -30,6 +63,39 @@ TWO_FACTOR_SCHEMA: Final = vol.Schema(
     }
 )
 
+# Shortest poll interval the options accept, in seconds.
+MIN_POLL_INTERVAL: Final = 10
+
+INTERVAL: Final = vol.All(vol.Coerce(int), vol.Range(min=MIN_POLL_INTERVAL))
+
+
+async def _async_pool_options(
+    pools: list[Pool], known: dict[str, Pool] | None = None
+) -> list[SelectOptionDict]:
+    """Return the pools as selector options, fetching the names not known yet."""
+    known = known or {}
+    # The account's pool list only has ids; names come with each pool's info.
+    await gather_with_limited_concurrency(
+        DEFAULT_REFRESH_CONCURRENCY,
+        *(pool.sync_info() for pool in pools if pool.id not in known),
+        return_exceptions=True,
+    )
+    return [
+        SelectOptionDict(value=pool.id, label=pool_name(known.get(pool.id, pool)))
+        for pool in pools
+    ]
+
+
+def _pools_schema(options: list[SelectOptionDict], selected: list[str]) -> vol.Schema:
+    """Return the schema of a form picking pools."""
+    return vol.Schema(
+        {
+            vol.Required(CONF_POOLS, default=selected): SelectSelector(
+                SelectSelectorConfig(options=options, multiple=True)
+            ),
+        }
+    )
+
 
 class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a config flow for Poolstation."""
@@ -40,6 +106,20 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         """Initialize config flow."""
         super().__init__()
         self._original_data: Any = None
+        self._entry_data: dict[str, Any] = {}
+        self._pool_options: list[SelectOptionDict] = []
+        self._pools: list[Pool] = []
+        # Whether the flow holds the shared session for the pools, which
+        # keep using it until the entry's setup takes them over.
+        self._holds_session = False
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,
+    ) -> OptionsFlowHandler:
+        """Get the options flow for this handler."""
+        return OptionsFlowHandler()
 
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
@@ -67,12 +147,13 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         return await self._attempt_reauth(self._original_data)
 
     async def _attempt_reauth(self, user_input):
-        account = self._create_account(user_input)
         errors: dict[str, str]
         errors = {}
         try:
             login_code = user_input.get(CONF_AUTH_CODE, "")
-            token = await account.login(login_code=login_code)
+            async with async_hold_session(self.hass) as session:
+                account = self._create_account(session, user_input)
+                token = await account.login(login_code=login_code)
         except TwoFactorAuthRequiredException:
             return await self.async_step_reauth_two_factor()
         except (TimeoutError, ClientResponseError):
@@ -95,7 +176,10 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                         CONF_PASSWORD: user_input[CONF_PASSWORD],
                     },
                 )
-                await self.hass.config_entries.async_reload(existing_entry.entry_id)
+                # A running entry carries on with the new token; one that
+                # failed to set up is set up again.
+                if not async_update_token(self.hass, existing_entry, token):
+                    await self.hass.config_entries.async_reload(existing_entry.entry_id)
                 return self.async_abort(reason="reauth_successful")
             return self.async_abort(reason="reauth_failed_existing")
         # Errors are shown on a form so the user can retry instead of the
@@ -110,16 +194,21 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             )
         return self._show_reauth_confirm_form(errors)
 
-    def _create_account(self, user_input):
-        session = async_create_clientsession(self.hass, cookie_jar=DummyCookieJar())
+    def _create_account(self, session, user_input):
         return create_account(
             session, user_input[CONF_EMAIL], user_input[CONF_PASSWORD], _LOGGER
         )
 
     async def _attempt_login(self, user_input):
+        # Entries may be unloaded, and the shared session closed, while the
+        # flow waits on poolstation.net.
+        async with async_hold_session(self.hass) as session:
+            return await self._async_login(session, user_input)
+
+    async def _async_login(self, session, user_input):
         errors: dict[str, str]
         errors = {}
-        account = self._create_account(user_input)
+        account = self._create_account(session, user_input)
 
         try:
             login_code = user_input.get(CONF_AUTH_CODE, "")
@@ -137,14 +226,27 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         else:
             await self.async_set_unique_id(user_input[CONF_EMAIL].lower())
             self._abort_if_unique_id_configured()
-            return self.async_create_entry(
-                title=user_input[CONF_EMAIL].lower(),
-                data={
-                    TOKEN: token,
-                    CONF_EMAIL: user_input[CONF_EMAIL],
-                    CONF_PASSWORD: user_input[CONF_PASSWORD],
-                },
-            )
+            self._entry_data = {
+                TOKEN: token,
+                CONF_EMAIL: user_input[CONF_EMAIL],
+                CONF_PASSWORD: user_input[CONF_PASSWORD],
+            }
+            try:
+                pools = await Pool.get_all_pools(session, account=account)
+            except (TimeoutError, ClientError):
+                errors["base"] = "cannot_connect"
+            except AuthenticationException:
+                errors["base"] = "invalid_auth"
+            else:
+                self._pools = pools
+                if not self._holds_session:
+                    async_acquire_session(self.hass)
+                    self._holds_session = True
+                if len(pools) <= 1:
+                    # Nothing to choose from; the entry imports the account.
+                    return self._create_entry()
+                self._pool_options = await _async_pool_options(pools)
+                return await self.async_step_pools()
 
         if CONF_AUTH_CODE in user_input:
             # The call came from the 2FA step; retry the code instead of
@@ -156,6 +258,43 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             step_id="user", data_schema=DATA_SCHEMA, errors=errors
         )
 
+    async def async_step_pools(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Pick the pools of the account to import."""
+        errors: dict[str, str] = {}
+        if user_input is not None:
+            if user_input[CONF_POOLS]:
+                return self._create_entry({CONF_POOLS: user_input[CONF_POOLS]})
+            errors["base"] = "no_pools"
+
+        return self.async_show_form(
+            step_id="pools",
+            data_schema=_pools_schema(
+                self._pool_options, [option["value"] for option in self._pool_options]
+            ),
+            errors=errors,
+        )
+
+    def _create_entry(self, options: dict[str, Any] | None = None) -> FlowResult:
+        """Create the entry of the account that was logged in to."""
+        # Its first setup takes over the pools instead of fetching them again,
+        # and the flow's hold on their session with them.
+        self.hass.data.setdefault(FLOW_POOLS, {})[self.unique_id] = self._pools
+        self._holds_session = False
+        return self.async_create_entry(
+            title=self._entry_data[CONF_EMAIL].lower(),
+            data=self._entry_data,
+            options=options or {},
+        )
+
+    @callback
+    def async_remove(self) -> None:
+        """Release the session of the pools when the flow ends without an entry."""
+        if self._holds_session:
+            self._holds_session = False
+            self.hass.async_create_task(async_release_session(self.hass))
+
     def _show_reauth_confirm_form(
         self, errors: dict[str, Any] | None = None
     ) -> FlowResult:
@@ -200,3 +339,184 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         login_data[CONF_AUTH_CODE] = user_input[CONF_AUTH_CODE]
 
         return await self._attempt_reauth(login_data)
+
+
+class OptionsFlowHandler(config_entries.OptionsFlow):
+    """Handle Poolstation options."""
+
+    def __init__(self) -> None:
+        """Initialize the options flow."""
+        # Pool ids by the name of their poll interval field.
+        self._pool_fields: dict[str, str] = {}
+        self._pool_options: list[SelectOptionDict] = []
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Pick the options to change."""
+        menu_options = ["polling", "entities", "deadbands"]
+        if self.config_entry.entry_id in self.hass.data.get(DOMAIN, {}):
+            # Listing the pools takes the running entry's pools and login.
+            menu_options[1:1] = ["pools", "pool_intervals"]
+        return self.async_show_menu(step_id="init", menu_options=menu_options)
+
+    def _async_save(self, **changes: Any) -> FlowResult:
+        """Store the options with the given ones changed."""
+        return self.async_create_entry(data={**self.config_entry.options, **changes})
+
+    async def async_step_polling(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Manage how often and how the pools are polled."""
+        errors: dict[str, str] = {}
+        if user_input is not None:
+            if user_input[CONF_MIN_SCAN_INTERVAL] > user_input[CONF_MAX_SCAN_INTERVAL]:
+                errors["base"] = "min_above_max"
+            else:
+                return self._async_save(**user_input)
+
+        options = {**self.config_entry.options, **(user_input or {})}
+        return self.async_show_form(
+            step_id="polling",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(
+                        CONF_SCAN_INTERVAL,
+                        default=options.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL),
+                    ): INTERVAL,
+                    vol.Required(
+                        CONF_ADAPTIVE_POLLING,
+                        default=options.get(CONF_ADAPTIVE_POLLING, False),
+                    ): bool,
+                    vol.Required(
+                        CONF_MIN_SCAN_INTERVAL,
+                        default=options.get(CONF_MIN_SCAN_INTERVAL, DEFAULT_MIN_SCAN_INTERVAL),
+                    ): INTERVAL,
+                    vol.Required(
+                        CONF_MAX_SCAN_INTERVAL,
+                        default=options.get(CONF_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL),
+                    ): INTERVAL,
+                    vol.Required(
+                        CONF_ACCOUNT_COORDINATOR,
+                        default=options.get(CONF_ACCOUNT_COORDINATOR, False),
+                    ): bool,
+                    vol.Required(
+                        CONF_REFRESH_CONCURRENCY,
+                        default=options.get(
+                            CONF_REFRESH_CONCURRENCY, DEFAULT_REFRESH_CONCURRENCY
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1)),
+                }
+            ),
+            errors=errors,
+        )
+
+    async def async_step_pools(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Manage the pools of the account that are imported."""
+        errors: dict[str, str] = {}
+        if user_input is not None:
+            if user_input[CONF_POOLS]:
+                return self._async_save(**user_input)
+            errors["base"] = "no_pools"
+
+        data = self.hass.data[DOMAIN][self.config_entry.entry_id]
+        if not self._pool_options:
+            try:
+                async with async_hold_session(self.hass) as session:
+                    pools = await async_get_pools(session, data[AUTH])
+                    self._pool_options = await _async_pool_options(pools, data[DEVICES])
+            except (ConfigEntryAuthFailed, ConfigEntryNotReady):
+                return self.async_abort(reason="cannot_connect")
+        return self.async_show_form(
+            step_id="pools",
+            data_schema=_pools_schema(
+                self._pool_options,
+                self.config_entry.options.get(
+                    CONF_POOLS, [option["value"] for option in self._pool_options]
+                ),
+            ),
+            errors=errors,
+        )
+
+    async def async_step_pool_intervals(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Manage the poll interval overrides of single pools."""
+        if user_input is not None:
+            return self._async_save(
+                **{
+                    CONF_POOL_SCAN_INTERVALS: {
+                        self._pool_fields[field]: interval
+                        for field, interval in user_input.items()
+                    }
+                }
+            )
+
+        pools = self.hass.data[DOMAIN][self.config_entry.entry_id][DEVICES]
+        names = [pool_name(pool) for pool in pools.values()]
+        self._pool_fields = {
+            # Pools sharing a name are told apart by their id.
+            name if names.count(name) == 1 else f"{name} ({pool_id})": pool_id
+            for name, pool_id in zip(names, pools, strict=True)
+        }
+        overrides = self.config_entry.options.get(CONF_POOL_SCAN_INTERVALS, {})
+        return self.async_show_form(
+            step_id="pool_intervals",
+            data_schema=vol.Schema(
+                {
+                    vol.Optional(
+                        field, description={"suggested_value": overrides.get(pool_id)}
+                    ): INTERVAL
+                    for field, pool_id in self._pool_fields.items()
+                }
+            ),
+        )
+
+    async def async_step_entities(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Manage the groups of entities that are switched off."""
+        if user_input is not None:
+            return self._async_save(**user_input)
+
+        return self.async_show_form(
+            step_id="entities",
+            data_schema=vol.Schema(
+                {
+                    vol.Optional(
+                        CONF_DISABLED_GROUPS,
+                        default=self.config_entry.options.get(CONF_DISABLED_GROUPS, []),
+                    ): SelectSelector(
+                        SelectSelectorConfig(
+                            options=list(ENTITY_GROUPS),
+                            multiple=True,
+                            translation_key="entity_group",
+                        )
+                    ),
+                }
+            ),
+        )
+
+    async def async_step_deadbands(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Manage the sensor deadbands."""
+        if user_input is not None:
+            return self._async_save(**{CONF_DEADBANDS: user_input})
+
+        # Until deadbands are first saved, the form suggests one per sensor;
+        # nothing is filtered before then.
+        deadbands = self.config_entry.options.get(CONF_DEADBANDS, DEADBAND_SENSORS)
+        return self.async_show_form(
+            step_id="deadbands",
+            data_schema=vol.Schema(
+                {
+                    vol.Optional(
+                        key, description={"suggested_value": deadbands.get(key)}
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0))
+                    for key in DEADBAND_SENSORS
+                }
+            ),
+        )
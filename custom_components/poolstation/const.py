@@ -5,5 +5,58 @@ DOMAIN: Final = "poolstation"
 TOKEN: Final = "token"
 CONF_AUTH_CODE: Final = "auth_code"
 COORDINATORS: Final = "coordinators"
+ACCOUNT_COORDINATOR: Final = "account_coordinator"
+AUTH: Final = "auth"
+BREAKER: Final = "breaker"
+CACHE: Final = "cache"
 DEVICES: Final = "devices"
+LIMITER: Final = "limiter"
+READY_POOLS: Final = "ready_pools"
+SYNCED_POOLS: Final = "synced_pools"
+# Dispatched, with the pool id, when a pool of the entry (by entry id) has
+# its first data and its entities can be added.
+SIGNAL_POOL_READY: Final = f"{DOMAIN}_pool_ready_{{}}"
 AUTH_RETRIES:  Final[int] = 10
+CONF_REFRESH_CONCURRENCY: Final = "refresh_concurrency"
+DEFAULT_REFRESH_CONCURRENCY: Final[int] = 5
+CONF_ACCOUNT_COORDINATOR: Final = "account_coordinator"
+CONF_ADAPTIVE_POLLING: Final = "adaptive_polling"
+CONF_MIN_SCAN_INTERVAL: Final = "min_scan_interval"
+CONF_MAX_SCAN_INTERVAL: Final = "max_scan_interval"
+DEFAULT_MIN_SCAN_INTERVAL: Final[int] = 15
+DEFAULT_MAX_SCAN_INTERVAL: Final[int] = 300
+CONF_DEADBANDS: Final = "deadbands"
+# Sensors (by description key) whose deadband can be set in the options, and
+# the deadband suggested for each: about the jitter of their probes.
+DEADBAND_SENSORS: Final[dict[str, float]] = {
+    "pH": 0.05,
+    "current_orp": 5.0,
+    "free_chlorine": 0.05,
+    "salt_concentration": 0.05,
+}
+CONF_SCAN_INTERVAL: Final = "scan_interval"
+DEFAULT_SCAN_INTERVAL: Final[int] = 60
+# Poll interval overrides (seconds), by pool id.
+CONF_POOL_SCAN_INTERVALS: Final = "pool_scan_intervals"
+CONF_DISABLED_GROUPS: Final = "disabled_entity_groups"
+# Groups of entities that can be switched off in the options.
+GROUP_UV: Final = "uv"
+GROUP_DIGITAL_INPUTS: Final = "digital_inputs"
+GROUP_RELAYS: Final = "relays"
+ENTITY_GROUPS: Final = (GROUP_UV, GROUP_DIGITAL_INPUTS, GROUP_RELAYS)
+# The options the running coordinators and platforms were last set up with.
+OPTIONS: Final = "options"
+# Ids of the account's pools to import; all of them when not set.
+CONF_POOLS: Final = "pools"
+# hass.data key of the pools a config flow fetched, by the unique id of the
+# entry it created, until that entry's first setup picks them up.
+FLOW_POOLS: Final = f"{DOMAIN}_flow_pools"
+# Ranges the controller accepts for its targets.
+MIN_PH: Final = 6.0
+MAX_PH: Final = 8.0
+MIN_ORP: Final = 600
+MAX_ORP: Final = 850
+MIN_CHLORINE: Final = 0.30
+MAX_CHLORINE: Final = 3.50
+MIN_PRODUCTION: Final = 0
+MAX_PRODUCTION: Final = 100
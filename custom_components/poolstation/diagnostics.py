@@ -0,0 +1,109 @@
+"""Diagnostics support for Poolstation."""
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import asdict
+from typing import Any, Final
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_EMAIL, CONF_PASSWORD, CONF_TOKEN
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+
+from . import PoolstationAccountCoordinator, PoolstationDataUpdateCoordinator
+from .backoff import Backoff, CircuitBreaker
+from .const import ACCOUNT_COORDINATOR, BREAKER, COORDINATORS, DOMAIN, LIMITER
+from .ratelimit import RateLimiter
+
+# The entry's title and unique id are the account's email address.
+TO_REDACT: Final = {CONF_EMAIL, CONF_PASSWORD, CONF_TOKEN, "title", "unique_id"}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    diagnostics: dict[str, Any] = {"entry": async_redact_data(entry.as_dict(), TO_REDACT)}
+    if (data := hass.data.get(DOMAIN, {}).get(entry.entry_id)) is None:
+        return diagnostics
+
+    entities = er.async_entries_for_config_entry(er.async_get(hass), entry.entry_id)
+    account_coordinator: PoolstationAccountCoordinator | None = data[ACCOUNT_COORDINATOR]
+    coordinators: dict[str, PoolstationDataUpdateCoordinator] = data[COORDINATORS]
+    return {
+        **diagnostics,
+        "circuit_breaker": _breaker_diagnostics(data[BREAKER]),
+        "rate_limiter": _limiter_diagnostics(data[LIMITER]),
+        "account_coordinator": (
+            {
+                "last_update_success": account_coordinator.last_update_success,
+                "auth_retries": account_coordinator.auth_retries,
+                "backoff": _backoff_diagnostics(account_coordinator.backoff),
+            }
+            if account_coordinator is not None
+            else None
+        ),
+        "entities": dict(Counter(entity.domain for entity in entities)),
+        "pools": {
+            pool_id: _pool_diagnostics(coordinator)
+            for pool_id, coordinator in coordinators.items()
+        },
+    }
+
+
+def _breaker_diagnostics(breaker: CircuitBreaker) -> dict[str, Any]:
+    """Return the state of the account's circuit breaker."""
+    return {
+        "state": breaker.state,
+        "failures": breaker.failures,
+        "backoff": _backoff_diagnostics(breaker.backoff),
+    }
+
+
+def _limiter_diagnostics(limiter: RateLimiter) -> dict[str, Any]:
+    """Return the state of the account's rate limiter."""
+    return {
+        "rate": limiter.rate,
+        "burst": limiter.burst,
+        "tokens": limiter.tokens,
+        "queue_depth": limiter.queue_depth,
+        "throttled_for": limiter.throttled_for(),
+        "throttles": limiter.throttles,
+    }
+
+
+def _backoff_diagnostics(backoff: Backoff) -> dict[str, Any]:
+    """Return the state of a backoff."""
+    return {"attempts": backoff.attempts, "base": backoff.base, "cap": backoff.cap}
+
+
+def _pool_diagnostics(coordinator: PoolstationDataUpdateCoordinator) -> dict[str, Any]:
+    """Return a pool's last snapshot and its coordinator's state."""
+    pool = coordinator.pool
+    stats = coordinator.stats
+    interval = coordinator.update_interval
+    error = coordinator.last_exception
+    return {
+        "alias": pool.alias,
+        "last_update_success": coordinator.last_update_success,
+        "last_exception": repr(error) if error is not None else None,
+        "update_interval": interval.total_seconds() if interval is not None else None,
+        "auth_retries": coordinator.auth_retries,
+        "backoff": _backoff_diagnostics(coordinator.backoff),
+        "queued_writes": list(coordinator.writes.pending),
+        "fetches": {
+            "successes": stats.successes,
+            "failures": stats.failures,
+            "consecutive_failures": stats.consecutive_failures,
+            "latency_p50": stats.latency(50),
+            "latency_p95": stats.latency(95),
+            "histogram": stats.histogram(),
+            "history": [asdict(fetch) for fetch in stats.history],
+        },
+        "raw_vars": async_redact_data(pool.raw_vars, TO_REDACT),
+        "relays": [
+            {"id": relay.id, "name": relay.name, "sign": relay.sign, "active": relay.active}
+            for relay in pool.relays
+        ],
+    }
@@ -1,17 +1,102 @@
 """Base class for Poolstation entity."""
 from __future__ import annotations
 
+from collections.abc import Callable, Iterable
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
-from pypoolstation import Pool
+from pypoolstation import Pool, Relay
+
+from .const import (
+    CONF_DISABLED_GROUPS,
+    COORDINATORS,
+    DEVICES,
+    DOMAIN,
+    READY_POOLS,
+    SIGNAL_POOL_READY,
+)
+
+if TYPE_CHECKING:
+    from . import PoolstationDataUpdateCoordinator
+
+
+@callback
+def async_add_pool_entities(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+    entities_fn: Callable[[Pool, PoolstationDataUpdateCoordinator], Iterable[PoolEntity]],
+) -> None:
+    """Add a platform's entities for each pool as soon as the pool has data.
+
+    ``entities_fn`` returns the entities a pool should have. Pools that are
+    ready already get theirs right away, the rest when they are announced.
+    A pool is announced again when what it reports or the entity groups
+    switched off in the options change; then only the entities it gained
+    are added and the ones it lost are removed.
+    """
+    data = hass.data[DOMAIN][config_entry.entry_id]
+    # The entities added for each pool, by unique id.
+    added: dict[str, dict[str, PoolEntity]] = {}
+
+    @callback
+    def async_add_pool(pool_id: str) -> None:
+        disabled = set(config_entry.options.get(CONF_DISABLED_GROUPS, ()))
+        entities = {
+            entity.unique_id: entity
+            for entity in entities_fn(data[DEVICES][pool_id], data[COORDINATORS][pool_id])
+            if entity.entity_group not in disabled
+        }
+        pool_added = added.setdefault(pool_id, {})
+        if stale := pool_added.keys() - entities.keys():
+            registry = er.async_get(hass)
+            for unique_id in stale:
+                entity = pool_added.pop(unique_id)
+                # Removing the registry entry removes the entity too.
+                if entity.entity_id and registry.async_get(entity.entity_id):
+                    registry.async_remove(entity.entity_id)
+        if new := [entity for entity in entities.values() if entity.unique_id not in pool_added]:
+            pool_added.update((entity.unique_id, entity) for entity in new)
+            async_add_entities(new)
+
+    config_entry.async_on_unload(
+        async_dispatcher_connect(
+            hass, SIGNAL_POOL_READY.format(config_entry.entry_id), async_add_pool
+        )
+    )
+    for pool_id in data[READY_POOLS]:
+        async_add_pool(pool_id)
+
 
-from . import PoolstationDataUpdateCoordinator
-from .const import DOMAIN
+def pool_name(pool: Pool) -> str:
+    """Return the name of a pool.
+
+    A pool that couldn't be fetched yet has no alias; it goes by its id.
+    """
+    return pool.alias or pool.id
+
+
+def pool_unique_id(pool: Pool, entity_suffix: str) -> str:
+    """Return the unique id of a pool's entity: the pool's id, then its suffix."""
+    return f"{pool.id}{entity_suffix}"
+
+
+def relay_entity_suffix(relay: Relay) -> str:
+    """Return the suffix of the name and unique id of a relay's switch."""
+    return f" Relay {relay.name}"
 
 
 class PoolEntity(CoordinatorEntity):
     """Representation of a pool entity."""
 
     coordinator: PoolstationDataUpdateCoordinator
+    # The group (see ENTITY_GROUPS) the entity is switched off with, if any.
+    entity_group: str | None = None
 
     def __init__(
         self,
@@ -22,15 +107,42 @@ class PoolEntity(CoordinatorEntity):
         """Init from config, hookup pool and coordinator."""
         super().__init__(coordinator)
         self.pool = pool
+        self._entity_suffix = entity_suffix
 
         pool_id = self.pool.id
-        name = self.pool.alias
 
-        self._attr_name = f"{name}{entity_suffix}"
-        self._attr_unique_id = f"{pool_id}{entity_suffix}"
+        self._attr_unique_id = pool_unique_id(pool, entity_suffix)
         self._attr_device_info = {
             "identifiers": {(DOMAIN, pool_id)},
             "manufacturer": "Fluidra",
             "model": "Poolstation",
-            "name": name,
+            "name": pool_name(pool),
         }
+
+    @property
+    def name(self) -> str:
+        """Return the name of the entity, after its pool's current name."""
+        return f"{pool_name(self.pool)}{self._entity_suffix}"
+
+    def _state_value(self) -> Any:
+        """Return the value this entity's state is derived from."""
+        raise NotImplementedError
+
+    def _significant_change(self, old: Any, new: Any) -> bool:
+        """Tell whether a change of the state value from ``old`` is worth writing."""
+        return True
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state only if this entity's value or availability changed."""
+        if self.coordinator.async_snapshot_changed(
+            self._attr_unique_id,
+            (self.available, self._state_value()),
+            self._significant_change,
+        ):
+            super()._handle_coordinator_update()
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Forget the last written value when the entity goes away."""
+        await super().async_will_remove_from_hass()
+        self.coordinator.async_forget_snapshot(self._attr_unique_id)
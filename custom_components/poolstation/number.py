@@ -1,10 +1,13 @@
 """Support for Poolstation numbers."""
 from __future__ import annotations
 
-from collections.abc import Awaitable, Callable
+import asyncio
+import logging
+from collections.abc import Callable
 from dataclasses import dataclass
-from typing import Any
+from typing import Final
 
+import aiohttp
 from homeassistant.components.number import (
     NumberDeviceClass,
     NumberEntity,
@@ -13,12 +16,28 @@ from homeassistant.components.number import (
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import PERCENTAGE
 from homeassistant.core import HomeAssistant
+from homeassistant.helpers.debounce import Debouncer
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from pypoolstation import Pool
+from pypoolstation import AuthenticationException, Pool
 
 from . import PoolstationDataUpdateCoordinator
-from .const import COORDINATORS, DEVICES, DOMAIN
-from .entity import PoolEntity
+from .const import (
+    MAX_CHLORINE,
+    MAX_ORP,
+    MAX_PH,
+    MAX_PRODUCTION,
+    MIN_CHLORINE,
+    MIN_ORP,
+    MIN_PH,
+    MIN_PRODUCTION,
+)
+from .entity import PoolEntity, async_add_pool_entities
+
+_LOGGER: Final = logging.getLogger(__name__)
+
+# Seconds to wait for further changes (e.g. while a slider is being dragged)
+# before sending the last requested value to the cloud.
+NUMBER_WRITE_COOLDOWN: Final = 1.0
 
 
 @dataclass
@@ -26,7 +45,6 @@ class PoolstationNumberEntityDescriptionMixin:
     """Mixin for required keys."""
 
     value_fn: Callable[[Pool], int | float]
-    set_value_fn: Callable[[Pool, int | float], Awaitable[Any]]
 
 
 @dataclass
@@ -36,15 +54,6 @@ class PoolstationNumberEntityDescription(
     """Class describing Poolstation number entities."""
 
 
-MIN_PH = 6.0
-MAX_PH = 8.0
-
-MIN_ORP = 600
-MAX_ORP = 850
-
-MIN_CHLORINE = 0.30
-MAX_CHLORINE = 3.50
-
 if hasattr(NumberDeviceClass, "PH"):
     TARGET_PH_DESCRIPTION = PoolstationNumberEntityDescription(
         key="target_ph",
@@ -54,7 +63,6 @@ if hasattr(NumberDeviceClass, "PH"):
         device_class=NumberDeviceClass.PH,
         native_step=0.01,
         value_fn=lambda pool: pool.target_ph,
-        set_value_fn=lambda pool, value: pool.set_target_ph(value),
     )
 else:
     TARGET_PH_DESCRIPTION = PoolstationNumberEntityDescription(
@@ -64,7 +72,6 @@ else:
         native_min_value=MIN_PH,
         native_step=0.01,
         value_fn=lambda pool: pool.target_ph,
-        set_value_fn=lambda pool, value: pool.set_target_ph(value),
     )
 
 ENTITY_DESCRIPTIONS = (
@@ -78,7 +85,6 @@ ENTITY_DESCRIPTIONS = (
         device_class=NumberDeviceClass.VOLTAGE,
         native_step=1,
         value_fn=lambda pool: pool.target_orp,
-        set_value_fn=lambda pool, value: pool.set_target_orp(int(value)),
     ),
     PoolstationNumberEntityDescription(
         key="target_chlorine",
@@ -89,20 +95,16 @@ ENTITY_DESCRIPTIONS = (
         device_class=NumberDeviceClass.VOLATILE_ORGANIC_COMPOUNDS,
         native_step=0.01,
         value_fn=lambda pool: pool.target_clppm,
-        set_value_fn=lambda pool, value: pool.set_target_clppm(value),
     ),
     PoolstationNumberEntityDescription(
         key="target_production",
         name="Target Production",
         icon="mdi:gauge",
-        native_max_value=100,
-        native_min_value=0,
+        native_max_value=MAX_PRODUCTION,
+        native_min_value=MIN_PRODUCTION,
         native_step=1,
         native_unit_of_measurement=PERCENTAGE,
         value_fn=lambda pool: pool.target_percentage_electrolysis,
-        set_value_fn=lambda pool, value: pool.set_target_percentage_electrolysis(
-            int(value)
-        ),
     ),
 )
 
@@ -113,15 +115,15 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up the pool numbers."""
-    pools = hass.data[DOMAIN][config_entry.entry_id][DEVICES]
-    coordinators = hass.data[DOMAIN][config_entry.entry_id][COORDINATORS]
-    entities: list[PoolEntity] = []
-    for pool_id, pool in pools.items():
-        coordinator = coordinators[pool_id]
-        for description in ENTITY_DESCRIPTIONS:
-            entities.append(PoolNumberEntity(pool, coordinator, description))
-
-    async_add_entities(entities)
+    async_add_pool_entities(
+        hass,
+        config_entry,
+        async_add_entities,
+        lambda pool, coordinator: (
+            PoolNumberEntity(pool, coordinator, description)
+            for description in ENTITY_DESCRIPTIONS
+        ),
+    )
 
 
 class PoolNumberEntity(PoolEntity, NumberEntity):
@@ -138,13 +140,86 @@ class PoolNumberEntity(PoolEntity, NumberEntity):
         """Initialize the pool's target PH."""
         super().__init__(pool, coordinator, " " + description.name)
         self.entity_description = description
+        # Value requested by the user but not confirmed by the cloud yet.
+        # Shown optimistically until it's been written.
+        self._pending_value: float | None = None
+        self._write_debouncer = Debouncer(
+            coordinator.hass,
+            _LOGGER,
+            cooldown=NUMBER_WRITE_COOLDOWN,
+            immediate=False,
+            function=self._async_write_pending_value,
+        )
 
     @property
     def native_value(self) -> float:
         """Return the number value."""
+        if self._pending_value is not None:
+            return self._pending_value
+        return self._requested_value()
+
+    def _requested_value(self) -> float:
+        """Return the value queued for the pool, or else the pool's."""
+        if (queued := self.coordinator.writes.get(self.entity_description.key)) is not None:
+            return queued
         return self.entity_description.value_fn(self.coordinator.pool)
 
+    def _state_value(self) -> float:
+        return self.native_value
+
     async def async_set_native_value(self, value: float) -> None:
-        """Change to new number value."""
-        await self.entity_description.set_value_fn(self.coordinator.pool, value)
+        """Change to new number value.
+
+        The write is coalesced with any other change made within
+        NUMBER_WRITE_COOLDOWN, so only the last value is sent.
+        """
+        if self._pending_value is None and value == self._requested_value():
+            return
+        self._pending_value = value
         self.async_write_ha_state()
+        await self._write_debouncer.async_call()
+
+    async def _async_write_pending_value(self) -> None:
+        """Send the last requested value and drop the optimistic state.
+
+        The debouncer drops calls made while this runs, so a value requested
+        during a (slow) send is sent from here, once the changes have
+        settled for NUMBER_WRITE_COOLDOWN.
+        """
+        value = self._pending_value
+        while value is not None:
+            try:
+                await self._async_send_value(value)
+            finally:
+                if self._pending_value == value:
+                    self._pending_value = None
+                self.async_write_ha_state()
+            if self._pending_value is None:
+                return
+            # A newer value was requested while this one was being sent.
+            await asyncio.sleep(NUMBER_WRITE_COOLDOWN)
+            value = self._pending_value
+
+    async def _async_send_value(self, value: float) -> None:
+        """Write a value to the cloud, unless the pool already has it.
+
+        While poolstation.net can't be reached the value is queued instead,
+        and shown until it's sent.
+        """
+        if value == self._requested_value():
+            return
+        try:
+            sent = await self.coordinator.writes.async_write(self.entity_description.key, value)
+        except (aiohttp.ClientError, TimeoutError, AuthenticationException) as err:
+            _LOGGER.error("Error setting %s to %s: %s", self.name, value, err)
+        else:
+            if sent:
+                self.coordinator.async_note_write()
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Send any pending value before the entity goes away."""
+        self._write_debouncer.async_shutdown()
+        if (value := self._pending_value) is not None:
+            self._pending_value = None
+            await self._async_send_value(value)
+        await super().async_will_remove_from_hass()
@@ -0,0 +1,180 @@
+"""Request budget shared by everything that talks to poolstation.net for an account."""
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from enum import IntEnum
+from typing import Final
+
+import aiohttp
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util import dt as dt_util
+
+_LOGGER: Final = logging.getLogger(__name__)
+
+# Requests per second an account sends on average, and how many it may send
+# at once after being idle (enough for the first refresh of most accounts).
+REQUEST_RATE: Final = 2.0
+REQUEST_BURST: Final = 20
+
+# Seconds to hold every request back after a 429 that doesn't say how long,
+# and the longest a Retry-After is honored for.
+DEFAULT_RETRY_AFTER: Final = 60.0
+MAX_RETRY_AFTER: Final = 3600.0
+
+
+class Priority(IntEnum):
+    """Order in which waiting requests are let through; lowest first."""
+
+    WRITE = 0
+    POLL = 1
+
+
+def retry_after(err: aiohttp.ClientResponseError) -> float:
+    """Return the seconds a throttled response asks to wait before the next request."""
+    value = (err.headers or {}).get("Retry-After")
+    if value is None:
+        return DEFAULT_RETRY_AFTER
+    try:
+        delay = float(value)
+    except ValueError:
+        try:
+            delay = (parsedate_to_datetime(value) - dt_util.utcnow()).total_seconds()
+        except (TypeError, ValueError):
+            return DEFAULT_RETRY_AFTER
+    return max(0.0, min(MAX_RETRY_AFTER, delay))
+
+
+class RateLimiter:
+    """Token bucket for the requests of an account.
+
+    Polls of every pool and writes from the entities and services all take
+    a token before sending a request. Tokens come back at ``rate`` per
+    second, up to ``burst``. Requests that have to wait are let
+    through by priority, so a user's write doesn't queue behind a round of
+    polls. A 429 response holds every request back for as long as its
+    Retry-After asks.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        rate: float = REQUEST_RATE,
+        burst: int = REQUEST_BURST,
+    ) -> None:
+        """Initialize the rate limiter."""
+        self._hass = hass
+        self.rate = rate
+        self.burst = burst
+        self.throttles = 0
+        self._tokens = float(burst)
+        self._updated = hass.loop.time()
+        self._resume_at = 0.0
+        # (priority, arrival, future) of the requests waiting for a token.
+        self._waiters: list[tuple[int, int, asyncio.Future[None]]] = []
+        self._arrivals = itertools.count()
+        self._timer: asyncio.TimerHandle | None = None
+
+    @property
+    def queue_depth(self) -> int:
+        """Return how many requests are waiting for a token."""
+        return len(self._waiters)
+
+    @property
+    def tokens(self) -> float:
+        """Return how many requests may be sent right away."""
+        self._refill()
+        return self._tokens
+
+    def throttled_for(self) -> float | None:
+        """Return the seconds left of a 429's Retry-After, or None if not throttled."""
+        if (remaining := self._resume_at - self._hass.loop.time()) > 0:
+            return remaining
+        return None
+
+    @asynccontextmanager
+    async def async_request(self, priority: Priority) -> AsyncIterator[None]:
+        """Wait for a token, then send the request in the block.
+
+        A 429 raised from the block holds back the requests that follow.
+        """
+        await self.async_acquire(priority)
+        try:
+            yield
+        except aiohttp.ClientResponseError as err:
+            if err.status == 429:
+                self.async_throttle(retry_after(err))
+            raise
+
+    async def async_acquire(self, priority: Priority) -> None:
+        """Wait until a request of the given priority may be sent."""
+        if not self._waiters and self._take():
+            return
+        future: asyncio.Future[None] = self._hass.loop.create_future()
+        waiter = (priority, next(self._arrivals), future)
+        heapq.heappush(self._waiters, waiter)
+        self._async_release_waiters()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+                heapq.heapify(self._waiters)
+            elif not future.cancelled():
+                # Given a token just as it was cancelled; pass it on.
+                self._tokens += 1
+                self._async_release_waiters()
+            raise
+
+    @callback
+    def async_throttle(self, delay: float) -> None:
+        """Hold every request back for ``delay`` seconds."""
+        _LOGGER.warning(
+            "Pool station is throttling requests, holding them back for %.0f seconds", delay
+        )
+        self.throttles += 1
+        self._resume_at = max(self._resume_at, self._hass.loop.time() + delay)
+        # Start from an empty bucket when requests resume, not a full burst.
+        self._tokens = 0.0
+        self._updated = self._resume_at
+        self._async_release_waiters()
+
+    def _refill(self) -> None:
+        now = self._hass.loop.time()
+        if now <= self._updated:
+            return
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _take(self) -> bool:
+        """Take a token if one is available."""
+        if self.throttled_for() is not None:
+            return False
+        self._refill()
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    @callback
+    def _async_release_waiters(self) -> None:
+        """Let waiting requests through while there are tokens, and wait for the next."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._waiters and self._take():
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                # Cancelled, but not yet removed by its request.
+                self._tokens += 1
+                continue
+            future.set_result(None)
+        if not self._waiters:
+            return
+        delay = self.throttled_for() or (1 - self._tokens) / self.rate
+        self._timer = self._hass.loop.call_later(delay, self._async_release_waiters)
@@ -1,8 +1,9 @@
 """Support for Poolstation sensors."""
 from __future__ import annotations
 
-from collections.abc import Callable
+from collections.abc import Callable, Iterator
 from dataclasses import dataclass
+from typing import Any
 
 from homeassistant.components.sensor import (
     SensorDeviceClass,
@@ -11,14 +12,15 @@ from homeassistant.components.sensor import (
     SensorStateClass,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import PERCENTAGE, UnitOfTemperature
+from homeassistant.const import PERCENTAGE, EntityCategory, UnitOfTemperature, UnitOfTime
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.significant_change import check_absolute_change
 from pypoolstation import Pool
 
 from . import PoolstationDataUpdateCoordinator
-from .const import COORDINATORS, DEVICES, DOMAIN
-from .entity import PoolEntity
+from .const import CONF_DEADBANDS, GROUP_UV
+from .entity import PoolEntity, async_add_pool_entities
 
 
 @dataclass
@@ -34,7 +36,10 @@ class PoolstationSensorEntityDescription(
 ):
     """Class describing Poolstation sensor entities."""
 
-    has_fn: Callable[[Pool], bool] = lambda _: True
+    # The Pool attribute the reading comes from; the sensor exists while
+    # the pool reports it.
+    attribute: str | None = None
+    group: str | None = None
 
 
 if hasattr(SensorDeviceClass, "PH"):
@@ -44,7 +49,7 @@ if hasattr(SensorDeviceClass, "PH"):
         device_class=SensorDeviceClass.PH,
         state_class=SensorStateClass.MEASUREMENT,
         value_fn=lambda pool: pool.current_ph,
-        has_fn=lambda pool: pool.current_ph is not None,
+        attribute="current_ph",
     )
 else:
     PH_SENSOR_DESCRIPTION = PoolstationSensorEntityDescription(
@@ -52,7 +57,7 @@ else:
         name="pH",
         state_class=SensorStateClass.MEASUREMENT,
         value_fn=lambda pool: pool.current_ph,
-        has_fn=lambda pool: pool.current_ph is not None,
+        attribute="current_ph",
     )
 
 ENTITY_DESCRIPTIONS = (
@@ -64,7 +69,7 @@ ENTITY_DESCRIPTIONS = (
         state_class=SensorStateClass.MEASUREMENT,
         native_unit_of_measurement=UnitOfTemperature.CELSIUS,
         value_fn=lambda pool: pool.temperature,
-        has_fn=lambda pool: pool.temperature is not None,
+        attribute="temperature",
     ),
     PoolstationSensorEntityDescription(
         key="salt_concentration",
@@ -73,7 +78,7 @@ ENTITY_DESCRIPTIONS = (
         native_unit_of_measurement="gr/l",
         state_class=SensorStateClass.MEASUREMENT,
         value_fn=lambda pool: pool.salt_concentration,
-        has_fn=lambda pool: pool.salt_concentration is not None,
+        attribute="salt_concentration",
     ),
     PoolstationSensorEntityDescription(
         key="percentage_electrolysis",
@@ -82,7 +87,7 @@ ENTITY_DESCRIPTIONS = (
         state_class=SensorStateClass.MEASUREMENT,
         icon="mdi:water-percent",
         value_fn=lambda pool: pool.percentage_electrolysis,
-        has_fn=lambda pool: pool.percentage_electrolysis is not None,
+        attribute="percentage_electrolysis",
     ),
     PoolstationSensorEntityDescription(
         key="current_orp",
@@ -92,7 +97,7 @@ ENTITY_DESCRIPTIONS = (
         state_class=SensorStateClass.MEASUREMENT,
         native_unit_of_measurement="mV",
         value_fn=lambda pool: pool.current_orp,
-        has_fn=lambda pool: pool.current_orp is not None,
+        attribute="current_orp",
     ),
     *(
         [
@@ -107,7 +112,7 @@ ENTITY_DESCRIPTIONS = (
                 state_class=SensorStateClass.MEASUREMENT,
                 native_unit_of_measurement="ppm",
                 value_fn=lambda pool: pool.current_clppm,
-                has_fn=lambda pool: pool.current_clppm is not None,
+                attribute="current_clppm",
             )
         ]
         if hasattr(SensorDeviceClass, "VOLATILE_ORGANIC_COMPOUNDS_PARTS")
@@ -119,7 +124,7 @@ ENTITY_DESCRIPTIONS = (
                 state_class=SensorStateClass.MEASUREMENT,
                 native_unit_of_measurement="ppm",
                 value_fn=lambda pool: pool.current_clppm,
-                has_fn=lambda pool: pool.current_clppm is not None,
+                attribute="current_clppm",
             )
         ]
     ),
@@ -131,7 +136,8 @@ ENTITY_DESCRIPTIONS = (
         state_class=SensorStateClass.MEASUREMENT,
         native_unit_of_measurement="h",
         value_fn=lambda pool: pool.current_uv_timer,
-        has_fn=lambda pool: pool.current_uv_timer is not None,
+        attribute="current_uv_timer",
+        group=GROUP_UV,
     ),
     PoolstationSensorEntityDescription(
         key="uv_total_timer",
@@ -141,11 +147,110 @@ ENTITY_DESCRIPTIONS = (
         state_class=SensorStateClass.MEASUREMENT,
         native_unit_of_measurement="h",
         value_fn=lambda pool: pool.total_uv_timer,
-        has_fn=lambda pool: pool.total_uv_timer is not None,
+        attribute="total_uv_timer",
+        group=GROUP_UV,
     )
 )
 
 
+@dataclass
+class PoolstationCoordinatorSensorEntityDescriptionMixin:
+    """Mixin values for sensors reporting on the coordinator itself."""
+
+    value_fn: Callable[[PoolstationDataUpdateCoordinator], int | float | None]
+
+
+@dataclass
+class PoolstationCoordinatorSensorEntityDescription(
+    SensorEntityDescription, PoolstationCoordinatorSensorEntityDescriptionMixin
+):
+    """Class describing Poolstation coordinator diagnostic sensor entities."""
+
+    has_fn: Callable[[PoolstationDataUpdateCoordinator], bool] = lambda _: True
+
+
+COORDINATOR_ENTITY_DESCRIPTIONS = (
+    PoolstationCoordinatorSensorEntityDescription(
+        key="poll_interval",
+        name="Poll Interval",
+        icon="mdi:timer-sync-outline",
+        device_class=SensorDeviceClass.DURATION,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        value_fn=lambda coordinator: coordinator.update_interval.total_seconds(),
+        # The interval only moves (and is worth watching) in adaptive mode.
+        has_fn=lambda coordinator: coordinator.adaptive,
+    ),
+    # Fetch statistics change on every poll, so they are disabled by default
+    # rather than adding state writes and recorder rows for every pool.
+    PoolstationCoordinatorSensorEntityDescription(
+        key="fetch_latency",
+        name="Fetch Latency",
+        icon="mdi:timer-outline",
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        value_fn=lambda coordinator: _milliseconds(coordinator.stats.latency(50)),
+    ),
+    PoolstationCoordinatorSensorEntityDescription(
+        key="fetch_latency_p95",
+        name="Fetch Latency 95th Percentile",
+        icon="mdi:timer-alert-outline",
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        value_fn=lambda coordinator: _milliseconds(coordinator.stats.latency(95)),
+    ),
+    PoolstationCoordinatorSensorEntityDescription(
+        key="fetch_successes",
+        name="Fetch Successes",
+        icon="mdi:cloud-check-outline",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        value_fn=lambda coordinator: coordinator.stats.successes,
+    ),
+    PoolstationCoordinatorSensorEntityDescription(
+        key="fetch_failures",
+        name="Fetch Failures",
+        icon="mdi:cloud-alert-outline",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        value_fn=lambda coordinator: coordinator.stats.failures,
+    ),
+    PoolstationCoordinatorSensorEntityDescription(
+        key="consecutive_fetch_failures",
+        name="Consecutive Fetch Failures",
+        icon="mdi:cloud-off-outline",
+        state_class=SensorStateClass.MEASUREMENT,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        value_fn=lambda coordinator: coordinator.stats.consecutive_failures,
+    ),
+    # The account's rate limiter is shared by all pools; each pool's sensor
+    # samples it when that pool updates.
+    PoolstationCoordinatorSensorEntityDescription(
+        key="request_queue",
+        name="Request Queue",
+        icon="mdi:tray-full",
+        state_class=SensorStateClass.MEASUREMENT,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        value_fn=lambda coordinator: coordinator.limiter.queue_depth,
+    ),
+)
+
+
+def _milliseconds(seconds: float | None) -> int | None:
+    """Convert a duration to whole milliseconds."""
+    return None if seconds is None else round(seconds * 1000)
+
+
 class PoolSensorEntity(PoolEntity, SensorEntity):
     """Representation of a pool sensor."""
 
@@ -160,12 +265,55 @@ class PoolSensorEntity(PoolEntity, SensorEntity):
         """Initialize the pool's target PH."""
         super().__init__(pool, coordinator, " " + description.name)
         self.entity_description = description
+        self.entity_group = description.group
 
     @property
     def native_value(self) -> str | int:
         """Return the sensor value."""
         return self.entity_description.value_fn(self.coordinator.pool)
 
+    def _state_value(self) -> str | int:
+        return self.native_value
+
+    def _significant_change(self, old: Any, new: Any) -> bool:
+        """Skip changes within the deadband set for this sensor in the options."""
+        entry = self.coordinator.config_entry
+        if entry is None or old is None or new is None:
+            return True
+        deadband = entry.options.get(CONF_DEADBANDS, {}).get(self.entity_description.key)
+        if deadband is None:
+            return True
+        return check_absolute_change(float(old), float(new), deadband)
+
+
+class PoolCoordinatorSensorEntity(PoolEntity, SensorEntity):
+    """Representation of a diagnostic sensor about a pool's coordinator."""
+
+    entity_description: PoolstationCoordinatorSensorEntityDescription
+
+    def __init__(
+        self,
+        pool: Pool,
+        coordinator: PoolstationDataUpdateCoordinator,
+        description: PoolstationCoordinatorSensorEntityDescription,
+    ) -> None:
+        """Initialize the coordinator diagnostic sensor."""
+        super().__init__(pool, coordinator, " " + description.name)
+        self.entity_description = description
+
+    @property
+    def available(self) -> bool:
+        """Stay available while the cloud is failing; that is when it matters."""
+        return True
+
+    @property
+    def native_value(self) -> int | float | None:
+        """Return the sensor value."""
+        return self.entity_description.value_fn(self.coordinator)
+
+    def _state_value(self) -> int | float | None:
+        return self.native_value
+
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -173,16 +321,18 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up the poolstation sensors."""
-    stations = hass.data[DOMAIN][config_entry.entry_id][DEVICES]
-    coordinators = hass.data[DOMAIN][config_entry.entry_id][COORDINATORS]
-    entities: list[PoolEntity] = []
-    for pool_id, pool in stations.items():
-        coordinator = coordinators[pool_id]
-        for description in ENTITY_DESCRIPTIONS:
-            # Skip attributes this pool doesn't have (they would stay
-            # stuck on unknown).
-            if not description.has_fn(pool):
-                continue
-            entities.append(PoolSensorEntity(pool, coordinator, description))
-
-    async_add_entities(entities)
+    async_add_pool_entities(hass, config_entry, async_add_entities, _pool_entities)
+
+
+def _pool_entities(
+    pool: Pool, coordinator: PoolstationDataUpdateCoordinator
+) -> Iterator[PoolEntity]:
+    """Return the sensors of a pool."""
+    for description in ENTITY_DESCRIPTIONS:
+        # Skip attributes this pool doesn't have (they would stay
+        # stuck on unknown).
+        if description.attribute is None or coordinator.reports(description.attribute):
+            yield PoolSensorEntity(pool, coordinator, description)
+    for coordinator_description in COORDINATOR_ENTITY_DESCRIPTIONS:
+        if coordinator_description.has_fn(coordinator):
+            yield PoolCoordinatorSensorEntity(pool, coordinator, coordinator_description)
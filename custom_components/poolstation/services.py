@@ -0,0 +1,286 @@
+"""Services of the Poolstation integration."""
+from __future__ import annotations
+
+from collections.abc import Coroutine
+from functools import partial
+from typing import Any, Final
+
+import aiohttp
+import voluptuous as vol
+from homeassistant.components.switch import DOMAIN as SWITCH_DOMAIN
+from homeassistant.const import ATTR_DEVICE_ID, ATTR_ENTITY_ID, ATTR_STATE
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers import entity_registry as er
+from homeassistant.util.async_ import gather_with_limited_concurrency
+from pypoolstation import AuthenticationException, Pool, Relay
+
+from .const import (
+    COORDINATORS,
+    DEVICES,
+    DOMAIN,
+    MAX_CHLORINE,
+    MAX_ORP,
+    MAX_PH,
+    MAX_PRODUCTION,
+    MIN_CHLORINE,
+    MIN_ORP,
+    MIN_PH,
+    MIN_PRODUCTION,
+)
+from .entity import pool_unique_id, relay_entity_suffix
+from .write_queue import TARGETS, relay_key
+
+SERVICE_SET_RELAYS: Final = "set_relays"
+SERVICE_SET_TARGETS: Final = "set_targets"
+ATTR_RELAYS: Final = "relays"
+ATTR_TARGET_PH: Final = "target_ph"
+ATTR_TARGET_ORP: Final = "target_orp"
+ATTR_TARGET_CHLORINE: Final = "target_chlorine"
+ATTR_TARGET_PRODUCTION: Final = "target_production"
+
+# Writes (and refreshes) sent to poolstation.net at once by a service call.
+WRITE_CONCURRENCY: Final = 5
+
+SET_RELAYS_SCHEMA: Final = vol.Schema(
+    {
+        vol.Required(ATTR_RELAYS): vol.All(
+            cv.ensure_list,
+            [
+                vol.Schema(
+                    {
+                        vol.Required(ATTR_ENTITY_ID): cv.entity_id,
+                        vol.Required(ATTR_STATE): cv.boolean,
+                    }
+                )
+            ],
+            vol.Length(min=1),
+        ),
+    }
+)
+
+SET_TARGETS_SCHEMA: Final = vol.All(
+    vol.Schema(
+        {
+            vol.Required(ATTR_DEVICE_ID): vol.All(cv.ensure_list, [cv.string]),
+            vol.Optional(ATTR_TARGET_PH): vol.All(
+                vol.Coerce(float), vol.Range(min=MIN_PH, max=MAX_PH)
+            ),
+            vol.Optional(ATTR_TARGET_ORP): vol.All(
+                vol.Coerce(int), vol.Range(min=MIN_ORP, max=MAX_ORP)
+            ),
+            vol.Optional(ATTR_TARGET_CHLORINE): vol.All(
+                vol.Coerce(float), vol.Range(min=MIN_CHLORINE, max=MAX_CHLORINE)
+            ),
+            vol.Optional(ATTR_TARGET_PRODUCTION): vol.All(
+                vol.Coerce(int), vol.Range(min=MIN_PRODUCTION, max=MAX_PRODUCTION)
+            ),
+        }
+    ),
+    cv.has_at_least_one_key(*TARGETS),
+)
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the Poolstation services."""
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SET_RELAYS,
+        partial(_async_set_relays, hass),
+        schema=SET_RELAYS_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SET_TARGETS,
+        partial(_async_set_targets, hass),
+        schema=SET_TARGETS_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+
+@callback
+def _async_get_pool(hass: HomeAssistant, device_id: str) -> tuple[dict[str, Any], Pool]:
+    """Return the data of the config entry a pool device belongs to, and the pool."""
+    if (device := dr.async_get(hass).async_get(device_id)) is None:
+        raise ServiceValidationError(f"Unknown device {device_id}")
+    pool_ids = {identifier for domain, identifier in device.identifiers if domain == DOMAIN}
+    for entry_id in device.config_entries:
+        if (data := hass.data.get(DOMAIN, {}).get(entry_id)) is None:
+            continue
+        for pool_id in pool_ids & data[DEVICES].keys():
+            return data, data[DEVICES][pool_id]
+    raise ServiceValidationError(f"{device.name} is not a loaded Poolstation pool")
+
+
+@callback
+def _async_get_entity_pool(
+    hass: HomeAssistant, entity_id: str
+) -> tuple[dict[str, Any], Pool, str]:
+    """Return the entry data and pool of one of the entities, and its unique id."""
+    if (entity := er.async_get(hass).async_get(entity_id)) is None or (
+        entity.platform != DOMAIN
+    ):
+        raise ServiceValidationError(f"{entity_id} is not a Poolstation entity")
+    if (data := hass.data.get(DOMAIN, {}).get(entity.config_entry_id)) is None:
+        raise ServiceValidationError(f"{entity_id} is not loaded")
+    for pool_id, pool in data[DEVICES].items():
+        # Entity unique ids start with their pool's id.
+        if entity.unique_id.startswith(f"{pool_id} "):
+            return data, pool, entity.unique_id
+    raise ServiceValidationError(f"{entity_id} is not loaded")
+
+
+async def _async_write_all(writes: list[Coroutine[Any, Any, Any]]) -> list[Any]:
+    """Run cloud writes side by side, at most WRITE_CONCURRENCY at a time.
+
+    Returns each write's result, or the error it failed with.
+    """
+    return await gather_with_limited_concurrency(
+        WRITE_CONCURRENCY, *writes, return_exceptions=True
+    )
+
+
+def _write_result(result: Any) -> dict[str, Any]:
+    """Describe the outcome of a write for a service response."""
+    if result is False:
+        # Queued until poolstation.net can be reached again.
+        return {"written": False, "queued": True}
+    if isinstance(result, (aiohttp.ClientError, TimeoutError, AuthenticationException)):
+        return {"written": False, "error": str(result) or repr(result)}
+    if isinstance(result, BaseException):
+        raise result
+    return {"written": True}
+
+
+@callback
+def _async_note_writes(
+    written: dict[str, dict[str, Any]], queued: dict[str, dict[str, Any]]
+) -> None:
+    """Tell the coordinators of the given pools about their sent and queued writes."""
+    for pool_id, data in written.items():
+        data[COORDINATORS][pool_id].async_note_write()
+    # The entities show queued writes until they are sent.
+    for pool_id, data in queued.items():
+        if pool_id not in written:
+            data[COORDINATORS][pool_id].async_update_listeners()
+
+
+async def _async_refresh_pools(data_by_pool: dict[str, dict[str, Any]]) -> None:
+    """Refresh each of the given pools once, whatever their entry's scheduler."""
+    await gather_with_limited_concurrency(
+        WRITE_CONCURRENCY,
+        *(data[COORDINATORS][pool_id].async_refresh() for pool_id, data in data_by_pool.items()),
+    )
+
+
+async def _async_set_relays(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    """Switch many relays at once, then refresh each of their pools once."""
+    targets: list[tuple[str, dict[str, Any], Pool, Relay, bool]] = []
+    for target in call.data[ATTR_RELAYS]:
+        entity_id = target[ATTR_ENTITY_ID]
+        if not entity_id.startswith(f"{SWITCH_DOMAIN}."):
+            raise ServiceValidationError(f"{entity_id} is not a Poolstation relay")
+        data, pool, unique_id = _async_get_entity_pool(hass, entity_id)
+        relay = next(
+            (
+                relay
+                for relay in pool.relays
+                if pool_unique_id(pool, relay_entity_suffix(relay)) == unique_id
+            ),
+            None,
+        )
+        if relay is None:
+            raise ServiceValidationError(f"{entity_id} is not a Poolstation relay")
+        targets.append((entity_id, data, pool, relay, target[ATTR_STATE]))
+
+    results = await _async_write_all(
+        [
+            data[COORDINATORS][pool.id].writes.async_write(relay_key(relay), state)
+            for _, data, pool, relay, state in targets
+        ]
+    )
+
+    written: dict[str, dict[str, Any]] = {}
+    queued: dict[str, dict[str, Any]] = {}
+    response: dict[str, Any] = {}
+    for (entity_id, data, pool, _, _), result in zip(targets, results, strict=True):
+        response[entity_id] = _write_result(result)
+        if response[entity_id]["written"]:
+            written[pool.id] = data
+        elif response[entity_id].get("queued"):
+            queued[pool.id] = data
+    _async_note_writes(written, queued)
+    await _async_refresh_pools(written)
+
+    for entity_id, _, _, relay, state in targets:
+        if response[entity_id]["written"]:
+            response[entity_id]["confirmed"] = relay.active == state
+        response[entity_id][ATTR_STATE] = relay.active
+    return {ATTR_RELAYS: response}
+
+
+async def _async_write_target(
+    data: dict[str, Any], pool: Pool, key: str, value: Any
+) -> bool:
+    """Write a pool's target, or queue it; return whether it was sent."""
+    return await data[COORDINATORS][pool.id].writes.async_write(key, value)
+
+
+def _requested_target(data: dict[str, Any], pool: Pool, key: str) -> Any:
+    """Return the value queued for a pool's target, or else the pool's."""
+    if (queued := data[COORDINATORS][pool.id].writes.get(key)) is not None:
+        return queued
+    return TARGETS[key].value_fn(pool)
+
+
+async def _async_set_targets(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    """Change several targets of one or more pools, then refresh each pool once.
+
+    Every value is validated before anything is written, so a bad value
+    doesn't leave the pools half changed.
+    """
+    pools = {
+        device_id: _async_get_pool(hass, device_id) for device_id in call.data[ATTR_DEVICE_ID]
+    }
+    targets = {key: value for key, value in call.data.items() if key in TARGETS}
+    # Targets a pool already has aren't written again, like the number
+    # entities do.
+    writes = [
+        (device_id, key, value)
+        for device_id, (data, pool) in pools.items()
+        for key, value in targets.items()
+        if _requested_target(data, pool, key) != value
+    ]
+    results = await _async_write_all(
+        [_async_write_target(*pools[device_id], key, value) for device_id, key, value in writes]
+    )
+
+    response: dict[str, dict[str, Any]] = {
+        device_id: {key: {"written": False} for key in targets} for device_id in pools
+    }
+    written: dict[str, dict[str, Any]] = {}
+    queued: dict[str, dict[str, Any]] = {}
+    for (device_id, key, _), result in zip(writes, results, strict=True):
+        response[device_id][key] = _write_result(result)
+        data, pool = pools[device_id]
+        if response[device_id][key]["written"]:
+            written[pool.id] = data
+        elif response[device_id][key].get("queued"):
+            queued[pool.id] = data
+    _async_note_writes(written, queued)
+    await _async_refresh_pools(written)
+
+    for device_id, (_, pool) in pools.items():
+        for key in targets:
+            response[device_id][key]["value"] = TARGETS[key].value_fn(pool)
+    return {"pools": response}
@@ -0,0 +1,110 @@
+"""The HTTP session shared by every Poolstation config entry and flow."""
+from __future__ import annotations
+
+import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Final
+
+import aiohttp
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.util.hass_dict import HassKey
+from homeassistant.util.ssl import get_default_context
+
+from .const import DOMAIN
+
+_LOGGER: Final = logging.getLogger(__name__)
+
+# Connections to poolstation.net open at once, across all accounts.
+CONNECTION_LIMIT: Final = 10
+
+# Seconds an idle connection is kept open. Longer than the 60 s polling
+# interval, so polls reuse a connection instead of handshaking again.
+KEEPALIVE_TIMEOUT: Final = 75
+
+DATA_SESSION: HassKey[PoolstationSession] = HassKey(f"{DOMAIN}_session")
+
+
+class PoolstationSession:
+    """An aiohttp session counting the config entries and flows using it.
+
+    Closed when the last of them releases it, or when Home Assistant closes.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Open the session."""
+        self._hass = hass
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=CONNECTION_LIMIT,
+                keepalive_timeout=KEEPALIVE_TIMEOUT,
+                ssl=get_default_context(),
+            ),
+            # Tokens are sent explicitly; the API's cookies are never needed.
+            cookie_jar=aiohttp.DummyCookieJar(),
+            # aiohttp asks for gzip/deflate responses and decompresses them.
+            auto_decompress=True,
+        )
+        self.users = 0
+        self._unsub_close: CALLBACK_TYPE | None = hass.bus.async_listen_once(
+            EVENT_HOMEASSISTANT_CLOSE, self._async_close_on_stop
+        )
+
+    async def _async_close_on_stop(self, event: Event) -> None:
+        """Close the session when Home Assistant closes."""
+        self._unsub_close = None
+        await self.async_close()
+
+    async def async_close(self) -> None:
+        """Close the session and forget it."""
+        if self._unsub_close is not None:
+            self._unsub_close()
+            self._unsub_close = None
+        if self._hass.data.get(DATA_SESSION) is self:
+            del self._hass.data[DATA_SESSION]
+        await self.session.close()
+
+
+@callback
+def async_get_session(hass: HomeAssistant) -> aiohttp.ClientSession:
+    """Return the shared session, opening it if needed.
+
+    The session is closed as soon as its last user releases it; hold it
+    with async_acquire_session or async_hold_session while using it.
+    """
+    if (shared := hass.data.get(DATA_SESSION)) is None:
+        shared = hass.data[DATA_SESSION] = PoolstationSession(hass)
+    return shared.session
+
+
+@callback
+def async_acquire_session(hass: HomeAssistant) -> aiohttp.ClientSession:
+    """Return the shared session and keep it open until released."""
+    session = async_get_session(hass)
+    hass.data[DATA_SESSION].users += 1
+    return session
+
+
+async def async_release_session(hass: HomeAssistant) -> None:
+    """Release the shared session, closing it if nothing else uses it."""
+    if (shared := hass.data.get(DATA_SESSION)) is None:
+        return
+    shared.users -= 1
+    if shared.users <= 0:
+        _LOGGER.debug("Closing the Pool station session")
+        await shared.async_close()
+
+
+@asynccontextmanager
+async def async_hold_session(hass: HomeAssistant) -> AsyncIterator[aiohttp.ClientSession]:
+    """Hold the shared session open for the requests in the block.
+
+    For short-lived users such as config flows, which may outlive every
+    config entry or have no entry at all.
+    """
+    session = async_acquire_session(hass)
+    try:
+        yield session
+    finally:
+        await async_release_session(hass)
@@ -0,0 +1,71 @@
+"""Fetch statistics of Poolstation pools."""
+from __future__ import annotations
+
+import math
+from collections import deque
+from dataclasses import dataclass
+from typing import Final
+
+# Fetches kept for the rolling latency figures: about 1.5 hours at the
+# default polling interval.
+HISTORY_SIZE: Final = 100
+
+# Upper bounds, in seconds, of the latency histogram's buckets. The last
+# bucket holds everything slower.
+HISTOGRAM_BUCKETS: Final = (0.25, 0.5, 1.0, 2.0, 5.0, 10.0)
+
+
+@dataclass(frozen=True, slots=True)
+class Fetch:
+    """A single fetch of a pool from poolstation.net."""
+
+    # Wall clock time the fetch started at (a POSIX timestamp).
+    started: float
+    duration: float
+    success: bool
+
+
+class FetchStats:
+    """Counters and a bounded history of a pool's fetches."""
+
+    def __init__(self, size: int = HISTORY_SIZE) -> None:
+        """Initialize empty statistics."""
+        self.history: deque[Fetch] = deque(maxlen=size)
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+
+    def record(self, started: float, duration: float, success: bool) -> None:
+        """Record a finished fetch."""
+        self.history.append(Fetch(started, duration, success))
+        if success:
+            self.successes += 1
+            self.consecutive_failures = 0
+        else:
+            self.failures += 1
+            self.consecutive_failures += 1
+
+    def latency(self, percentile: float) -> float | None:
+        """Return the given percentile of the recent fetch durations, in seconds."""
+        if not self.history:
+            return None
+        durations = sorted(fetch.duration for fetch in self.history)
+        rank = math.ceil(percentile / 100 * len(durations))
+        return durations[max(rank, 1) - 1]
+
+    def histogram(self) -> dict[str, int]:
+        """Return how many recent fetches fell in each latency bucket."""
+        labels = [f"<={bound}s" for bound in HISTOGRAM_BUCKETS]
+        labels.append(f">{HISTOGRAM_BUCKETS[-1]}s")
+        counts = dict.fromkeys(labels, 0)
+        for fetch in self.history:
+            index = next(
+                (
+                    index
+                    for index, bound in enumerate(HISTOGRAM_BUCKETS)
+                    if fetch.duration <= bound
+                ),
+                len(HISTOGRAM_BUCKETS),
+            )
+            counts[labels[index]] += 1
+        return counts
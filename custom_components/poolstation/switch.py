@@ -1,17 +1,28 @@
 """Support for Poolstation switches."""
 from __future__ import annotations
 
-from typing import Any
+import asyncio
+import logging
+from typing import Any, Final
 
+import aiohttp
 from homeassistant.components.switch import SwitchEntity
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from pypoolstation import Pool, Relay
+from pypoolstation import AuthenticationException, Pool, Relay
 
 from . import PoolstationDataUpdateCoordinator
-from .const import COORDINATORS, DEVICES, DOMAIN
-from .entity import PoolEntity
+from .const import GROUP_RELAYS
+from .entity import PoolEntity, async_add_pool_entities, relay_entity_suffix
+from .write_queue import relay_key
+
+_LOGGER: Final = logging.getLogger(__name__)
+
+# After switching a relay, its pool is refreshed up to this many times, this
+# many seconds apart, until the controller reports the new state.
+RELAY_CONFIRM_ATTEMPTS: Final = 3
+RELAY_CONFIRM_DELAY: Final = 2.0
 
 
 async def async_setup_entry(
@@ -20,41 +31,116 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up the pool relays."""
-    pools = hass.data[DOMAIN][config_entry.entry_id][DEVICES]
-    coordinators = hass.data[DOMAIN][config_entry.entry_id][COORDINATORS]
-    entities = []
-    for pool_id, pool in pools.items():
-        coordinator = coordinators[pool_id]
-        for relay in pool.relays:
-            entities.append(PoolRelaySwitch(pool, coordinator, relay))
-
-    async_add_entities(entities)
+    async_add_pool_entities(
+        hass,
+        config_entry,
+        async_add_entities,
+        lambda pool, coordinator: (
+            PoolRelaySwitch(pool, coordinator, relay) for relay in pool.relays
+        ),
+    )
 
 
 class PoolRelaySwitch(PoolEntity, SwitchEntity):
     """Representation of a pool relay switch."""
 
+    entity_group = GROUP_RELAYS
+
     def __init__(
         self, pool: Pool, coordinator: PoolstationDataUpdateCoordinator, relay: Relay
     ) -> None:
         """Initialize the pool relay switch."""
-        super().__init__(pool, coordinator, f" Relay {relay.name}")
+        super().__init__(pool, coordinator, relay_entity_suffix(relay))
         self.relay = relay
-        self._attr_is_on = self.relay.active
+        self._attr_is_on = self._requested_state()
+        # State requested by the user but not confirmed by the controller
+        # yet. Shown optimistically until it's confirmed or rolled back.
+        self._pending: bool | None = None
+        self._confirm_task: asyncio.Task[None] | None = None
 
     async def async_turn_on(self, **kwargs: Any) -> None:
         """Turn the relay on."""
-
-        self._attr_is_on = await self.relay.set_active(True)
-        self.async_write_ha_state()
+        await self._async_set_active(True)
 
     async def async_turn_off(self, **kwargs: Any) -> None:
         """Turn the relay off."""
-        self._attr_is_on = await self.relay.set_active(False)
+        await self._async_set_active(False)
+
+    async def _async_set_active(self, active: bool) -> None:
+        """Switch the relay optimistically, then have the controller confirm it.
+
+        While poolstation.net can't be reached the write is queued instead,
+        and the switch shows the queued state until it's sent.
+        """
+        if self._confirm_task is not None:
+            self._confirm_task.cancel()
+            self._confirm_task = None
+        self._pending = active
+        self._attr_is_on = active
         self.async_write_ha_state()
+        try:
+            sent = await self.coordinator.writes.async_write(relay_key(self.relay), active)
+        except (aiohttp.ClientError, TimeoutError, AuthenticationException) as err:
+            _LOGGER.error("Error switching %s: %s", self.name, err)
+            self._async_settle()
+            return
+        if not sent:
+            self._async_settle()
+            return
+        self.coordinator.async_note_write()
+        self._confirm_task = self.hass.async_create_background_task(
+            self._async_confirm(active), name=f"{self.entity_id} confirm switching"
+        )
+
+    async def _async_confirm(self, active: bool) -> None:
+        """Refresh the relay's pool until the controller reports ``active``."""
+        confirmed = None
+        for _ in range(RELAY_CONFIRM_ATTEMPTS):
+            await asyncio.sleep(RELAY_CONFIRM_DELAY)
+            # Only this pool is fetched, whatever the entry's scheduler.
+            await self.coordinator.async_refresh()
+            if not self.coordinator.last_update_success:
+                continue
+            if confirmed := self.relay.active == active:
+                break
+        if confirmed is False:
+            _LOGGER.error(
+                "%s did not switch %s, it is still %s",
+                self.name,
+                "on" if active else "off",
+                "on" if self.relay.active else "off",
+            )
+        self._confirm_task = None
+        # Show what the controller reported; if it couldn't be reached, the
+        # optimistic state stays until the next successful poll.
+        self._async_settle()
+
+    @callback
+    def _async_settle(self) -> None:
+        """Drop the optimistic state and show the relay's."""
+        self._pending = None
+        self._attr_is_on = self._requested_state()
+        self.async_write_ha_state()
+
+    def _requested_state(self) -> bool:
+        """Return the state queued for the relay, or else the relay's."""
+        if (queued := self.coordinator.writes.get(relay_key(self.relay))) is not None:
+            return queued
+        return self.relay.active
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Stop waiting for a confirmation when the entity goes away."""
+        if self._confirm_task is not None:
+            self._confirm_task.cancel()
+            self._confirm_task = None
+        await super().async_will_remove_from_hass()
+
+    def _state_value(self) -> bool:
+        return self._requested_state()
 
     @callback
     def _handle_coordinator_update(self) -> None:
         """Handle updated data from the coordinator."""
-        self._attr_is_on = self.relay.active
-        self.async_write_ha_state()
+        if self._pending is None:
+            self._attr_is_on = self._requested_state()
+        super()._handle_coordinator_update()
@@ -0,0 +1,280 @@
+"""Writes to pool controllers, held while poolstation.net can't be reached."""
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Final
+
+import aiohttp
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from pypoolstation import AuthenticationException, Pool, Relay
+
+from .backoff import CircuitBreaker, CircuitState
+from .const import DOMAIN
+from .ratelimit import Priority, RateLimiter
+
+if TYPE_CHECKING:
+    from . import PoolstationDataUpdateCoordinator
+
+_LOGGER: Final = logging.getLogger(__name__)
+
+STORAGE_VERSION: Final = 1
+
+# Seconds to wait before saving the queues, so writes made together are
+# saved together.
+SAVE_DELAY: Final = 1.0
+
+# Seconds between queued writes when they are replayed, so a backlog doesn't
+# hit poolstation.net all at once right after it comes back.
+REPLAY_SPACING: Final = 1.0
+
+# Responses that mean poolstation.net is down or throttling, rather than
+# that it rejected the write: the write is worth sending again later.
+RETRY_STATUSES: Final = frozenset({408, 429})
+
+RELAY_KEY_PREFIX: Final = "relay "
+
+
+@dataclass(frozen=True, slots=True)
+class PoolTarget:
+    """A target of the pool controller, as set by its number or the set_targets service."""
+
+    value_fn: Callable[[Pool], float | None]
+    set_value_fn: Callable[[Pool, Any], Awaitable[Any]]
+
+
+# Keyed like the number entities' descriptions and the set_targets fields.
+TARGETS: Final = {
+    "target_ph": PoolTarget(
+        lambda pool: pool.target_ph, lambda pool, value: pool.set_target_ph(value)
+    ),
+    "target_orp": PoolTarget(
+        lambda pool: pool.target_orp, lambda pool, value: pool.set_target_orp(int(value))
+    ),
+    "target_chlorine": PoolTarget(
+        lambda pool: pool.target_clppm, lambda pool, value: pool.set_target_clppm(value)
+    ),
+    "target_production": PoolTarget(
+        lambda pool: pool.target_percentage_electrolysis,
+        lambda pool, value: pool.set_target_percentage_electrolysis(int(value)),
+    ),
+}
+
+
+def relay_key(relay: Relay) -> str:
+    """Return the key a relay's writes are queued under."""
+    return f"{RELAY_KEY_PREFIX}{relay.id}"
+
+
+def is_unreachable(err: Exception) -> bool:
+    """Tell whether a write failed because poolstation.net couldn't take it now."""
+    if isinstance(err, aiohttp.ClientResponseError):
+        return err.status >= 500 or err.status in RETRY_STATUSES
+    return isinstance(err, (aiohttp.ClientError, TimeoutError))
+
+
+async def _async_send(pool: Pool, key: str, value: Any, limiter: RateLimiter) -> None:
+    """Send a write to a pool's controller."""
+    relay: Relay | None = None
+    if key.startswith(RELAY_KEY_PREFIX):
+        relay = next((relay for relay in pool.relays if relay_key(relay) == key), None)
+        if relay is None:
+            raise KeyError(f"Pool {pool.alias} has no {key}")
+    async with limiter.async_request(Priority.WRITE):
+        if relay is not None:
+            await relay.set_active(value)
+        else:
+            await TARGETS[key].set_value_fn(pool, value)
+
+
+class PoolWriteQueue:
+    """A pool's writes that are waiting for poolstation.net to come back.
+
+    Only the latest value of each target or relay is kept. Queued writes
+    are replayed one at a time, oldest first, once the pool is fetched
+    again; a write made while others are queued joins the queue so it
+    doesn't overtake them.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, coordinator: PoolstationDataUpdateCoordinator
+    ) -> None:
+        """Initialize the queue of a pool."""
+        self.hass = hass
+        self.coordinator = coordinator
+        self.breaker: CircuitBreaker | None = None
+        # Value to write by key, in the order they were last changed.
+        self.pending: dict[str, Any] = {}
+        # Called whenever the pending writes change.
+        self.on_change: Callable[[], None] | None = None
+        self._replay_task: asyncio.Task[None] | None = None
+
+    def get(self, key: str) -> Any:
+        """Return the value queued for a target or relay, if any."""
+        return self.pending.get(key)
+
+    async def async_write(self, key: str, value: Any) -> bool:
+        """Send a write, or queue it if poolstation.net can't take it now.
+
+        Returns whether it was sent. Writes poolstation.net rejects, such as
+        with an expired token, raise as usual.
+        """
+        if self.pending or self._paused():
+            self._async_enqueue(key, value)
+            self.async_replay()
+            return False
+        try:
+            await _async_send(
+                self.coordinator.pool, key, value, self.coordinator.limiter
+            )
+        except (aiohttp.ClientError, TimeoutError) as err:
+            if not is_unreachable(err):
+                raise
+            _LOGGER.warning(
+                "Pool station unreachable, queueing %s of pool %s: %s",
+                key,
+                self.coordinator.pool.alias,
+                err,
+            )
+            self._async_enqueue(key, value)
+            return False
+        return True
+
+    @callback
+    def _async_enqueue(self, key: str, value: Any) -> None:
+        """Queue a write, replacing (and moving behind the others) any earlier one."""
+        self.pending.pop(key, None)
+        self.pending[key] = value
+        self._async_changed()
+
+    @callback
+    def _async_changed(self) -> None:
+        if self.on_change is not None:
+            self.on_change()
+
+    def _paused(self) -> bool:
+        """Tell whether the account's circuit breaker or rate limiter holds requests back."""
+        if self.coordinator.limiter.throttled_for() is not None:
+            return True
+        return self.breaker is not None and self.breaker.state is not CircuitState.CLOSED
+
+    @callback
+    def async_replay(self) -> None:
+        """Start sending the queued writes, unless that's under way or pointless now."""
+        if not self.pending or self._paused():
+            return
+        if self._replay_task is not None and not self._replay_task.done():
+            return
+        self._replay_task = self.hass.async_create_background_task(
+            self._async_replay(), name=f"{DOMAIN} {self.coordinator.name} replay writes"
+        )
+
+    async def _async_replay(self) -> None:
+        """Send the queued writes in order until they are done or the cloud fails again."""
+        pool = self.coordinator.pool
+        sent = 0
+        while self.pending:
+            if sent:
+                await asyncio.sleep(REPLAY_SPACING)
+            key, value = next(iter(self.pending.items()))
+            try:
+                await _async_send(pool, key, value, self.coordinator.limiter)
+            except (aiohttp.ClientError, TimeoutError) as err:
+                if is_unreachable(err) and not self._rejected(err):
+                    # Also what a throttled request gets: wait for the next
+                    # successful poll instead of pushing on.
+                    _LOGGER.debug(
+                        "Pool station unreachable, keeping %d writes of pool %s queued: %s",
+                        len(self.pending),
+                        pool.alias,
+                        err,
+                    )
+                    break
+                _LOGGER.error("Dropping queued %s of pool %s: %s", key, pool.alias, err)
+            except AuthenticationException as err:
+                # Polling logs in again, or asks for reauthentication.
+                _LOGGER.debug("Queued writes of pool %s wait for a new token: %s", pool.alias, err)
+                break
+            except KeyError as err:
+                _LOGGER.error("Dropping queued %s: %s", key, err)
+            else:
+                sent += 1
+            # A newer value may have been queued while this one was sent.
+            if self.pending.get(key) == value:
+                del self.pending[key]
+                self._async_changed()
+        if sent:
+            _LOGGER.info("Sent %d queued writes of pool %s", sent, pool.alias)
+            self.coordinator.async_note_write()
+            await self.coordinator.async_refresh()
+
+    def _rejected(self, err: Exception) -> bool:
+        """Tell whether a queued write got a server error while the pool can be fetched.
+
+        poolstation.net answers some rejections with a 500. A write that
+        still gets one right after a successful poll won't go through later
+        either, and would hold back every write queued behind it.
+        """
+        return (
+            isinstance(err, aiohttp.ClientResponseError)
+            and err.status >= 500
+            and self.coordinator.last_update_success
+        )
+
+    @callback
+    def async_cancel(self) -> None:
+        """Stop replaying; the writes stay queued."""
+        if self._replay_task is not None:
+            self._replay_task.cancel()
+            self._replay_task = None
+
+
+class WriteQueueStore:
+    """The queued writes of a config entry's pools, kept across restarts."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialize the store of a config entry."""
+        self._store: Store[dict[str, Any]] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.writes"
+        )
+        self._queues: dict[str, PoolWriteQueue] = {}
+        self._data: dict[str, dict[str, Any]] = {}
+
+    async def async_load(self) -> None:
+        """Load the writes queued when the entry last ran."""
+        data = await self._store.async_load()
+        self._data = data["pools"] if data else {}
+
+    @callback
+    def async_attach(self, queue: PoolWriteQueue, breaker: CircuitBreaker | None) -> None:
+        """Restore a pool's queued writes and save them whenever they change."""
+        pool_id = queue.coordinator.pool.id
+        self._queues[pool_id] = queue
+        queue.breaker = breaker
+        queue.pending.update(self._data.get(pool_id, {}))
+        queue.on_change = self.async_schedule_save
+
+    @callback
+    def async_schedule_save(self) -> None:
+        """Save the queued writes of every pool shortly."""
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    async def async_save(self) -> None:
+        """Save the queued writes of every pool now."""
+        await self._store.async_save(self._data_to_save())
+
+    def _data_to_save(self) -> dict[str, Any]:
+        return {
+            "pools": {
+                pool_id: dict(queue.pending)
+                for pool_id, queue in self._queues.items()
+                if queue.pending
+            }
+        }
+
+    async def async_remove(self) -> None:
+        """Delete the store."""
+        await self._store.async_remove()
@@ -8,10 +8,16 @@ import pytest
 from homeassistant import config_entries as config_entries_module
 from homeassistant import loader as loader_module
 from homeassistant.components.network.network import async_get_network
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_EMAIL, CONF_PASSWORD, CONF_TOKEN
 from homeassistant.core import HomeAssistant
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers import frame
 from pypoolstation import Pool
 
+from custom_components.poolstation.const import DOMAIN
+
 
 def _pool_spec() -> Pool:
     """A real (empty) Pool instance used only as the spec for pool mocks."""
@@ -23,7 +29,7 @@ _POOL_SPEC = _pool_spec()
 
 @pytest.fixture
 async def hass(tmp_path):
-    """Provide a running HomeAssistant instance with config entries initialized."""
+    """Provide a running HomeAssistant instance with config entries and registries."""
     hass = HomeAssistant(str(tmp_path / "config"))
     await hass.async_start()
     store = config_entries_module.ConfigEntries(hass, {})
@@ -32,12 +38,47 @@ async def hass(tmp_path):
     frame.async_setup(hass)
     loader_module.async_setup(hass)
     await async_get_network(hass)
+    await dr.async_load(hass)
+    await er.async_load(hass)
     try:
         yield hass
     finally:
         await hass.async_stop()
 
 
+# Plausible readings for a pool with every optional module (UV, digital
+# inputs, ...) installed. Tests override what they care about.
+DEFAULT_POOL_VALUES = {
+    "temperature": 25.0,
+    "salt_concentration": 4.0,
+    "current_ph": 7.2,
+    "target_ph": 7.2,
+    "current_orp": 700.0,
+    "target_orp": 700.0,
+    "current_clppm": 1.0,
+    "target_clppm": 1.0,
+    "percentage_electrolysis": 50,
+    "target_percentage_electrolysis": 50,
+    "binary_input_1": False,
+    "binary_input_1_name": None,
+    "binary_input_2": False,
+    "binary_input_2_name": None,
+    "binary_input_3": False,
+    "binary_input_3_name": None,
+    "binary_input_4": False,
+    "binary_input_4_name": None,
+    "waterflow_problem": False,
+    "uv_available": True,
+    "uv_on": False,
+    "uv_enabled": True,
+    "current_uv_timer": 10,
+    "total_uv_timer": 100,
+    "uv_ballast_problem": False,
+    "uv_fuse_problem": False,
+    "raw_vars": {},
+}
+
+
 def make_pool(
     pool_id: str = "pool-1",
     alias: str = "Test Pool",
@@ -49,7 +90,7 @@ def make_pool(
     pool.id = pool_id
     pool.alias = alias
     pool.relays = relays or []
-    for key, value in attrs.items():
+    for key, value in {**DEFAULT_POOL_VALUES, **attrs}.items():
         setattr(pool, key, value)
     return pool
 
@@ -57,9 +98,17 @@ def make_pool(
 def make_relay(name: str = "Pump", active: bool = False) -> MagicMock:
     """Create a mock pypoolstation.Relay."""
     relay = MagicMock()
+    relay.id = f"relay-{name.lower()}"
+    relay.sign = f"r{name.lower()}"
     relay.name = name
     relay.active = active
-    relay.set_active = AsyncMock(side_effect=lambda value: value)
+
+    def set_active(value: bool) -> bool:
+        # Like pypoolstation, the relay takes the new state as it's sent.
+        relay.active = value
+        return value
+
+    relay.set_active = AsyncMock(side_effect=set_active)
     return relay
 
 
@@ -70,8 +119,7 @@ def mock_account():
 
     with (
         patch("custom_components.poolstation.config_flow.create_account") as flow_create,
-        patch("custom_components.poolstation.config_flow.async_create_clientsession"),
-        patch("custom_components.poolstation.create_account") as setup_create,
+        patch("custom_components.poolstation.auth.create_account") as setup_create,
         # Creating an entry triggers an automatic setup; keep it hermetic.
         patch.object(Pool, "get_all_pools", AsyncMock(return_value=[])),
     ):
@@ -86,3 +134,26 @@ def make_account(login_return_value: str = "test-token") -> MagicMock:
     account = MagicMock()
     account.login = AsyncMock(return_value=login_return_value)
     return account
+
+
+async def make_entry(hass, data=None, options=None) -> ConfigEntry:
+    """Add a config entry (which also starts its setup)."""
+    entry = ConfigEntry(
+        domain=DOMAIN,
+        data=data or {
+            CONF_TOKEN: "token",
+            CONF_EMAIL: "user@example.com",
+            CONF_PASSWORD: "secret",
+        },
+        version=1,
+        title="user@example.com",
+        source="user",
+        unique_id="user@example.com",
+        minor_version=1,
+        options=options or {},
+        discovery_keys={},
+        subentries_data=None,
+    )
+    await hass.config_entries.async_add(entry)
+    await hass.async_block_till_done()
+    return entry
@@ -0,0 +1,117 @@
+"""A local stand-in for the poolstation.net API.
+
+Serves the endpoints pypoolstation uses for any number of pools, with a
+configurable response latency and payload size, so the integration can be
+exercised end to end without network access.
+"""
+from __future__ import annotations
+
+import asyncio
+from collections import Counter
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from unittest.mock import patch
+
+import pypoolstation
+from aiohttp import web
+
+RELAYS_PER_POOL = 2
+
+
+class FakePoolstation:
+    """An aiohttp server answering like poolstation.net."""
+
+    def __init__(self, pool_count: int, latency: float = 0.0, extra_vars: int = 0) -> None:
+        """Initialize the server.
+
+        ``latency`` is the seconds every response is delayed by, and
+        ``extra_vars`` the number of additional readings in each pool's
+        payload (real controllers report dozens the integration ignores).
+        """
+        self.pool_count = pool_count
+        self.latency = latency
+        self.extra_vars = extra_vars
+        self.requests: Counter[str] = Counter()
+        # Bumped by tests to change the first pool's temperature.
+        self.tick = 0
+
+    def pool_ids(self) -> list[str]:
+        """Return the ids of the served pools."""
+        return [f"pool-{index}" for index in range(self.pool_count)]
+
+    def pool_info(self, pool_id: str) -> dict:
+        """Return the payload of a pool."""
+        temperature = 25.0 + (self.tick if pool_id == "pool-0" else 0) / 10
+        relays = [
+            {"id": f"{pool_id}-relay-{index}", "nombre": f"Relay {index}", "sign": f"r{index}"}
+            for index in range(RELAYS_PER_POOL)
+        ]
+        return {
+            "alias": f"Pool {pool_id}",
+            "vars": {
+                "ta": f"{temperature:.1f}C",
+                "cn": "4.1g",
+                "mp": "7.20",
+                "sp": "7.20",
+                "mo": "700",
+                "so": "700",
+                "mh": "1.00",
+                "sh": "1.00",
+                "pa": "50",
+                "sn": "50",
+                "d1": "0",
+                "d2": "0",
+                "d3": "0",
+                "d4": "0",
+                "ac": "1",
+                "lu": "-",
+                **{relay["sign"]: "0" for relay in relays},
+                **{f"x{index}": "0" for index in range(self.extra_vars)},
+            },
+            "relays": relays,
+        }
+
+    async def _respond(self, kind: str, payload: dict) -> web.Response:
+        """Answer after the configured latency."""
+        self.requests[kind] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return web.json_response(payload)
+
+    async def _login(self, request: web.Request) -> web.Response:
+        return await self._respond("login", {"token": "bench-token"})
+
+    async def _pool_list(self, request: web.Request) -> web.Response:
+        items = [{"id": pool_id} for pool_id in self.pool_ids()]
+        return await self._respond("list", {"items": items})
+
+    async def _pool(self, request: web.Request) -> web.Response:
+        return await self._respond("info", self.pool_info(request.match_info["pool_id"]))
+
+    async def _save_sign(self, request: web.Request) -> web.Response:
+        return await self._respond("write", {})
+
+    @asynccontextmanager
+    async def serve(self) -> AsyncIterator[str]:
+        """Run the server and point pypoolstation at it, yielding its URL."""
+        app = web.Application()
+        app.router.add_post("/session/login", self._login)
+        app.router.add_post("/devices/10/0", self._pool_list)
+        app.router.add_post("/devices/saveSign", self._save_sign)
+        app.router.add_post("/devices/{pool_id}", self._pool)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        url = f"http://127.0.0.1:{port}"
+        try:
+            with (
+                patch.object(pypoolstation, "LOGIN_URL", f"{url}/session/login"),
+                patch.object(pypoolstation, "POOL_LIST_URL", f"{url}/devices/10/0"),
+                patch.object(pypoolstation, "POOL_INFO_URL", f"{url}/devices/"),
+                patch.object(pypoolstation, "UPDATE_URL", f"{url}/devices/saveSign"),
+            ):
+                yield url
+        finally:
+            await runner.cleanup()
@@ -0,0 +1,280 @@
+"""Benchmarks for the integration's hot paths.
+
+These run as part of the normal test suite against fakes with simulated
+latency (mocked pools, or a local stand-in for poolstation.net), so they need
+no network access. Each benchmark asserts coarse speedups or bounds rather
+than absolute timings, which keeps them stable on slow CI runners. Run
+``pytest tests/test_benchmarks.py -s`` to see the measurements.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+import tracemalloc
+from dataclasses import dataclass
+from functools import partial
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from conftest import make_entry, make_pool, make_relay
+from fake_poolstation import FakePoolstation
+from homeassistant.config_entries import ConfigEntry, ConfigEntryState
+from pypoolstation import Pool
+
+from custom_components.poolstation import PoolstationDataUpdateCoordinator
+from custom_components.poolstation.binary_sensor import (
+    async_setup_entry as binary_sensor_setup,
+)
+from custom_components.poolstation.const import (
+    CONF_REFRESH_CONCURRENCY,
+    COORDINATORS,
+    DEVICES,
+    DOMAIN,
+    READY_POOLS,
+)
+from custom_components.poolstation.number import async_setup_entry as number_setup
+from custom_components.poolstation.ratelimit import RateLimiter
+from custom_components.poolstation.sensor import async_setup_entry as sensor_setup
+from custom_components.poolstation.switch import async_setup_entry as switch_setup
+
+POOL_COUNT = 20
+SYNC_LATENCY = 0.02
+
+
+@pytest.fixture(autouse=True)
+def unlimited_requests():
+    """Measure the integration itself, not the pacing of the account's requests."""
+    with patch(
+        "custom_components.poolstation.RateLimiter",
+        partial(RateLimiter, rate=1e9, burst=10**9),
+    ):
+        yield
+
+
+def make_slow_pools(count: int, latency: float) -> list:
+    """Create pools whose sync_info takes ``latency`` seconds."""
+
+    async def slow_sync() -> None:
+        await asyncio.sleep(latency)
+
+    pools = []
+    for index in range(count):
+        pool = make_pool(pool_id=f"pool-{index}", alias=f"Pool {index}")
+        pool.sync_info = AsyncMock(side_effect=slow_sync)
+        pools.append(pool)
+    return pools
+
+
+async def time_setup(hass, pools, options=None) -> float:
+    """Set up an entry for ``pools`` and return how long it took."""
+    with (
+        patch.object(Pool, "get_all_pools", AsyncMock(return_value=pools)),
+        patch.object(hass.config_entries, "async_forward_entry_setups", AsyncMock()),
+    ):
+        start = time.perf_counter()
+        entry = await make_entry(hass, options=options)
+        elapsed = time.perf_counter() - start
+
+    assert entry.state is ConfigEntryState.LOADED
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    return elapsed
+
+
+async def test_benchmark_setup_concurrent_first_refresh(hass, mock_account):
+    """Refreshing pools concurrently makes setup much faster than one by one."""
+    sequential = await time_setup(
+        hass,
+        make_slow_pools(POOL_COUNT, SYNC_LATENCY),
+        options={CONF_REFRESH_CONCURRENCY: 1},
+    )
+    concurrent = await time_setup(hass, make_slow_pools(POOL_COUNT, SYNC_LATENCY))
+
+    print(
+        f"\nsetup of {POOL_COUNT} pools ({SYNC_LATENCY * 1000:.0f} ms latency): "
+        f"sequential {sequential:.3f}s, concurrent {concurrent:.3f}s "
+        f"({sequential / concurrent:.1f}x)"
+    )
+    assert sequential >= POOL_COUNT * SYNC_LATENCY
+    assert concurrent < sequential / 2
+
+
+POOL_VALUES = {
+    "current_ph": 7.1,
+    "target_ph": 7.2,
+    "temperature": 24.5,
+    "salt_concentration": 4.1,
+    "percentage_electrolysis": 60,
+    "target_percentage_electrolysis": 80,
+    "current_orp": 720,
+    "target_orp": 750,
+    "current_clppm": 1.1,
+    "target_clppm": 1.2,
+    "waterflow_problem": False,
+    "binary_input_1": False,
+}
+
+
+class StateWrites:
+    """Counts entity state writes instead of performing them."""
+
+    def __init__(self) -> None:
+        """Initialize the counter."""
+        self.count = 0
+
+    def __call__(self) -> None:
+        """Count a write."""
+        self.count += 1
+
+
+async def add_counted_entities(hass, entry) -> tuple[list, StateWrites]:
+    """Create the entry's entities and subscribe them, counting their writes.
+
+    Only entities enabled by default are included. The first update writes
+    every entity, as adding them would; the counter starts after it.
+    """
+    entities = []
+    for platform_setup in (sensor_setup, number_setup, binary_sensor_setup, switch_setup):
+        await platform_setup(hass, entry, entities.extend)
+    # Entities disabled by default are never added to Home Assistant.
+    entities = [entity for entity in entities if entity.entity_registry_enabled_default]
+
+    writes = StateWrites()
+    for entity in entities:
+        entity.async_write_ha_state = writes
+        entity.coordinator.async_add_listener(entity._handle_coordinator_update)
+    for coordinator in hass.data[DOMAIN][entry.entry_id][COORDINATORS].values():
+        coordinator.async_update_listeners()
+    writes.count = 0
+    return entities, writes
+
+
+async def count_state_writes(hass, pools, cycles: int) -> tuple[int, int]:
+    """Run ``cycles`` coordinator updates with one changed reading each.
+
+    Returns the number of entities and of state writes per cycle.
+    """
+    entry = MagicMock()
+    entry.entry_id = "benchmark"
+    hass.data[DOMAIN] = {
+        entry.entry_id: {
+            COORDINATORS: {
+                pool.id: PoolstationDataUpdateCoordinator(hass, pool) for pool in pools
+            },
+            DEVICES: {pool.id: pool for pool in pools},
+            READY_POOLS: {pool.id for pool in pools},
+        }
+    }
+    entities, writes = await add_counted_entities(hass, entry)
+
+    coordinators = hass.data[DOMAIN][entry.entry_id][COORDINATORS].values()
+    for cycle in range(cycles):
+        pools[cycle % len(pools)].temperature += 0.1
+        for coordinator in coordinators:
+            coordinator.async_update_listeners()
+    return len(entities), writes.count // cycles
+
+
+async def test_benchmark_state_writes_per_cycle(hass):
+    """Only entities whose value changed are written on each cycle."""
+    pools = [
+        make_pool(
+            pool_id=f"pool-{index}",
+            relays=[make_relay(name="Pump"), make_relay(name="Light")],
+            **POOL_VALUES,
+        )
+        for index in range(POOL_COUNT)
+    ]
+
+    with patch.object(
+        PoolstationDataUpdateCoordinator,
+        "async_snapshot_changed",
+        return_value=True,
+    ):
+        entity_count, before = await count_state_writes(hass, pools, cycles=10)
+    _, after = await count_state_writes(hass, pools, cycles=10)
+
+    print(
+        f"\nstate writes per cycle for {POOL_COUNT} pools ({entity_count} entities): "
+        f"every entity {before}, changed only {after}"
+    )
+    assert before == entity_count
+    assert after == 1
+
+
+BENCHMARK_POOL_COUNTS = (1, 10, 100, 1000)
+SERVER_LATENCY = 0.005
+SERVER_EXTRA_VARS = 50
+# Generous bounds on the peak memory of a benchmark run: a fixed overhead
+# plus a per-pool share (about 50 KiB when measured).
+MEMORY_OVERHEAD = 4 * 2**20
+MEMORY_PER_POOL = 200 * 2**10
+
+
+@dataclass
+class ServerBenchmark:
+    """Measurements of an account served by the local poolstation.net stand-in."""
+
+    entities: int
+    setup: float
+    cycle: float
+    writes: int
+
+
+async def run_server_benchmark(hass, server: FakePoolstation) -> ServerBenchmark:
+    """Set up an entry against ``server``, then run one refresh cycle.
+
+    The cycle changes one reading of one pool.
+    """
+    async with server.serve():
+        with patch.object(hass.config_entries, "async_forward_entry_setups", AsyncMock()):
+            start = time.perf_counter()
+            entry: ConfigEntry = await make_entry(hass)
+            setup = time.perf_counter() - start
+        assert entry.state is ConfigEntryState.LOADED
+
+        entities, writes = await add_counted_entities(hass, entry)
+        coordinators = hass.data[DOMAIN][entry.entry_id][COORDINATORS].values()
+        server.tick += 1
+        start = time.perf_counter()
+        # Every pool's timer starts at setup, so their refreshes coincide.
+        await asyncio.gather(*(coordinator.async_refresh() for coordinator in coordinators))
+        cycle = time.perf_counter() - start
+        assert all(coordinator.last_update_success for coordinator in coordinators)
+
+        assert await hass.config_entries.async_unload(entry.entry_id)
+    return ServerBenchmark(len(entities), setup, cycle, writes.count)
+
+
+@pytest.mark.parametrize("pool_count", BENCHMARK_POOL_COUNTS)
+async def test_benchmark_local_server(hass, pool_count):
+    """Setup and refresh cycles scale with the account, talking HTTP locally."""
+    server = FakePoolstation(pool_count, SERVER_LATENCY, SERVER_EXTRA_VARS)
+
+    result = await run_server_benchmark(hass, server)
+
+    print(
+        f"\n{pool_count} pools ({result.entities} entities, "
+        f"{SERVER_LATENCY * 1000:.0f} ms latency): setup {result.setup:.3f}s, "
+        f"cycle {result.cycle:.3f}s, {result.writes} state writes per cycle"
+    )
+    assert server.requests == {"list": 1, "info": 2 * pool_count}
+    assert result.writes == 1
+
+
+@pytest.mark.parametrize("pool_count", BENCHMARK_POOL_COUNTS)
+async def test_benchmark_local_server_memory(hass, pool_count):
+    """Peak memory of setting up and refreshing an account grows linearly."""
+    server = FakePoolstation(pool_count, SERVER_LATENCY, SERVER_EXTRA_VARS)
+
+    tracemalloc.start()
+    try:
+        await run_server_benchmark(hass, server)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    print(
+        f"\n{pool_count} pools: peak {peak / 2**20:.1f} MiB "
+        f"({peak / pool_count / 2**10:.0f} KiB per pool)"
+    )
+    assert peak < MEMORY_OVERHEAD + pool_count * MEMORY_PER_POOL
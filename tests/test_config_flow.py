@@ -1,13 +1,35 @@
 """Tests for the Poolstation config flow."""
 from __future__ import annotations
 
+from functools import partial
 from unittest.mock import AsyncMock, patch
 
+from conftest import make_entry, make_pool
+from homeassistant.config_entries import ConfigEntryState
 from homeassistant.const import CONF_EMAIL, CONF_PASSWORD
 from homeassistant.data_entry_flow import FlowResultType
-from pypoolstation import AuthenticationException, TwoFactorAuthRequiredException
-
-from custom_components.poolstation.const import CONF_AUTH_CODE, DOMAIN, TOKEN
+from pypoolstation import AuthenticationException, Pool, TwoFactorAuthRequiredException
+
+from custom_components.poolstation.const import (
+    AUTH_RETRIES,
+    CONF_ACCOUNT_COORDINATOR,
+    CONF_ADAPTIVE_POLLING,
+    CONF_AUTH_CODE,
+    CONF_DEADBANDS,
+    CONF_DISABLED_GROUPS,
+    CONF_MAX_SCAN_INTERVAL,
+    CONF_MIN_SCAN_INTERVAL,
+    CONF_POOL_SCAN_INTERVALS,
+    CONF_POOLS,
+    CONF_REFRESH_CONCURRENCY,
+    CONF_SCAN_INTERVAL,
+    COORDINATORS,
+    DEADBAND_SENSORS,
+    DOMAIN,
+    READY_POOLS,
+    TOKEN,
+)
+from custom_components.poolstation.session import DATA_SESSION
 
 EMAIL = "user@example.com"
 PASSWORD = "secret"
@@ -42,6 +64,51 @@ async def test_user_login_creates_entry(hass, mock_account):
     assert entry.data[CONF_PASSWORD] == PASSWORD
 
 
+async def test_user_login_picks_pools(hass, mock_account):
+    """Accounts with several pools pick the ones to import."""
+    pools = [
+        make_pool(pool_id="pool-1", alias=None),
+        make_pool(pool_id="pool-2", alias=None),
+    ]
+    # The pool list has no names; syncing a pool fetches its name.
+    for pool, alias in zip(pools, ("Pool", "Spa"), strict=True):
+        pool.sync_info = AsyncMock(side_effect=partial(setattr, pool, "alias", alias))
+    result = await _start_user_flow(hass)
+    with (
+        patch.object(Pool, "get_all_pools", AsyncMock(return_value=pools)) as mock_pools,
+        patch.object(hass.config_entries, "async_forward_entry_setups", AsyncMock()),
+    ):
+        result = await hass.config_entries.flow.async_configure(
+            result["flow_id"], {CONF_EMAIL: EMAIL, CONF_PASSWORD: PASSWORD}
+        )
+        assert result["type"] is FlowResultType.FORM
+        assert result["step_id"] == "pools"
+        selector = result["data_schema"].schema[CONF_POOLS]
+        assert [option["label"] for option in selector.config["options"]] == ["Pool", "Spa"]
+        # The session of the pools is held for the entry that takes them.
+        assert hass.data[DATA_SESSION].users == 1
+
+        result = await hass.config_entries.flow.async_configure(
+            result["flow_id"], {CONF_POOLS: []}
+        )
+        assert result["errors"] == {"base": "no_pools"}
+
+        result = await hass.config_entries.flow.async_configure(
+            result["flow_id"], {CONF_POOLS: ["pool-2"]}
+        )
+        await hass.async_block_till_done()
+
+    assert result["type"] is FlowResultType.CREATE_ENTRY
+    entry = result["result"]
+    assert entry.options == {CONF_POOLS: ["pool-2"]}
+    assert list(hass.data[DOMAIN][entry.entry_id][COORDINATORS]) == ["pool-2"]
+    # Setup took over the pools the flow fetched and synced.
+    mock_pools.assert_awaited_once()
+    pools[1].sync_info.assert_awaited_once()
+    assert hass.data[DOMAIN][entry.entry_id][READY_POOLS] == {"pool-2"}
+    assert hass.data[DATA_SESSION].users == 1
+
+
 async def test_user_login_duplicate_unique_id_aborts(hass, mock_account):
     """Setting up the same account twice aborts with already_configured."""
     result = await _start_user_flow(hass)
@@ -84,6 +151,48 @@ async def test_user_login_connection_error(hass, mock_account):
     assert result["errors"] == {"base": "cannot_connect"}
 
 
+async def test_flow_holds_session_and_aborting_releases_it(hass, mock_account):
+    """Unloading an entry mid-login keeps the flow's session; an aborted flow closes it."""
+    entry = await make_entry(hass)
+    sessions = []
+
+    async def login(login_code: str) -> str:
+        assert await hass.config_entries.async_unload(entry.entry_id)
+        sessions.append(hass.data[DATA_SESSION].session)
+        assert not sessions[0].closed
+        raise TimeoutError
+
+    mock_account.login.side_effect = login
+    result = await _start_user_flow(hass)
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"], {CONF_EMAIL: EMAIL, CONF_PASSWORD: PASSWORD}
+    )
+    assert result["errors"] == {"base": "cannot_connect"}
+
+    hass.config_entries.flow.async_abort(result["flow_id"])
+
+    assert DATA_SESSION not in hass.data
+    assert sessions[0].closed
+
+
+async def test_flow_aborted_picking_pools_releases_session(hass, mock_account):
+    """A flow aborted while picking pools releases the session its pools hold."""
+    pools = [make_pool(pool_id="pool-1"), make_pool(pool_id="pool-2")]
+    result = await _start_user_flow(hass)
+    with patch.object(Pool, "get_all_pools", AsyncMock(return_value=pools)):
+        result = await hass.config_entries.flow.async_configure(
+            result["flow_id"], {CONF_EMAIL: EMAIL, CONF_PASSWORD: PASSWORD}
+        )
+    assert result["step_id"] == "pools"
+    session = hass.data[DATA_SESSION].session
+
+    hass.config_entries.flow.async_abort(result["flow_id"])
+    await hass.async_block_till_done()
+
+    assert DATA_SESSION not in hass.data
+    assert session.closed
+
+
 async def test_user_login_two_factor(hass, mock_account):
     """A 2FA challenge is followed by the code step, then a created entry."""
     async def login_with_mfa(login_code: str = "") -> str:
@@ -149,21 +258,24 @@ async def test_user_login_two_factor_bad_code_retries(hass, mock_account):
 
 
 async def test_reauth_updates_entry(hass, mock_account):
-    """A reauth flow with valid credentials updates the entry and reloads it."""
-    # Create the entry first through the normal user flow
-    result = await _start_user_flow(hass)
-    result = await hass.config_entries.flow.async_configure(
-        result["flow_id"], {CONF_EMAIL: EMAIL, CONF_PASSWORD: PASSWORD}
-    )
-    entry = hass.config_entries.async_entries(DOMAIN)[0]
+    """Reauth hands the new token to the running entry, which resumes polling."""
+    pool = make_pool(pool_id="pool-1")
+    pool.sync_info = AsyncMock()
+    with (
+        patch.object(Pool, "get_all_pools", AsyncMock(return_value=[pool])),
+        patch.object(hass.config_entries, "async_forward_entry_setups", AsyncMock()),
+    ):
+        entry = await make_entry(hass)
+    coordinator = hass.data[DOMAIN][entry.entry_id][COORDINATORS]["pool-1"]
+    coordinator.auth_retries = 0
+    pool.sync_info.reset_mock()
 
     mock_account.login.return_value = "reauth-token"
-    with patch.object(hass.config_entries, "async_reload", AsyncMock()) as mock_reload:
-        result = await hass.config_entries.flow.async_init(
-            DOMAIN,
-            context={"source": "reauth", "entry_id": entry.entry_id},
-            data=entry.data,
-        )
+    result = await hass.config_entries.flow.async_init(
+        DOMAIN,
+        context={"source": "reauth", "entry_id": entry.entry_id},
+        data=entry.data,
+    )
 
     assert result["type"] is FlowResultType.FORM
     assert result["step_id"] == "reauth_confirm"
@@ -172,11 +284,35 @@ async def test_reauth_updates_entry(hass, mock_account):
         result = await hass.config_entries.flow.async_configure(
             result["flow_id"], {CONF_EMAIL: EMAIL, CONF_PASSWORD: "new-password"}
         )
+        await hass.async_block_till_done()
 
     assert result["type"] is FlowResultType.ABORT
     assert result["reason"] == "reauth_successful"
     assert entry.data[TOKEN] == "reauth-token"
     assert entry.data[CONF_PASSWORD] == "new-password"
+    mock_reload.assert_not_called()
+    pool.update_token.assert_called_with("reauth-token")
+    pool.sync_info.assert_awaited_once()
+    assert coordinator.auth_retries == AUTH_RETRIES
+
+
+async def test_reauth_reloads_entry_that_failed_setup(hass, mock_account):
+    """An entry whose setup was stopped by rejected credentials is set up again."""
+    mock_account.login.side_effect = AuthenticationException()
+    with patch.object(Pool, "get_all_pools", AsyncMock(side_effect=AuthenticationException())):
+        entry = await make_entry(hass)
+    assert entry.state is ConfigEntryState.SETUP_ERROR
+    # Setup started the reauth flow.
+    (flow,) = hass.config_entries.flow.async_progress_by_handler(DOMAIN)
+
+    mock_account.login.side_effect = None
+    mock_account.login.return_value = "reauth-token"
+    with patch.object(hass.config_entries, "async_reload", AsyncMock()) as mock_reload:
+        result = await hass.config_entries.flow.async_configure(
+            flow["flow_id"], {CONF_EMAIL: EMAIL, CONF_PASSWORD: "new-password"}
+        )
+
+    assert result["reason"] == "reauth_successful"
     mock_reload.assert_awaited_once_with(entry.entry_id)
 
 
@@ -300,4 +436,126 @@ async def test_reauth_invalid_auth_shows_error_and_retries(hass, mock_account):
     assert result["type"] is FlowResultType.ABORT
     assert result["reason"] == "reauth_successful"
     assert entry.data[TOKEN] == "reauth-token"
+    mock_reload.assert_not_called()
+
+
+async def test_options_flow_sets_deadbands(hass, mock_account):
+    """The options flow stores the deadbands that were filled in."""
+    entry = await make_entry(hass)
+
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    assert result["type"] is FlowResultType.MENU
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], {"next_step_id": "deadbands"}
+    )
+    assert result["type"] is FlowResultType.FORM
+    assert result["step_id"] == "deadbands"
+    # Nothing is filtered yet; the form only suggests deadbands.
+    suggested = {
+        str(key): key.description["suggested_value"] for key in result["data_schema"].schema
+    }
+    assert suggested == DEADBAND_SENSORS
+
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], {"pH": 0.1, "current_orp": 10}
+    )
+
+    assert result["type"] is FlowResultType.CREATE_ENTRY
+    assert entry.options == {CONF_DEADBANDS: {"pH": 0.1, "current_orp": 10.0}}
+
+
+async def _start_options_step(hass, entry, step_id: str) -> dict:
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    return await hass.config_entries.options.async_configure(
+        result["flow_id"], {"next_step_id": step_id}
+    )
+
+
+async def test_options_flow_sets_polling(hass, mock_account):
+    """The polling options are stored, and the adaptive bounds must make sense."""
+    entry = await make_entry(hass, options={CONF_DEADBANDS: {"pH": 0.1}})
+    polling = {
+        CONF_SCAN_INTERVAL: 120,
+        CONF_ADAPTIVE_POLLING: True,
+        CONF_MIN_SCAN_INTERVAL: 600,
+        CONF_MAX_SCAN_INTERVAL: 300,
+        CONF_ACCOUNT_COORDINATOR: False,
+        CONF_REFRESH_CONCURRENCY: 2,
+    }
+
+    result = await _start_options_step(hass, entry, "polling")
+    result = await hass.config_entries.options.async_configure(result["flow_id"], polling)
+    assert result["type"] is FlowResultType.FORM
+    assert result["errors"] == {"base": "min_above_max"}
+
+    polling[CONF_MIN_SCAN_INTERVAL] = 30
+    result = await hass.config_entries.options.async_configure(result["flow_id"], polling)
+
+    assert result["type"] is FlowResultType.CREATE_ENTRY
+    assert entry.options == {CONF_DEADBANDS: {"pH": 0.1}, **polling}
+
+
+async def test_options_flow_sets_pool_intervals(hass, mock_account):
+    """Pools are listed by name and their overrides stored by id."""
+    pools = [
+        make_pool(pool_id="pool-1", alias="Pool"),
+        make_pool(pool_id="pool-2", alias="Pool"),
+        make_pool(pool_id="pool-3", alias="Spa"),
+    ]
+    with (
+        patch.object(Pool, "get_all_pools", AsyncMock(return_value=pools)),
+        patch.object(hass.config_entries, "async_forward_entry_setups", AsyncMock()),
+    ):
+        entry = await make_entry(hass)
+
+    result = await _start_options_step(hass, entry, "pool_intervals")
+    assert result["step_id"] == "pool_intervals"
+    assert list(result["data_schema"].schema) == ["Pool (pool-1)", "Pool (pool-2)", "Spa"]
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], {"Pool (pool-2)": 600}
+    )
+
+    assert result["type"] is FlowResultType.CREATE_ENTRY
+    assert entry.options == {CONF_POOL_SCAN_INTERVALS: {"pool-2": 600}}
+
+
+async def test_options_flow_disables_entity_groups(hass, mock_account):
+    """Entity groups can be switched off."""
+    entry = await make_entry(hass)
+
+    result = await _start_options_step(hass, entry, "entities")
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], {CONF_DISABLED_GROUPS: ["uv", "relays"]}
+    )
+
+    assert result["type"] is FlowResultType.CREATE_ENTRY
+    assert entry.options == {CONF_DISABLED_GROUPS: ["uv", "relays"]}
+
+
+async def test_options_flow_picks_pools(hass, mock_account):
+    """Changing the imported pools reloads the entry with just those."""
+    pools = [make_pool(pool_id="pool-1", alias="Pool"), make_pool(pool_id="pool-2", alias=None)]
+    for pool in pools:
+        pool.sync_info = AsyncMock()
+    with (
+        patch.object(Pool, "get_all_pools", AsyncMock(return_value=pools)),
+        patch.object(hass.config_entries, "async_forward_entry_setups", AsyncMock()),
+    ):
+        entry = await make_entry(hass, options={CONF_POOLS: ["pool-1"]})
+        pools[0].sync_info.reset_mock()
+
+        result = await _start_options_step(hass, entry, "pools")
+        # Only the pool that isn't imported had to be fetched for its name.
+        pools[0].sync_info.assert_not_called()
+        pools[1].sync_info.assert_awaited_once()
+        assert result["data_schema"]({})[CONF_POOLS] == ["pool-1"]
+
+        with patch.object(hass.config_entries, "async_reload", AsyncMock()) as mock_reload:
+            result = await hass.config_entries.options.async_configure(
+                result["flow_id"], {CONF_POOLS: ["pool-1", "pool-2"]}
+            )
+            await hass.async_block_till_done()
+
+    assert result["type"] is FlowResultType.CREATE_ENTRY
+    assert entry.options == {CONF_POOLS: ["pool-1", "pool-2"]}
     mock_reload.assert_awaited_once_with(entry.entry_id)
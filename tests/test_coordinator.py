@@ -1,18 +1,48 @@
 """Tests for the PoolstationDataUpdateCoordinator."""
 from __future__ import annotations
 
-from unittest.mock import AsyncMock
+import asyncio
+from datetime import timedelta
+from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 from aiohttp import ClientResponseError, RequestInfo
-from conftest import make_pool
+from conftest import make_entry, make_pool
+from homeassistant.const import CONF_TOKEN
 from homeassistant.exceptions import ConfigEntryAuthFailed
 from homeassistant.helpers.update_coordinator import UpdateFailed
 from pypoolstation import AuthenticationException
 from yarl import URL
 
-from custom_components.poolstation import PoolstationDataUpdateCoordinator
+from custom_components.poolstation import (
+    SCAN_INTERVAL,
+    PoolstationAccountCoordinator,
+    PoolstationDataUpdateCoordinator,
+)
+from custom_components.poolstation.auth import PoolstationAuth
+from custom_components.poolstation.backoff import (
+    BACKOFF_BASE,
+    PROBE_WAIT,
+    Backoff,
+    CircuitBreaker,
+    CircuitState,
+)
 from custom_components.poolstation.const import AUTH_RETRIES
+from custom_components.poolstation.ratelimit import (
+    DEFAULT_RETRY_AFTER,
+    Priority,
+    RateLimiter,
+    retry_after,
+)
+from custom_components.poolstation.stats import FetchStats
+
+
+def server_error(status: int = 500, **headers: str) -> ClientResponseError:
+    """Build the error pypoolstation raises for an error status from poolstation.net."""
+    request_info = RequestInfo(
+        "GET", URL("https://poolstation.net/api/pool"), [], None
+    )
+    return ClientResponseError(request_info, (), status=status, headers=headers)
 
 
 async def test_update_data_success(hass):
@@ -51,12 +81,7 @@ async def test_update_data_network_error_marks_update_failed(hass):
     next interval.
     """
     pool = make_pool()
-    request_info = RequestInfo(
-        "GET", URL("https://poolstation.net/api/pool"), [], None
-    )
-    pool.sync_info = AsyncMock(
-        side_effect=ClientResponseError(request_info, (), status=500)
-    )
+    pool.sync_info = AsyncMock(side_effect=server_error())
     coordinator = PoolstationDataUpdateCoordinator(hass, pool)
 
     await coordinator.async_refresh()
@@ -82,3 +107,490 @@ async def test_update_data_auth_error_decrements(hass):
     assert coordinator.auth_retries == 0
     with pytest.raises(ConfigEntryAuthFailed):
         await coordinator._async_update_data()
+
+
+async def make_auth(hass, pools) -> PoolstationAuth:
+    """Build the auth of an entry owning ``pools`` whose tokens have expired."""
+    auth = PoolstationAuth(hass, await make_entry(hass), MagicMock())
+    auth.pools = pools
+    for pool in pools:
+
+        async def sync_info(pool=pool) -> None:
+            await asyncio.sleep(0)  # a round trip, letting other pools run
+            if not pool.update_token.called:
+                raise AuthenticationException("expired")
+
+        pool.sync_info = AsyncMock(side_effect=sync_info)
+    return auth
+
+
+async def test_relogin_shared_by_pools(hass, mock_account):
+    """Pools failing at once share a single login and all get the new token."""
+    mock_account.login.return_value = "fresh-token"
+    pools = [make_pool(pool_id=pool_id) for pool_id in ("a", "b", "c")]
+    auth = await make_auth(hass, pools)
+    coordinators = [
+        PoolstationDataUpdateCoordinator(hass, pool, auth=auth) for pool in pools
+    ]
+
+    await asyncio.gather(*(coordinator.async_refresh() for coordinator in coordinators))
+
+    mock_account.login.assert_awaited_once()
+    assert auth.token == "fresh-token"
+    for coordinator in coordinators:
+        assert coordinator.last_update_success is True
+        assert coordinator.auth_retries == AUTH_RETRIES
+        coordinator.pool.update_token.assert_called_with("fresh-token")
+
+
+async def test_relogin_unreachable_spends_retry(hass, mock_account):
+    """A login that can't reach the cloud falls back to the retry counter."""
+    mock_account.login.side_effect = TimeoutError()
+    pool = make_pool()
+    coordinator = PoolstationDataUpdateCoordinator(
+        hass, pool, auth=await make_auth(hass, [pool])
+    )
+
+    with pytest.raises(UpdateFailed):
+        await coordinator._async_update_data()
+
+    assert coordinator.auth_retries == AUTH_RETRIES - 1
+    assert coordinator.auth.token == "token"
+
+
+async def test_relogin_rejected_requires_reauth(hass, mock_account):
+    """Rejected credentials ask for reauthentication right away."""
+    mock_account.login.side_effect = AuthenticationException("wrong")
+    pool = make_pool()
+    coordinator = PoolstationDataUpdateCoordinator(
+        hass, pool, auth=await make_auth(hass, [pool])
+    )
+
+    with pytest.raises(ConfigEntryAuthFailed):
+        await coordinator._async_update_data()
+
+
+def make_account_coordinator(
+    hass, pools, auth: PoolstationAuth | None = None
+) -> PoolstationAccountCoordinator:
+    """Build an account coordinator fanning out to passive pool coordinators."""
+    coordinators = {
+        pool.id: PoolstationDataUpdateCoordinator(
+            hass, pool, update_interval=None, auth=auth
+        )
+        for pool in pools
+    }
+    return PoolstationAccountCoordinator(hass, coordinators, concurrency=2)
+
+
+async def test_account_update_fans_out_results(hass):
+    """Each pool coordinator gets its own pool's outcome."""
+    healthy = make_pool(pool_id="a")
+    healthy.sync_info = AsyncMock()
+    broken = make_pool(pool_id="b")
+    broken.sync_info = AsyncMock(side_effect=server_error())
+    account = make_account_coordinator(hass, [healthy, broken])
+
+    await account.async_refresh()
+
+    assert account.last_update_success is True
+    assert account.coordinators["a"].last_update_success is True
+    assert account.coordinators["b"].last_update_success is False
+    healthy.sync_info.assert_awaited_once()
+    broken.sync_info.assert_awaited_once()
+
+
+async def test_account_update_backs_off_failing_pool(hass):
+    """A pool failing on its own is skipped until its backoff runs out."""
+    healthy = make_pool(pool_id="a")
+    healthy.sync_info = AsyncMock()
+    broken = make_pool(pool_id="b")
+    broken.sync_info = AsyncMock(side_effect=server_error())
+    account = make_account_coordinator(hass, [healthy, broken])
+    coordinator = account.coordinators["b"]
+
+    await account.async_refresh()
+    await account.async_refresh()
+
+    assert broken.sync_info.await_count == 1
+    assert healthy.sync_info.await_count == 2
+    assert coordinator.backoff.attempts == 1
+
+    coordinator.retry_at = 0
+    broken.sync_info.side_effect = None
+    await account.async_refresh()
+
+    assert coordinator.last_update_success is True
+    assert coordinator.retry_at is None
+    assert coordinator.backoff.attempts == 0
+
+
+async def test_account_update_honors_pool_intervals(hass):
+    """A pool with a longer interval of its own is only synced when it is due."""
+    often = make_pool(pool_id="a")
+    often.sync_info = AsyncMock()
+    seldom = make_pool(pool_id="b")
+    seldom.sync_info = AsyncMock()
+    account = make_account_coordinator(hass, [often, seldom])
+    account.coordinators["b"].async_set_polling(timedelta(minutes=10))
+
+    await account.async_refresh()
+    await account.async_refresh()
+
+    assert often.sync_info.await_count == 2
+    assert seldom.sync_info.await_count == 1
+
+    account.coordinators["b"].synced_at -= 600
+    await account.async_refresh()
+
+    assert seldom.sync_info.await_count == 2
+
+
+async def test_account_update_all_pools_failing(hass):
+    """The account refresh fails when no pool could be fetched."""
+    pool = make_pool()
+    pool.sync_info = AsyncMock(side_effect=server_error())
+    account = make_account_coordinator(hass, [pool])
+
+    with pytest.raises(UpdateFailed):
+        await account._async_update_data()
+
+
+async def test_account_update_auth_error_spends_one_retry(hass):
+    """Auth errors on several pools cost the account a single retry."""
+    pools = [make_pool(pool_id=pool_id) for pool_id in ("a", "b", "c")]
+    for pool in pools:
+        pool.sync_info = AsyncMock(side_effect=AuthenticationException("expired"))
+    account = make_account_coordinator(hass, pools)
+
+    with pytest.raises(UpdateFailed):
+        await account._async_update_data()
+    assert account.auth_retries == AUTH_RETRIES - 1
+
+    account.auth_retries = 0
+    with pytest.raises(ConfigEntryAuthFailed):
+        await account._async_update_data()
+    assert all(
+        coordinator.auth_retries == AUTH_RETRIES
+        for coordinator in account.coordinators.values()
+    )
+
+
+async def test_account_update_relogin(hass, mock_account):
+    """The account coordinator logs in once for all pools and retries them."""
+    mock_account.login.return_value = "fresh-token"
+    pools = [make_pool(pool_id=pool_id) for pool_id in ("a", "b", "c")]
+    account = make_account_coordinator(hass, pools, auth=await make_auth(hass, pools))
+
+    await account.async_refresh()
+
+    mock_account.login.assert_awaited_once()
+    assert account.last_update_success is True
+    assert account.auth_retries == AUTH_RETRIES
+    assert all(
+        coordinator.last_update_success for coordinator in account.coordinators.values()
+    )
+    assert hass.config_entries.async_entries()[0].data[CONF_TOKEN] == "fresh-token"
+
+
+def make_adaptive_coordinator(hass, pool) -> PoolstationDataUpdateCoordinator:
+    """Build a coordinator in adaptive polling mode with 10s..120s bounds."""
+    pool.raw_vars = {"mp": "7.1"}
+    pool.sync_info = AsyncMock()
+    return PoolstationDataUpdateCoordinator(
+        hass,
+        pool,
+        adaptive=True,
+        min_interval=timedelta(seconds=10),
+        max_interval=timedelta(seconds=120),
+    )
+
+
+async def test_adaptive_backs_off_while_unchanged(hass):
+    """Flat readings stretch the interval gradually up to the maximum."""
+    coordinator = make_adaptive_coordinator(hass, make_pool())
+
+    await coordinator._async_update_data()
+    assert coordinator.update_interval == SCAN_INTERVAL
+
+    await coordinator._async_update_data()
+    assert coordinator.update_interval == timedelta(seconds=90)
+
+    for _ in range(5):
+        await coordinator._async_update_data()
+    assert coordinator.update_interval == timedelta(seconds=120)
+
+
+async def test_adaptive_resets_when_values_change(hass):
+    """A changed reading goes back to the normal interval."""
+    pool = make_pool()
+    coordinator = make_adaptive_coordinator(hass, pool)
+    await coordinator._async_update_data()
+    await coordinator._async_update_data()
+    assert coordinator.update_interval > SCAN_INTERVAL
+
+    pool.raw_vars = {"mp": "7.3"}
+    await coordinator._async_update_data()
+
+    assert coordinator.update_interval == SCAN_INTERVAL
+
+
+async def test_adaptive_polls_fast_after_write(hass):
+    """A write switches to the minimum interval for the write window."""
+    coordinator = make_adaptive_coordinator(hass, make_pool())
+    await coordinator._async_update_data()
+
+    coordinator.async_note_write()
+    assert coordinator.update_interval == timedelta(seconds=10)
+
+    await coordinator._async_update_data()
+    assert coordinator.update_interval == timedelta(seconds=10)
+
+    coordinator._fast_poll_until = hass.loop.time() - 1
+    await coordinator._async_update_data()
+    assert coordinator.update_interval == timedelta(seconds=15)
+
+
+async def test_note_write_ignored_without_adaptive(hass):
+    """Writes don't touch the interval in fixed polling mode."""
+    coordinator = PoolstationDataUpdateCoordinator(hass, make_pool())
+
+    coordinator.async_note_write()
+
+    assert coordinator.adaptive is False
+    assert coordinator.update_interval == SCAN_INTERVAL
+
+
+def test_backoff_grows_with_jitter_up_to_cap():
+    """Delays double from the base, randomized in their upper half, up to the cap."""
+    backoff = Backoff(base=10, cap=50)
+
+    delays = [backoff.next_delay() for _ in range(5)]
+
+    for delay, ceiling in zip(delays, (10, 20, 40, 50, 50), strict=True):
+        assert ceiling / 2 <= delay <= ceiling
+    backoff.reset()
+    assert backoff.next_delay() <= 10
+
+
+async def test_network_error_backs_off(hass):
+    """A pool that can't be reached retries later and later."""
+    pool = make_pool()
+    pool.sync_info = AsyncMock(side_effect=server_error())
+    coordinator = PoolstationDataUpdateCoordinator(hass, pool)
+
+    retries = []
+    for _ in range(3):
+        with pytest.raises(UpdateFailed) as err:
+            await coordinator._async_update_data()
+        retries.append(err.value.retry_after)
+
+    assert retries[0] <= BACKOFF_BASE
+    assert retries[2] >= 2 * BACKOFF_BASE
+    assert coordinator.auth_retries == AUTH_RETRIES
+
+
+async def test_breaker_pauses_all_pools_and_probes_once(hass):
+    """Once open, the breaker pauses every pool and lets a single probe through."""
+    breaker = CircuitBreaker(hass, threshold=2)
+    pools = [make_pool(pool_id=pool_id) for pool_id in ("a", "b")]
+    for pool in pools:
+        pool.sync_info = AsyncMock(side_effect=TimeoutError())
+    first, second = (
+        PoolstationDataUpdateCoordinator(hass, pool, breaker=breaker) for pool in pools
+    )
+
+    for coordinator in (first, second):
+        with pytest.raises(UpdateFailed):
+            await coordinator._async_update_data()
+    assert breaker.state is CircuitState.OPEN
+
+    with pytest.raises(UpdateFailed) as err:
+        await first._async_update_data()
+    assert err.value.retry_after > 0
+    assert pools[0].sync_info.await_count == 1
+
+    async def probe() -> None:
+        # While the probe is in flight the other pool keeps waiting.
+        assert breaker.state is CircuitState.HALF_OPEN
+        with pytest.raises(UpdateFailed) as err:
+            await second._async_update_data()
+        assert err.value.retry_after == PROBE_WAIT
+
+    pools[0].sync_info.side_effect = probe
+    breaker._retry_at = hass.loop.time()  # the open period ends
+    await first._async_update_data()
+
+    assert breaker.state is CircuitState.CLOSED
+    assert pools[0].sync_info.await_count == 2
+    assert pools[1].sync_info.await_count == 1
+
+
+async def test_breaker_reopens_when_probe_fails(hass):
+    """A failed probe opens the breaker again for longer."""
+    breaker = CircuitBreaker(hass, threshold=1, backoff=Backoff(base=10, cap=1000))
+    breaker.async_record(False)
+    assert breaker.state is CircuitState.OPEN
+
+    breaker._retry_at = hass.loop.time()
+    assert breaker.async_pause() is None
+    breaker.async_record(False)
+
+    assert breaker.state is CircuitState.OPEN
+    assert breaker.async_pause() >= 10
+
+
+async def test_account_update_unreachable_opens_breaker(hass):
+    """An account cycle that reaches no pool counts as one breaker failure."""
+    breaker = CircuitBreaker(hass, threshold=1)
+    pools = [make_pool(pool_id=pool_id) for pool_id in ("a", "b")]
+    for pool in pools:
+        pool.sync_info = AsyncMock(side_effect=server_error())
+    account = make_account_coordinator(hass, pools)
+    account.breaker = breaker
+
+    with pytest.raises(UpdateFailed) as err:
+        await account._async_update_data()
+
+    assert err.value.retry_after is not None
+    assert breaker.state is CircuitState.OPEN
+    assert breaker.failures == 1
+
+
+async def test_rate_limiter_lets_writes_ahead_of_polls(hass):
+    """Requests waiting for a token go by priority, then in order of arrival."""
+    limiter = RateLimiter(hass, rate=1000, burst=1)
+    await limiter.async_acquire(Priority.POLL)
+    sent: list[str] = []
+
+    async def request(name: str, priority: Priority) -> None:
+        await limiter.async_acquire(priority)
+        sent.append(name)
+
+    tasks = [
+        asyncio.create_task(request(name, priority))
+        for name, priority in (
+            ("poll 1", Priority.POLL),
+            ("poll 2", Priority.POLL),
+            ("write", Priority.WRITE),
+        )
+    ]
+    await asyncio.sleep(0)
+    assert limiter.queue_depth == 3
+
+    await asyncio.gather(*tasks)
+
+    assert sent == ["write", "poll 1", "poll 2"]
+    assert limiter.queue_depth == 0
+
+
+async def test_throttled_response_pauses_polls(hass):
+    """A 429 holds back the account's polls for as long as its Retry-After asks."""
+    limiter = RateLimiter(hass)
+    pool = make_pool()
+    pool.sync_info = AsyncMock(side_effect=server_error(429, **{"Retry-After": "30"}))
+    coordinator = PoolstationDataUpdateCoordinator(hass, pool, limiter=limiter)
+
+    with pytest.raises(UpdateFailed):
+        await coordinator._async_update_data()
+    with pytest.raises(UpdateFailed) as err:
+        await coordinator._async_update_data()
+
+    assert 29 < err.value.retry_after <= 30
+    pool.sync_info.assert_awaited_once()
+    assert limiter.throttles == 1
+
+
+async def test_throttled_update_leaves_breaker_probe_alone(hass):
+    """An update skipped for a 429 doesn't take the breaker's probe with it."""
+    breaker = CircuitBreaker(hass, threshold=1)
+    breaker.async_record(False)
+    breaker._retry_at = hass.loop.time()  # the open period ends
+    limiter = RateLimiter(hass)
+    limiter.async_throttle(0.05)
+    pool = make_pool()
+    pool.sync_info = AsyncMock()
+    coordinator = PoolstationDataUpdateCoordinator(
+        hass, pool, breaker=breaker, limiter=limiter
+    )
+
+    with pytest.raises(UpdateFailed):
+        await coordinator._async_update_data()
+    assert breaker.state is CircuitState.OPEN
+
+    await asyncio.sleep(0.06)
+    await coordinator._async_update_data()
+
+    pool.sync_info.assert_awaited_once()
+    assert breaker.state is CircuitState.CLOSED
+
+
+async def test_throttled_responses_do_not_open_breaker(hass):
+    """A 429 reached poolstation.net, so it isn't counted as an outage."""
+    breaker = CircuitBreaker(hass, threshold=1)
+    pool = make_pool()
+    pool.sync_info = AsyncMock(side_effect=server_error(429, **{"Retry-After": "0"}))
+    coordinator = PoolstationDataUpdateCoordinator(hass, pool, breaker=breaker)
+    account = make_account_coordinator(hass, [make_pool(pool_id="a")])
+    account.breaker = breaker
+    account.coordinators["a"].pool.sync_info = pool.sync_info
+
+    for update in (coordinator._async_update_data, account._async_update_data):
+        with pytest.raises(UpdateFailed):
+            await update()
+
+    assert breaker.state is CircuitState.CLOSED
+    assert breaker.failures == 0
+
+
+def test_retry_after_parsing():
+    """Retry-After is read as seconds or as a date, falling back to a default."""
+    assert retry_after(server_error(429, **{"Retry-After": "12"})) == 12
+    assert retry_after(server_error(429, **{"Retry-After": "soon"})) == DEFAULT_RETRY_AFTER
+    assert retry_after(server_error(429)) == DEFAULT_RETRY_AFTER
+    assert (
+        retry_after(server_error(429, **{"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"}))
+        == 0
+    )
+
+
+def test_fetch_stats_rolling_window():
+    """Fetch stats keep counters forever but latencies only for recent fetches."""
+    stats = FetchStats(size=4)
+    for duration in (0.1, 0.2, 0.3, 0.4, 3.0):
+        stats.record(0.0, duration, success=True)
+    stats.record(0.0, 30.0, success=False)
+
+    assert len(stats.history) == 4
+    assert stats.successes == 5
+    assert stats.failures == 1
+    assert stats.consecutive_failures == 1
+    assert stats.latency(50) == 0.4
+    assert stats.latency(95) == 30.0
+    assert stats.histogram() == {
+        "<=0.25s": 0,
+        "<=0.5s": 2,
+        "<=1.0s": 0,
+        "<=2.0s": 0,
+        "<=5.0s": 1,
+        "<=10.0s": 0,
+        ">10.0s": 1,
+    }
+
+    stats.record(0.0, 0.1, success=True)
+    assert stats.consecutive_failures == 0
+
+
+async def test_update_records_fetch_stats(hass):
+    """Every fetch is timed and counted, failed or not."""
+    pool = make_pool()
+    pool.sync_info = AsyncMock(side_effect=[None, server_error(), server_error()])
+    coordinator = PoolstationDataUpdateCoordinator(hass, pool)
+
+    for _ in range(3):
+        await coordinator.async_refresh()
+
+    stats = coordinator.stats
+    assert (stats.successes, stats.failures, stats.consecutive_failures) == (1, 2, 2)
+    assert [fetch.success for fetch in stats.history] == [True, False, False]
+    assert stats.latency(50) >= 0
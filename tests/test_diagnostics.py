@@ -0,0 +1,61 @@
+"""Tests for the config entry diagnostics."""
+from __future__ import annotations
+
+from unittest.mock import AsyncMock, patch
+
+from conftest import make_entry, make_pool, make_relay
+from homeassistant.helpers.redact import REDACTED
+from pypoolstation import Pool
+
+from custom_components.poolstation.const import COORDINATORS, DOMAIN
+from custom_components.poolstation.diagnostics import async_get_config_entry_diagnostics
+
+
+async def test_diagnostics(hass, mock_account):
+    """Diagnostics dump each pool's state and timings without credentials."""
+    pool = make_pool(pool_id="pool-1", relays=[make_relay(name="Pump")])
+    pool.raw_vars = {"mp": "7.20", "ta": "25.0C"}
+    with patch.object(Pool, "get_all_pools", AsyncMock(return_value=[pool])):
+        entry = await make_entry(hass)
+    coordinator = hass.data[DOMAIN][entry.entry_id][COORDINATORS]["pool-1"]
+    coordinator.stats.record(1700000000.0, 0.3, success=True)
+
+    diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+
+    assert diagnostics["entry"]["data"] == {
+        "token": REDACTED,
+        "email": REDACTED,
+        "password": REDACTED,
+    }
+    assert diagnostics["entry"]["title"] == REDACTED
+    assert "secret" not in str(diagnostics)
+    assert diagnostics["circuit_breaker"]["state"] == "closed"
+    assert diagnostics["rate_limiter"]["queue_depth"] == 0
+    assert diagnostics["rate_limiter"]["throttled_for"] is None
+    assert diagnostics["account_coordinator"] is None
+    assert diagnostics["entities"]["switch"] == 1
+    assert diagnostics["entities"]["sensor"] > 0
+
+    pool_diagnostics = diagnostics["pools"]["pool-1"]
+    assert pool_diagnostics["raw_vars"] == {"mp": "7.20", "ta": "25.0C"}
+    assert pool_diagnostics["auth_retries"] == coordinator.auth_retries
+    assert pool_diagnostics["update_interval"] == 60.0
+    assert pool_diagnostics["relays"][0]["name"] == "Pump"
+    fetches = pool_diagnostics["fetches"]
+    assert fetches["successes"] == 2
+    assert fetches["history"][-1] == {
+        "started": 1700000000.0,
+        "duration": 0.3,
+        "success": True,
+    }
+    assert sum(fetches["histogram"].values()) == 2
+
+
+async def test_diagnostics_not_loaded(hass, mock_account):
+    """An entry that isn't loaded only reports its redacted configuration."""
+    entry = await make_entry(hass)
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+    diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+
+    assert list(diagnostics) == ["entry"]
@@ -6,39 +6,43 @@ the relevant patch blocks.
 """
 from __future__ import annotations
 
+import asyncio
+from datetime import timedelta
 from unittest.mock import AsyncMock, patch
 
 import aiohttp
-from conftest import make_pool, make_relay
-from homeassistant.config_entries import ConfigEntry, ConfigEntryState
-from homeassistant.const import CONF_EMAIL, CONF_PASSWORD, CONF_TOKEN
+import pytest
+from conftest import make_entry, make_pool, make_relay
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.const import CONF_TOKEN, STATE_UNAVAILABLE
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers import entity_registry as er
 from pypoolstation import AuthenticationException, Pool, TwoFactorAuthRequiredException
 
-from custom_components.poolstation import PLATFORMS
-from custom_components.poolstation.const import COORDINATORS, DEVICES, DOMAIN
-
-
-async def make_entry(hass, data=None) -> ConfigEntry:
-    """Add a config entry (which also starts its setup)."""
-    entry = ConfigEntry(
-        domain=DOMAIN,
-        data=data or {
-            CONF_TOKEN: "token",
-            CONF_EMAIL: "user@example.com",
-            CONF_PASSWORD: "secret",
-        },
-        version=1,
-        title="user@example.com",
-        source="user",
-        unique_id="user@example.com",
-        minor_version=1,
-        options={},
-        discovery_keys={},
-        subentries_data=None,
-    )
-    await hass.config_entries.async_add(entry)
-    await hass.async_block_till_done()
-    return entry
+from custom_components.poolstation import CAPABILITY_GRACE_REFRESHES, PLATFORMS
+from custom_components.poolstation.cache import PoolCache
+from custom_components.poolstation.const import (
+    ACCOUNT_COORDINATOR,
+    CACHE,
+    CONF_ACCOUNT_COORDINATOR,
+    CONF_DISABLED_GROUPS,
+    CONF_POOL_SCAN_INTERVALS,
+    CONF_POOLS,
+    CONF_SCAN_INTERVAL,
+    COORDINATORS,
+    DEVICES,
+    DOMAIN,
+    READY_POOLS,
+    SYNCED_POOLS,
+)
+from custom_components.poolstation.session import DATA_SESSION, async_get_session
+
+
+@pytest.fixture(autouse=True)
+def no_cache_save_delay():
+    """Write the pool cache on the next loop iteration."""
+    with patch("custom_components.poolstation.cache.SAVE_DELAY", 0):
+        yield
 
 
 async def test_setup_entry(hass, mock_account):
@@ -56,10 +60,253 @@ async def test_setup_entry(hass, mock_account):
     data = hass.data[DOMAIN][entry.entry_id]
     assert data[DEVICES]["pool-1"] is pool
     assert data[COORDINATORS]["pool-1"].pool is pool
+    assert data[ACCOUNT_COORDINATOR] is None
     mock_pools.assert_awaited_once()
     mock_forward.assert_awaited_once_with(entry, PLATFORMS)
 
 
+async def test_setup_entry_account_coordinator(hass, mock_account):
+    """With the account coordinator enabled, only it polls on a timer."""
+    pools = [make_pool(pool_id="pool-1"), make_pool(pool_id="pool-2")]
+    for pool in pools:
+        pool.sync_info = AsyncMock()
+    with (
+        patch.object(Pool, "get_all_pools", AsyncMock(return_value=pools)),
+        patch.object(hass.config_entries, "async_forward_entry_setups", AsyncMock()),
+    ):
+        entry = await make_entry(hass, options={CONF_ACCOUNT_COORDINATOR: True})
+
+    assert entry.state is ConfigEntryState.LOADED
+    data = hass.data[DOMAIN][entry.entry_id]
+    account = data[ACCOUNT_COORDINATOR]
+    assert account.update_interval is not None
+    assert set(account.coordinators) == {"pool-1", "pool-2"}
+    for pool in pools:
+        pool.sync_info.assert_awaited_once()
+        coordinator = data[COORDINATORS][pool.id]
+        assert coordinator.update_interval is None
+        assert coordinator.last_update_success is True
+
+
+async def test_setup_entry_pool_refresh_error(hass, mock_account):
+    """A pool failing its first refresh shows up unavailable and is retried."""
+    healthy = make_pool(pool_id="pool-1", alias="Healthy")
+    healthy.sync_info = AsyncMock()
+    # Never fetched, so its alias isn't known yet.
+    broken = make_pool(pool_id="pool-2", alias=None, current_ph=None)
+    broken.sync_info = AsyncMock(side_effect=aiohttp.ClientError("nope"))
+    with patch.object(Pool, "get_all_pools", AsyncMock(return_value=[healthy, broken])):
+        entry = await make_entry(hass)
+
+    assert entry.state is ConfigEntryState.LOADED
+    data = hass.data[DOMAIN][entry.entry_id]
+    assert data[READY_POOLS] == {"pool-1", "pool-2"}
+    assert data[SYNCED_POOLS] == {"pool-1"}
+    assert hass.states.get("sensor.healthy_ph").state == "7.2"
+    assert hass.states.get("number.pool_2_target_ph").state == STATE_UNAVAILABLE
+    assert hass.states.get("sensor.pool_2_ph") is None
+    device = dr.async_get(hass).async_get_device(identifiers={(DOMAIN, "pool-2")})
+    assert device.name == "pool-2"
+
+    async def sync_info() -> None:
+        broken.alias = "Recovered"
+        broken.current_ph = 7.4
+
+    broken.sync_info = AsyncMock(side_effect=sync_info)
+    await data[COORDINATORS]["pool-2"].async_refresh()
+    await hass.async_block_till_done()
+
+    assert data[SYNCED_POOLS] == {"pool-1", "pool-2"}
+    assert hass.states.get("number.pool_2_target_ph").state != STATE_UNAVAILABLE
+    assert hass.states.get("sensor.recovered_ph").state == "7.4"
+    assert dr.async_get(hass).async_get(device.id).name == "Recovered"
+
+
+async def test_capability_changes_add_and_remove_entities(hass, mock_account):
+    """New probes and relays get entities, and lost probes lose them, without a reload."""
+    pool = make_pool(pool_id="pool-1", alias="Pool", current_orp=None)
+    pool.sync_info = AsyncMock()
+    with patch.object(Pool, "get_all_pools", AsyncMock(return_value=[pool])):
+        entry = await make_entry(hass)
+    coordinator = hass.data[DOMAIN][entry.entry_id][COORDINATORS]["pool-1"]
+    assert hass.states.get("sensor.pool_orp") is None
+
+    pool.current_orp = 650.0
+    pool.relays.append(make_relay(name="Lights"))
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    assert hass.states.get("sensor.pool_orp").state == "650.0"
+    assert hass.states.get("switch.pool_relay_lights") is not None
+    # Same setup, no reload.
+    assert hass.data[DOMAIN][entry.entry_id][COORDINATORS]["pool-1"] is coordinator
+
+    pool.temperature = None
+    for _ in range(CAPABILITY_GRACE_REFRESHES - 1):
+        await coordinator.async_refresh()
+        await hass.async_block_till_done()
+    # A reading missing now and then keeps its entity.
+    assert hass.states.get("sensor.pool_temperature") is not None
+
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    assert hass.states.get("sensor.pool_temperature") is None
+    assert er.async_get(hass).async_get("sensor.pool_temperature") is None
+    assert hass.states.get("sensor.pool_ph") is not None
+
+
+async def test_reading_missing_once_survives_other_changes(hass, mock_account):
+    """A reading missing for a refresh keeps its entity when another one appears then."""
+    pool = make_pool(pool_id="pool-1", alias="Pool", current_orp=None)
+    pool.sync_info = AsyncMock()
+    with patch.object(Pool, "get_all_pools", AsyncMock(return_value=[pool])):
+        entry = await make_entry(hass)
+    coordinator = hass.data[DOMAIN][entry.entry_id][COORDINATORS]["pool-1"]
+
+    pool.temperature = None
+    pool.waterflow_problem = None
+    pool.current_orp = 650.0
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    assert hass.states.get("sensor.pool_orp").state == "650.0"
+    assert er.async_get(hass).async_get("sensor.pool_temperature") is not None
+    assert er.async_get(hass).async_get("binary_sensor.pool_water_flow") is not None
+
+    pool.temperature = 26.5
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    assert hass.states.get("sensor.pool_temperature").state == "26.5"
+
+
+async def test_options_apply_without_reload(hass, mock_account):
+    """New poll intervals and entity groups take effect on the running entry."""
+    pools = [
+        make_pool(pool_id="pool-1", alias="Pool", relays=[make_relay(name="Lights")]),
+        make_pool(pool_id="pool-2", alias="Spa"),
+    ]
+    for pool in pools:
+        pool.sync_info = AsyncMock()
+    with patch.object(Pool, "get_all_pools", AsyncMock(return_value=pools)):
+        entry = await make_entry(hass, options={CONF_SCAN_INTERVAL: 120})
+    coordinators = hass.data[DOMAIN][entry.entry_id][COORDINATORS]
+    assert coordinators["pool-1"].update_interval == timedelta(seconds=120)
+    assert hass.states.get("switch.pool_relay_lights") is not None
+
+    with patch.object(hass.config_entries, "async_reload", AsyncMock()) as mock_reload:
+        hass.config_entries.async_update_entry(
+            entry,
+            options={
+                CONF_SCAN_INTERVAL: 90,
+                CONF_POOL_SCAN_INTERVALS: {"pool-2": 600},
+                CONF_DISABLED_GROUPS: ["relays"],
+            },
+        )
+        await hass.async_block_till_done()
+
+    mock_reload.assert_not_called()
+    assert hass.data[DOMAIN][entry.entry_id][COORDINATORS] is coordinators
+    assert coordinators["pool-1"].update_interval == timedelta(seconds=90)
+    assert coordinators["pool-2"].update_interval == timedelta(seconds=600)
+    assert hass.states.get("switch.pool_relay_lights") is None
+    assert hass.states.get("sensor.pool_ph") is not None
+
+    hass.config_entries.async_update_entry(entry, options={CONF_SCAN_INTERVAL: 90})
+    await hass.async_block_till_done()
+
+    assert coordinators["pool-2"].update_interval == timedelta(seconds=90)
+    assert hass.states.get("switch.pool_relay_lights") is not None
+
+
+async def test_options_switching_scheduler_reloads(hass, mock_account):
+    """Polling the account as a whole takes other coordinators, so the entry reloads."""
+    pool = make_pool(pool_id="pool-1")
+    with (
+        patch.object(Pool, "get_all_pools", AsyncMock(return_value=[pool])),
+        patch.object(hass.config_entries, "async_forward_entry_setups", AsyncMock()),
+    ):
+        entry = await make_entry(hass)
+
+    with patch.object(hass.config_entries, "async_reload", AsyncMock()) as mock_reload:
+        # Token refreshes update the entry too, but leave the options alone.
+        hass.config_entries.async_update_entry(entry, data={**entry.data, CONF_TOKEN: "new"})
+        await hass.async_block_till_done()
+        mock_reload.assert_not_called()
+
+        hass.config_entries.async_update_entry(
+            entry, options={CONF_ACCOUNT_COORDINATOR: True}
+        )
+        await hass.async_block_till_done()
+
+    mock_reload.assert_awaited_once_with(entry.entry_id)
+
+
+async def test_setup_entry_imports_selected_pools(hass, mock_account):
+    """Pools that aren't selected are neither polled nor kept as devices."""
+    pools = [make_pool(pool_id="pool-1"), make_pool(pool_id="pool-2")]
+    for pool in pools:
+        pool.sync_info = AsyncMock()
+    with (
+        patch.object(Pool, "get_all_pools", AsyncMock(return_value=pools)),
+        patch.object(hass.config_entries, "async_forward_entry_setups", AsyncMock()),
+    ):
+        entry = await make_entry(hass)
+        device_registry = dr.async_get(hass)
+        for pool in pools:
+            device_registry.async_get_or_create(
+                config_entry_id=entry.entry_id, identifiers={(DOMAIN, pool.id)}
+            )
+
+        hass.config_entries.async_update_entry(entry, options={CONF_POOLS: ["pool-2"]})
+        await hass.async_block_till_done()
+
+    assert entry.state is ConfigEntryState.LOADED
+    assert list(hass.data[DOMAIN][entry.entry_id][COORDINATORS]) == ["pool-2"]
+    assert pools[0].sync_info.await_count == 1
+    assert device_registry.async_get_device({(DOMAIN, "pool-1")}) is None
+    assert device_registry.async_get_device({(DOMAIN, "pool-2")}) is not None
+
+
+async def test_setup_entry_all_pools_fail(hass, mock_account):
+    """The entry is not ready when no pool at all could be fetched."""
+    pools = [make_pool(pool_id="pool-1"), make_pool(pool_id="pool-2")]
+    for pool in pools:
+        pool.sync_info = AsyncMock(side_effect=aiohttp.ClientError("nope"))
+    with (
+        patch.object(Pool, "get_all_pools", AsyncMock(return_value=pools)),
+        patch.object(hass.config_entries, "async_forward_entry_setups", AsyncMock()),
+    ):
+        entry = await make_entry(hass)
+
+    assert entry.state is ConfigEntryState.SETUP_RETRY
+    assert entry.entry_id not in hass.data.get(DOMAIN, {})
+
+
+async def test_setup_entry_adds_pools_as_they_refresh(hass, mock_account):
+    """A slow pool doesn't hold back the entities of the others."""
+    fast = make_pool(pool_id="pool-1", alias="Fast")
+    fast.sync_info = AsyncMock()
+    slow = make_pool(pool_id="pool-2", alias="Slow")
+    synced = asyncio.Event()
+    slow.sync_info = AsyncMock(side_effect=synced.wait)
+    with patch.object(Pool, "get_all_pools", AsyncMock(return_value=[fast, slow])):
+        setup = hass.async_create_task(make_entry(hass))
+        async with asyncio.timeout(2):
+            while hass.states.get("sensor.fast_ph") is None:
+                await asyncio.sleep(0)
+        assert not setup.done()
+        assert hass.states.get("sensor.slow_ph") is None
+
+        synced.set()
+        entry = await setup
+
+    assert entry.state is ConfigEntryState.LOADED
+    assert hass.states.get("sensor.slow_ph") is not None
+    assert hass.data[DOMAIN][entry.entry_id][READY_POOLS] == {"pool-1", "pool-2"}
+
+
 async def test_setup_entry_client_error(hass, mock_account):
     """A client error during setup makes the entry not ready."""
     with patch.object(
@@ -151,3 +398,125 @@ async def test_unload_entry(hass, mock_account):
 
     assert await hass.config_entries.async_unload(entry.entry_id) is True
     assert entry.entry_id not in hass.data[DOMAIN]
+
+
+async def test_reloads_dont_leak_sessions(hass, mock_account):
+    """Every reload closes the session it replaces, and unloading closes the last."""
+    sessions = []
+    with patch.object(hass.config_entries, "async_forward_entry_setups", AsyncMock()):
+        entry = await make_entry(hass)
+        for _ in range(5):
+            sessions.append(hass.data[DATA_SESSION])
+            assert async_get_session(hass) is sessions[-1].session
+            assert sessions[-1].users == 1
+            assert await hass.config_entries.async_reload(entry.entry_id)
+
+    sessions.append(hass.data[DATA_SESSION])
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert DATA_SESSION not in hass.data
+    for shared in sessions:
+        assert shared.session.closed
+        assert shared.session.connector is None
+
+
+async def test_failed_setup_releases_session(hass, mock_account):
+    """A setup that has to be retried doesn't hold on to the session."""
+    with patch.object(
+        Pool, "get_all_pools", AsyncMock(side_effect=aiohttp.ClientError("nope"))
+    ):
+        entry = await make_entry(hass)
+    await hass.async_block_till_done()
+
+    assert entry.state is ConfigEntryState.SETUP_RETRY
+    assert DATA_SESSION not in hass.data
+
+
+async def setup_from_cache(hass, cached_pool):
+    """Set up an entry once with ``cached_pool`` so it's cached, then unload it."""
+    with (
+        patch.object(Pool, "get_all_pools", AsyncMock(return_value=[cached_pool])),
+        patch.object(hass.config_entries, "async_forward_entry_setups", AsyncMock()),
+    ):
+        entry = await make_entry(hass)
+    await hass.async_block_till_done()
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    return entry
+
+
+async def test_setup_entry_saves_cache(hass, mock_account):
+    """Setup writes the pools' state, relays included, to the cache."""
+    pool = make_pool(pool_id="pool-1", current_ph=7.4, relays=[make_relay("Pump")])
+    entry = await setup_from_cache(hass, pool)
+
+    pools = await PoolCache(hass, entry.entry_id).async_load(None, "token", None)
+
+    assert [cached.id for cached in pools] == ["pool-1"]
+    assert pools[0].alias == "Test Pool"
+    assert pools[0].current_ph == 7.4
+    assert [(relay.name, relay.active) for relay in pools[0].relays] == [("Pump", False)]
+
+
+async def test_cache_written_while_pools_keep_updating(hass, mock_account):
+    """Pools updating at different times don't keep pushing the cache write back."""
+    pools = [
+        make_pool(pool_id="pool-1", current_ph=7.0),
+        make_pool(pool_id="pool-2", current_ph=7.0),
+    ]
+    with (
+        patch("custom_components.poolstation.cache.SAVE_DELAY", 0.3),
+        patch.object(Pool, "get_all_pools", AsyncMock(return_value=pools)),
+    ):
+        entry = await make_entry(hass)
+        coordinators = hass.data[DOMAIN][entry.entry_id][COORDINATORS]
+        for update in range(1, 9):
+            pool = pools[update % 2]
+            pool.current_ph = 7.0 + update / 10
+            coordinators[pool.id].async_set_updated_data(None)
+            await asyncio.sleep(0.1)
+
+        cached = await PoolCache(hass, entry.entry_id).async_load(None, "token", None)
+
+    assert [pool.id for pool in cached] == ["pool-1", "pool-2"]
+    assert any(pool.current_ph > 7.0 for pool in cached)
+
+
+async def test_setup_entry_from_cache_while_cloud_down(hass, mock_account):
+    """With a cache, setup succeeds without the cloud and refreshes later."""
+    entry = await setup_from_cache(hass, make_pool(pool_id="pool-1", current_ph=7.4))
+
+    with (
+        patch.object(
+            Pool, "get_all_pools", AsyncMock(side_effect=aiohttp.ClientError("down"))
+        ) as mock_pools,
+        patch.object(Pool, "sync_info", AsyncMock(side_effect=aiohttp.ClientError("down"))),
+        patch.object(hass.config_entries, "async_forward_entry_setups", AsyncMock()),
+    ):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done(wait_background_tasks=True)
+
+    assert entry.state is ConfigEntryState.LOADED
+    data = hass.data[DOMAIN][entry.entry_id]
+    assert data[DEVICES]["pool-1"].current_ph == 7.4
+    assert data[COORDINATORS]["pool-1"].last_update_success is False
+    mock_pools.assert_awaited_once()
+
+
+async def test_setup_entry_from_cache_reloads_on_new_pools(hass, mock_account):
+    """A changed pool list drops the cache and reloads the entry."""
+    entry = await setup_from_cache(hass, make_pool(pool_id="pool-1"))
+
+    with (
+        patch.object(
+            Pool, "get_all_pools", AsyncMock(return_value=[make_pool(pool_id="pool-2")])
+        ),
+        patch.object(Pool, "sync_info", AsyncMock()),
+        patch.object(hass.config_entries, "async_forward_entry_setups", AsyncMock()),
+        patch.object(hass.config_entries, "async_schedule_reload") as mock_reload,
+    ):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done(wait_background_tasks=True)
+
+    mock_reload.assert_called_once_with(entry.entry_id)
+    assert await hass.data[DOMAIN][entry.entry_id][CACHE]._store.async_load() is None
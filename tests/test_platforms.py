@@ -1,9 +1,13 @@
 """Tests for the sensor, number, switch and binary_sensor platforms."""
 from __future__ import annotations
 
+import asyncio
 from unittest.mock import AsyncMock, MagicMock, patch
 
+import aiohttp
+import pytest
 from conftest import make_pool, make_relay
+from pypoolstation import AuthenticationException
 
 from custom_components.poolstation import PoolstationDataUpdateCoordinator
 from custom_components.poolstation.binary_sensor import (
@@ -15,7 +19,13 @@ from custom_components.poolstation.binary_sensor import (
 from custom_components.poolstation.binary_sensor import (
     async_setup_entry as binary_sensor_setup,
 )
-from custom_components.poolstation.const import COORDINATORS, DEVICES, DOMAIN
+from custom_components.poolstation.const import (
+    CONF_DEADBANDS,
+    COORDINATORS,
+    DEVICES,
+    DOMAIN,
+    READY_POOLS,
+)
 from custom_components.poolstation.number import (
     ENTITY_DESCRIPTIONS as NUMBER_DESCRIPTIONS,
 )
@@ -25,16 +35,21 @@ from custom_components.poolstation.number import (
 from custom_components.poolstation.number import (
     async_setup_entry as number_setup,
 )
+from custom_components.poolstation.sensor import (
+    COORDINATOR_ENTITY_DESCRIPTIONS as COORDINATOR_SENSOR_DESCRIPTIONS,
+)
 from custom_components.poolstation.sensor import (
     ENTITY_DESCRIPTIONS as SENSOR_DESCRIPTIONS,
 )
 from custom_components.poolstation.sensor import (
+    PoolCoordinatorSensorEntity,
     PoolSensorEntity,
 )
 from custom_components.poolstation.sensor import (
     async_setup_entry as sensor_setup,
 )
 from custom_components.poolstation.switch import (
+    RELAY_CONFIRM_ATTEMPTS,
     PoolRelaySwitch,
 )
 from custom_components.poolstation.switch import (
@@ -44,6 +59,13 @@ from custom_components.poolstation.switch import (
 ENTRY_ID = "entry-1"
 
 
+@pytest.fixture(autouse=True)
+def no_number_write_cooldown():
+    """Send debounced number writes on the next loop iteration."""
+    with patch("custom_components.poolstation.number.NUMBER_WRITE_COOLDOWN", 0):
+        yield
+
+
 def install_pools(hass, pools):
     """Register pools and coordinators in hass.data the way setup_entry does."""
     hass.data[DOMAIN] = {
@@ -52,6 +74,7 @@ def install_pools(hass, pools):
                 pool.id: PoolstationDataUpdateCoordinator(hass, pool) for pool in pools
             },
             DEVICES: {pool.id: pool for pool in pools},
+            READY_POOLS: {pool.id for pool in pools},
         }
     }
 
@@ -72,8 +95,20 @@ async def test_sensor_setup(hass):
 
     assert async_add_entities.call_count == 1
     entities = async_add_entities.call_args[0][0]
-    assert len(entities) == len(SENSOR_DESCRIPTIONS)
-    assert all(isinstance(entity, PoolSensorEntity) for entity in entities)
+    pool_sensors = [entity for entity in entities if isinstance(entity, PoolSensorEntity)]
+    assert len(pool_sensors) == len(SENSOR_DESCRIPTIONS)
+    fetch_sensors = [
+        entity for entity in entities if isinstance(entity, PoolCoordinatorSensorEntity)
+    ]
+    assert {entity.entity_description.key for entity in fetch_sensors} == {
+        "fetch_latency",
+        "fetch_latency_p95",
+        "fetch_successes",
+        "fetch_failures",
+        "consecutive_fetch_failures",
+        "request_queue",
+    }
+    assert not any(entity.entity_registry_enabled_default for entity in fetch_sensors)
 
 
 async def test_sensor_values(hass):
@@ -98,6 +133,58 @@ async def test_sensor_values(hass):
     assert values == [7.1, 22.5, 3.4, 64, 780, 1.2, 3.5, 102.0]
 
 
+async def test_sensor_setup_poll_interval_when_adaptive(hass):
+    """Adaptive coordinators get a diagnostic sensor with the live interval."""
+    pool = make_pool()
+    hass.data[DOMAIN] = {
+        ENTRY_ID: {
+            COORDINATORS: {
+                pool.id: PoolstationDataUpdateCoordinator(hass, pool, adaptive=True)
+            },
+            DEVICES: {pool.id: pool},
+            READY_POOLS: {pool.id},
+        }
+    }
+    async_add_entities = MagicMock()
+
+    await sensor_setup(hass, make_config_entry(), async_add_entities)
+
+    entities = async_add_entities.call_args[0][0]
+    interval_sensors = [
+        entity
+        for entity in entities
+        if isinstance(entity, PoolCoordinatorSensorEntity)
+        and entity.entity_description.key == "poll_interval"
+    ]
+    assert [entity.native_value for entity in interval_sensors] == [60.0]
+
+
+async def test_sensor_fetch_stats_values(hass):
+    """Fetch stat sensors report the coordinator's counters and latencies."""
+    pool = make_pool()
+    install_pools(hass, [pool])
+    coordinator = hass.data[DOMAIN][ENTRY_ID][COORDINATORS][pool.id]
+    coordinator.stats.record(0.0, 0.2, success=True)
+    coordinator.stats.record(0.0, 1.5, success=False)
+
+    values = {
+        description.key: PoolCoordinatorSensorEntity(
+            pool, coordinator, description
+        ).native_value
+        for description in COORDINATOR_SENSOR_DESCRIPTIONS
+        if description.key != "poll_interval"
+    }
+
+    assert values == {
+        "fetch_latency": 200,
+        "fetch_latency_p95": 1500,
+        "fetch_successes": 1,
+        "fetch_failures": 1,
+        "consecutive_fetch_failures": 1,
+        "request_queue": 0,
+    }
+
+
 async def test_sensor_setup_skips_absent_attributes(hass):
     """Only sensors for attributes the pool actually has are created."""
     pool = make_pool(
@@ -129,7 +216,14 @@ async def test_sensor_multiple_pools(hass):
 
     await sensor_setup(hass, make_config_entry(), async_add_entities)
 
-    entities = async_add_entities.call_args[0][0]
+    # Each pool's entities are added on their own.
+    assert async_add_entities.call_count == 2
+    entities = [
+        entity
+        for call in async_add_entities.call_args_list
+        for entity in call.args[0]
+        if isinstance(entity, PoolSensorEntity)
+    ]
     assert len(entities) == 2 * len(SENSOR_DESCRIPTIONS)
     unique_ids = {entity.unique_id for entity in entities}
     assert len(unique_ids) == 2 * len(SENSOR_DESCRIPTIONS)
@@ -169,9 +263,120 @@ async def test_number_set_value(hass):
         entity = PoolNumberEntity(pool, coordinator, by_key[key])
         with patch.object(entity, "async_write_ha_state"):
             await entity.async_set_native_value(value)
+            await flush_number_writes(hass)
         mock_set.assert_awaited_once_with(expected)
 
 
+async def flush_number_writes(hass) -> None:
+    """Let the (zero cooldown) number write debouncers fire."""
+    await asyncio.sleep(0)
+    await hass.async_block_till_done()
+
+
+async def test_number_coalesces_writes(hass):
+    """Only the last of several quick changes is sent, shown optimistically."""
+    pool = make_pool(target_ph=7.0)
+    pool.set_target_ph = AsyncMock()
+    install_pools(hass, [pool])
+    coordinator = hass.data[DOMAIN][ENTRY_ID][COORDINATORS][pool.id]
+    entity = PoolNumberEntity(pool, coordinator, NUMBER_DESCRIPTIONS[0])
+
+    with patch.object(entity, "async_write_ha_state"):
+        for value in (7.1, 7.2, 7.3):
+            await entity.async_set_native_value(value)
+        assert entity.native_value == 7.3
+        pool.set_target_ph.assert_not_awaited()
+
+        await flush_number_writes(hass)
+
+    pool.set_target_ph.assert_awaited_once_with(7.3)
+
+
+async def test_number_sends_value_set_during_slow_write(hass):
+    """A value set while the previous one is still being sent is sent after it."""
+    pool = make_pool(target_ph=7.0)
+    sending = asyncio.Event()
+    release = asyncio.Event()
+
+    async def slow_write(value: float) -> None:
+        sending.set()
+        await release.wait()
+
+    pool.set_target_ph = AsyncMock(side_effect=slow_write)
+    install_pools(hass, [pool])
+    coordinator = hass.data[DOMAIN][ENTRY_ID][COORDINATORS][pool.id]
+    entity = PoolNumberEntity(pool, coordinator, NUMBER_DESCRIPTIONS[0])
+
+    with patch.object(entity, "async_write_ha_state"):
+        await entity.async_set_native_value(7.3)
+        await sending.wait()
+        await entity.async_set_native_value(7.5)
+        # Let the debouncer's timer for 7.5 fire while 7.3 is being sent.
+        for _ in range(3):
+            await asyncio.sleep(0)
+        release.set()
+        await flush_number_writes(hass)
+
+    assert [call.args for call in pool.set_target_ph.await_args_list] == [(7.3,), (7.5,)]
+    assert entity.native_value == 7.0  # The mocked pool never takes the value.
+
+
+async def test_number_skips_write_of_current_value(hass):
+    """Setting the value the pool already has sends nothing."""
+    pool = make_pool(target_ph=7.0)
+    pool.set_target_ph = AsyncMock()
+    install_pools(hass, [pool])
+    coordinator = hass.data[DOMAIN][ENTRY_ID][COORDINATORS][pool.id]
+    entity = PoolNumberEntity(pool, coordinator, NUMBER_DESCRIPTIONS[0])
+
+    with patch.object(entity, "async_write_ha_state") as mock_write:
+        await entity.async_set_native_value(7.0)
+        await entity.async_set_native_value(7.4)
+        await entity.async_set_native_value(7.0)
+        await flush_number_writes(hass)
+
+    pool.set_target_ph.assert_not_awaited()
+    assert entity.native_value == 7.0
+    assert mock_write.call_count == 3
+
+
+async def test_number_write_error_drops_optimistic_value(hass):
+    """A rejected write goes back to showing the pool's value."""
+    pool = make_pool(target_ph=7.0)
+    pool.set_target_ph = AsyncMock(side_effect=AuthenticationException("expired"))
+    install_pools(hass, [pool])
+    coordinator = hass.data[DOMAIN][ENTRY_ID][COORDINATORS][pool.id]
+    entity = PoolNumberEntity(pool, coordinator, NUMBER_DESCRIPTIONS[0])
+
+    with patch.object(entity, "async_write_ha_state"):
+        await entity.async_set_native_value(7.4)
+        assert entity.native_value == 7.4
+        await flush_number_writes(hass)
+
+    pool.set_target_ph.assert_awaited_once_with(7.4)
+    assert entity.native_value == 7.0
+
+
+async def test_number_shows_queued_value(hass):
+    """A value queued while the cloud is unreachable is shown until it's sent."""
+    pool = make_pool(target_ph=7.0)
+    pool.set_target_ph = AsyncMock(side_effect=aiohttp.ClientError("down"))
+    install_pools(hass, [pool])
+    coordinator = hass.data[DOMAIN][ENTRY_ID][COORDINATORS][pool.id]
+    entity = PoolNumberEntity(pool, coordinator, NUMBER_DESCRIPTIONS[0])
+
+    with patch.object(entity, "async_write_ha_state"):
+        await entity.async_set_native_value(7.4)
+        await flush_number_writes(hass)
+        assert entity.native_value == 7.4
+        # Setting the pool's own value again still replaces the queued one.
+        await entity.async_set_native_value(7.0)
+        await flush_number_writes(hass)
+
+    assert coordinator.writes.pending == {"target_ph": 7.0}
+    assert entity.native_value == 7.0
+
+
 async def test_device_info(hass):
     """Entities share device info with manufacturer and model."""
     pool = make_pool()
@@ -204,22 +409,95 @@ async def test_switch_setup(hass):
     assert [entity.is_on for entity in entities] == [False, True]
 
 
-async def test_switch_toggle(hass):
-    """Turning a relay on/off calls set_active and updates the state."""
-    relay = make_relay()
+@pytest.fixture
+def no_confirm_delay():
+    """Confirm relay switching without waiting."""
+    with patch("custom_components.poolstation.switch.RELAY_CONFIRM_DELAY", 0):
+        yield
+
+
+def make_relay_switch(hass, relay, sync_info=None) -> PoolRelaySwitch:
+    """Create a relay switch whose pool syncs with ``sync_info``."""
     pool = make_pool(relays=[relay])
+    pool.sync_info = AsyncMock(side_effect=sync_info)
     install_pools(hass, [pool])
     coordinator = hass.data[DOMAIN][ENTRY_ID][COORDINATORS][pool.id]
     entity = PoolRelaySwitch(pool, coordinator, relay)
+    entity.hass = hass
+    entity.entity_id = "switch.test_pool_relay_pump"
+    return entity
 
-    with patch.object(entity, "async_write_ha_state"):
+
+async def test_switch_toggle(hass, no_confirm_delay):
+    """Turning a relay on/off shows the new state right away and confirms it."""
+    relay = make_relay()
+    entity = make_relay_switch(hass, relay)
+
+    with patch.object(entity, "async_write_ha_state") as mock_write:
         await entity.async_turn_on()
         assert entity.is_on is True
+        mock_write.assert_called_once()
+        await hass.async_block_till_done(wait_background_tasks=True)
         await entity.async_turn_off()
         assert entity.is_on is False
+        await hass.async_block_till_done(wait_background_tasks=True)
 
     relay.set_active.assert_any_await(True)
     relay.set_active.assert_any_await(False)
+    # One confirmation refresh of the pool per switch.
+    assert entity.pool.sync_info.await_count == 2
+    assert entity.is_on is False
+
+
+async def test_switch_rolls_back_unconfirmed(hass, no_confirm_delay, caplog):
+    """A relay the controller doesn't switch goes back to its reported state."""
+    relay = make_relay()
+
+    def controller_ignores_write() -> None:
+        relay.active = False
+
+    entity = make_relay_switch(hass, relay, controller_ignores_write)
+
+    with patch.object(entity, "async_write_ha_state"):
+        await entity.async_turn_on()
+        assert entity.is_on is True
+        await hass.async_block_till_done(wait_background_tasks=True)
+
+    assert entity.pool.sync_info.await_count == RELAY_CONFIRM_ATTEMPTS
+    assert entity.is_on is False
+    assert "did not switch on" in caplog.text
+
+
+async def test_switch_write_error_rolls_back(hass, caplog):
+    """A rejected write is logged and the switch shows the relay's state again."""
+    relay = make_relay()
+    relay.set_active.side_effect = AuthenticationException("nope")
+    entity = make_relay_switch(hass, relay)
+
+    with patch.object(entity, "async_write_ha_state") as mock_write:
+        await entity.async_turn_on()
+
+    assert entity.is_on is False
+    assert mock_write.call_count == 2
+    entity.pool.sync_info.assert_not_called()
+    assert "Error switching" in caplog.text
+
+
+async def test_switch_shows_queued_state(hass):
+    """A relay write queued while the cloud is unreachable is shown, unconfirmed."""
+    relay = make_relay()
+    relay.set_active.side_effect = TimeoutError
+    entity = make_relay_switch(hass, relay)
+
+    with patch.object(entity, "async_write_ha_state"):
+        await entity.async_turn_on()
+        await hass.async_block_till_done(wait_background_tasks=True)
+        assert entity.is_on is True
+        entity._handle_coordinator_update()
+
+    assert entity.is_on is True
+    assert relay.active is False
+    entity.pool.sync_info.assert_not_called()
 
 
 async def test_switch_coordinator_update(hass):
@@ -238,6 +516,45 @@ async def test_switch_coordinator_update(hass):
     mock_write.assert_called_once()
 
 
+async def test_unchanged_values_skip_state_writes(hass):
+    """Coordinator updates only write entities whose value changed."""
+    pool = make_pool(current_ph=7.1, temperature=22.5)
+    install_pools(hass, [pool])
+    coordinator = hass.data[DOMAIN][ENTRY_ID][COORDINATORS][pool.id]
+    by_key = {description.key: description for description in SENSOR_DESCRIPTIONS}
+    ph = PoolSensorEntity(pool, coordinator, by_key["pH"])
+    temperature = PoolSensorEntity(pool, coordinator, by_key["temperature"])
+
+    with (
+        patch.object(ph, "async_write_ha_state") as ph_write,
+        patch.object(temperature, "async_write_ha_state") as temperature_write,
+    ):
+        ph._handle_coordinator_update()
+        temperature._handle_coordinator_update()
+        pool.current_ph = 7.3
+        ph._handle_coordinator_update()
+        temperature._handle_coordinator_update()
+
+    assert ph_write.call_count == 2
+    assert temperature_write.call_count == 1
+
+
+async def test_availability_change_writes_state(hass):
+    """Going unavailable writes the state even if the value is the same."""
+    pool = make_pool(current_ph=7.1)
+    install_pools(hass, [pool])
+    coordinator = hass.data[DOMAIN][ENTRY_ID][COORDINATORS][pool.id]
+    entity = PoolSensorEntity(pool, coordinator, SENSOR_DESCRIPTIONS[0])
+
+    with patch.object(entity, "async_write_ha_state") as mock_write:
+        entity._handle_coordinator_update()
+        coordinator.last_update_success = False
+        entity._handle_coordinator_update()
+        entity._handle_coordinator_update()
+
+    assert mock_write.call_count == 2
+
+
 async def test_binary_sensor_setup(hass):
     """Binary sensors are created for every pool and description."""
     pool = make_pool()
@@ -295,3 +612,43 @@ async def test_binary_sensor_values(hass):
         for description in BINARY_SENSOR_DESCRIPTIONS
     ]
     assert values == [True, True, False, None, None, True, False, True, False, True]
+
+
+async def test_deadband_skips_insignificant_changes(hass):
+    """Readings within the configured deadband of the last written one are dropped."""
+    pool = make_pool(current_ph=7.2)
+    install_pools(hass, [pool])
+    coordinator = hass.data[DOMAIN][ENTRY_ID][COORDINATORS][pool.id]
+    coordinator.config_entry = MagicMock(options={CONF_DEADBANDS: {"pH": 0.1}})
+    by_key = {description.key: description for description in SENSOR_DESCRIPTIONS}
+    entity = PoolSensorEntity(pool, coordinator, by_key["pH"])
+
+    with patch.object(entity, "async_write_ha_state") as mock_write:
+        entity._handle_coordinator_update()
+        # Creeping up in small steps still writes once it drifts a full deadband.
+        for value in (7.25, 7.28, 7.32, 7.35):
+            pool.current_ph = value
+            entity._handle_coordinator_update()
+        coordinator.last_update_success = False
+        entity._handle_coordinator_update()
+
+    assert mock_write.call_count == 3
+    assert coordinator._entity_snapshots[entity.unique_id] == (False, 7.35)
+
+
+async def test_no_deadband_writes_every_change(hass):
+    """Without a deadband in the options, even the smallest change is written."""
+    pool = make_pool(current_ph=7.2)
+    install_pools(hass, [pool])
+    coordinator = hass.data[DOMAIN][ENTRY_ID][COORDINATORS][pool.id]
+    coordinator.config_entry = MagicMock(options={})
+    by_key = {description.key: description for description in SENSOR_DESCRIPTIONS}
+    entity = PoolSensorEntity(pool, coordinator, by_key["pH"])
+
+    with patch.object(entity, "async_write_ha_state") as mock_write:
+        entity._handle_coordinator_update()
+        for value in (7.21, 7.22):
+            pool.current_ph = value
+            entity._handle_coordinator_update()
+
+    assert mock_write.call_count == 3
@@ -0,0 +1,168 @@
+"""Tests for the services acting on several entities at once."""
+from __future__ import annotations
+
+from unittest.mock import AsyncMock, patch
+
+import aiohttp
+import pytest
+import voluptuous as vol
+from conftest import make_entry, make_pool, make_relay
+from homeassistant.const import ATTR_DEVICE_ID
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import device_registry as dr
+from pypoolstation import AuthenticationException, Pool
+
+from custom_components.poolstation.const import DOMAIN
+from custom_components.poolstation.services import (
+    ATTR_RELAYS,
+    SERVICE_SET_RELAYS,
+    SERVICE_SET_TARGETS,
+)
+
+
+async def setup_pools(hass) -> list[Pool]:
+    """Set up an entry with two pools, with two relays and one relay."""
+    pools = [
+        make_pool(
+            pool_id="pool-1",
+            alias="Pool",
+            relays=[make_relay(name="Pump"), make_relay(name="Lights")],
+        ),
+        make_pool(pool_id="pool-2", alias="Spa", relays=[make_relay(name="Heater")]),
+    ]
+    for pool in pools:
+        pool.sync_info = AsyncMock()
+        pool.set_target_ph = AsyncMock()
+        pool.set_target_orp = AsyncMock()
+    with patch.object(Pool, "get_all_pools", AsyncMock(return_value=pools)):
+        await make_entry(hass)
+    for pool in pools:
+        pool.sync_info.reset_mock()
+    return pools
+
+
+async def set_relays(hass, relays: list[dict]) -> dict:
+    return await hass.services.async_call(
+        DOMAIN,
+        SERVICE_SET_RELAYS,
+        {ATTR_RELAYS: relays},
+        blocking=True,
+        return_response=True,
+    )
+
+
+async def test_set_relays(hass, mock_account):
+    """Relays are written together and each pool is refreshed once."""
+    pools = await setup_pools(hass)
+    pump, lights = pools[0].relays
+    (heater,) = pools[1].relays
+    lights.set_active.side_effect = AuthenticationException("nope")
+
+    response = await set_relays(
+        hass,
+        [
+            {"entity_id": "switch.pool_relay_pump", "state": True},
+            {"entity_id": "switch.pool_relay_lights", "state": True},
+            {"entity_id": "switch.spa_relay_heater", "state": "on"},
+        ],
+    )
+
+    assert response == {
+        ATTR_RELAYS: {
+            "switch.pool_relay_pump": {"written": True, "confirmed": True, "state": True},
+            "switch.pool_relay_lights": {"written": False, "error": "nope", "state": False},
+            "switch.spa_relay_heater": {"written": True, "confirmed": True, "state": True},
+        }
+    }
+    pump.set_active.assert_awaited_once_with(True)
+    heater.set_active.assert_awaited_once_with(True)
+    for pool in pools:
+        pool.sync_info.assert_awaited_once()
+    assert hass.states.get("switch.pool_relay_pump").state == "on"
+    assert hass.states.get("switch.pool_relay_lights").state == "off"
+
+
+async def test_set_relays_skips_pools_without_writes(hass, mock_account):
+    """Only pools with a relay that was written are refreshed."""
+    pools = await setup_pools(hass)
+    pools[1].relays[0].set_active.side_effect = aiohttp.ClientError("nope")
+
+    await set_relays(hass, [{"entity_id": "switch.spa_relay_heater", "state": True}])
+
+    for pool in pools:
+        pool.sync_info.assert_not_called()
+
+
+async def test_set_relays_needs_relays(hass, mock_account):
+    """Nothing is written when a target isn't a loaded Poolstation relay."""
+    pools = await setup_pools(hass)
+
+    for entity_id in ("switch.unknown", "sensor.pool_ph"):
+        with pytest.raises(ServiceValidationError):
+            await set_relays(
+                hass,
+                [
+                    {"entity_id": "switch.pool_relay_pump", "state": True},
+                    {"entity_id": entity_id, "state": True},
+                ],
+            )
+
+    pools[0].relays[0].set_active.assert_not_called()
+
+
+def device_id(hass, pool: Pool) -> str:
+    return dr.async_get(hass).async_get_device({(DOMAIN, pool.id)}).id
+
+
+async def set_targets(hass, **data) -> dict:
+    return await hass.services.async_call(
+        DOMAIN, SERVICE_SET_TARGETS, data, blocking=True, return_response=True
+    )
+
+
+async def test_set_targets(hass, mock_account):
+    """Targets of several pools are written together and each pool refreshed once."""
+    pools = await setup_pools(hass)
+    pools[1].target_orp = 650
+    pool_id, spa_id = (device_id(hass, pool) for pool in pools)
+    pools[1].set_target_ph.side_effect = TimeoutError
+
+    response = await set_targets(
+        hass, **{ATTR_DEVICE_ID: [pool_id, spa_id], "target_ph": 7.4, "target_orp": "650"}
+    )
+
+    assert response == {
+        "pools": {
+            pool_id: {
+                "target_ph": {"written": True, "value": 7.2},
+                "target_orp": {"written": True, "value": 700.0},
+            },
+            spa_id: {
+                # Sent once the spa can be reached again.
+                "target_ph": {"written": False, "queued": True, "value": 7.2},
+                # The spa already had this target.
+                "target_orp": {"written": False, "value": 650},
+            },
+        }
+    }
+    pools[0].set_target_ph.assert_awaited_once_with(7.4)
+    pools[0].set_target_orp.assert_awaited_once_with(650)
+    pools[1].set_target_orp.assert_not_called()
+    pools[0].sync_info.assert_awaited_once()
+    pools[1].sync_info.assert_not_called()
+    assert hass.states.get("number.spa_target_ph").state == "7.4"
+
+
+async def test_set_targets_validates_before_writing(hass, mock_account):
+    """A value out of range fails the call before anything is written."""
+    pools = await setup_pools(hass)
+
+    with pytest.raises(vol.Invalid):
+        await set_targets(
+            hass,
+            **{ATTR_DEVICE_ID: device_id(hass, pools[0]), "target_ph": 7.4, "target_orp": 900},
+        )
+    with pytest.raises(vol.Invalid):
+        await set_targets(hass, **{ATTR_DEVICE_ID: device_id(hass, pools[0])})
+
+    pools[0].set_target_ph.assert_not_called()
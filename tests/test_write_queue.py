@@ -0,0 +1,155 @@
+"""Tests for the queue holding writes while poolstation.net can't be reached."""
+from __future__ import annotations
+
+from unittest.mock import AsyncMock, MagicMock, call, patch
+
+import aiohttp
+import pytest
+from conftest import make_entry, make_pool, make_relay
+from pypoolstation import Pool
+
+from custom_components.poolstation.backoff import CircuitState
+from custom_components.poolstation.const import BREAKER, COORDINATORS, DOMAIN
+from custom_components.poolstation.write_queue import relay_key
+
+
+@pytest.fixture(autouse=True)
+def no_replay_spacing():
+    """Replay queued writes without waiting between them."""
+    with patch("custom_components.poolstation.write_queue.REPLAY_SPACING", 0):
+        yield
+
+
+def response_error(status: int, **headers: str) -> aiohttp.ClientResponseError:
+    return aiohttp.ClientResponseError(MagicMock(), (), status=status, headers=headers)
+
+
+async def setup_pool(hass):
+    """Set up an entry with one pool; return the entry, pool and its coordinator."""
+    pool = make_pool(relays=[make_relay(name="Pump")])
+    pool.sync_info = AsyncMock()
+    pool.set_target_ph = AsyncMock()
+    pool.set_target_orp = AsyncMock()
+    with patch.object(Pool, "get_all_pools", AsyncMock(return_value=[pool])):
+        entry = await make_entry(hass)
+    coordinator = hass.data[DOMAIN][entry.entry_id][COORDINATORS][pool.id]
+    return entry, pool, coordinator
+
+
+async def test_writes_coalesce_and_replay_in_order(hass, mock_account):
+    """Only the last value of each target is kept, and replayed oldest first."""
+    entry, pool, coordinator = await setup_pool(hass)
+    (pump,) = pool.relays
+    breaker = hass.data[DOMAIN][entry.entry_id][BREAKER]
+    breaker.state = CircuitState.OPEN
+
+    assert not await coordinator.writes.async_write("target_ph", 7.4)
+    assert not await coordinator.writes.async_write(relay_key(pump), True)
+    assert not await coordinator.writes.async_write("target_orp", 650)
+    assert not await coordinator.writes.async_write("target_ph", 7.3)
+    await hass.async_block_till_done(wait_background_tasks=True)
+
+    assert coordinator.writes.pending == {
+        relay_key(pump): True,
+        "target_orp": 650,
+        "target_ph": 7.3,
+    }
+    pump.set_active.assert_not_called()
+
+    breaker.state = CircuitState.CLOSED
+    manager = MagicMock()
+    manager.attach_mock(pump.set_active, "relay")
+    manager.attach_mock(pool.set_target_orp, "orp")
+    manager.attach_mock(pool.set_target_ph, "ph")
+    await coordinator.async_refresh()
+    await hass.async_block_till_done(wait_background_tasks=True)
+
+    assert manager.mock_calls == [call.relay(True), call.orp(650), call.ph(7.3)]
+    assert coordinator.writes.pending == {}
+    # The pool is refreshed once more after the replay.
+    assert pool.sync_info.await_count == 3
+
+
+async def test_open_breaker_queues_without_sending(hass, mock_account):
+    """Nothing is sent while the account's circuit breaker is open."""
+    entry, pool, coordinator = await setup_pool(hass)
+    hass.data[DOMAIN][entry.entry_id][BREAKER].state = CircuitState.OPEN
+
+    assert not await coordinator.writes.async_write("target_ph", 7.4)
+    await hass.async_block_till_done(wait_background_tasks=True)
+
+    pool.set_target_ph.assert_not_called()
+    assert coordinator.writes.pending == {"target_ph": 7.4}
+
+
+async def test_replay_stops_when_throttled_and_drops_rejected(hass, mock_account):
+    """A throttled write stays queued; a rejected one is dropped."""
+    _, pool, coordinator = await setup_pool(hass)
+    coordinator.writes.pending.update({"target_ph": 7.4, "target_orp": 650})
+    pool.set_target_ph.side_effect = response_error(429, **{"Retry-After": "0"})
+
+    coordinator.writes.async_replay()
+    await hass.async_block_till_done(wait_background_tasks=True)
+
+    assert coordinator.writes.pending == {"target_ph": 7.4, "target_orp": 650}
+    pool.set_target_orp.assert_not_called()
+    assert coordinator.limiter.throttles == 1
+
+    pool.set_target_ph.side_effect = response_error(400)
+    coordinator.writes.async_replay()
+    await hass.async_block_till_done(wait_background_tasks=True)
+
+    assert coordinator.writes.pending == {}
+    pool.set_target_orp.assert_awaited_once_with(650)
+
+
+async def test_write_failing_after_poll_is_dropped(hass, mock_account):
+    """A queued write still getting a 500 once the pool is fetched doesn't block the rest."""
+    entry, pool, coordinator = await setup_pool(hass)
+    breaker = hass.data[DOMAIN][entry.entry_id][BREAKER]
+    pool.set_target_ph.side_effect = response_error(500)
+    assert not await coordinator.writes.async_write("target_ph", 7.4)
+    breaker.state = CircuitState.OPEN
+    assert not await coordinator.writes.async_write("target_orp", 650)
+    assert coordinator.writes.pending == {"target_ph": 7.4, "target_orp": 650}
+
+    breaker.state = CircuitState.CLOSED
+    await coordinator.async_refresh()
+    await hass.async_block_till_done(wait_background_tasks=True)
+
+    assert pool.set_target_ph.await_count == 2
+    pool.set_target_orp.assert_awaited_once_with(650)
+    assert coordinator.writes.pending == {}
+
+    # Later writes go out right away again.
+    assert await coordinator.writes.async_write("target_orp", 700)
+
+
+async def test_rejected_write_is_not_queued(hass, mock_account):
+    """A write poolstation.net rejects fails instead of being queued."""
+    _, pool, coordinator = await setup_pool(hass)
+    pool.set_target_ph.side_effect = response_error(400)
+
+    with pytest.raises(aiohttp.ClientResponseError):
+        await coordinator.writes.async_write("target_ph", 7.4)
+
+    assert coordinator.writes.pending == {}
+
+
+async def test_queued_writes_survive_reload(hass, mock_account):
+    """Writes still queued when the entry unloads are sent after it's set up again."""
+    entry, pool, coordinator = await setup_pool(hass)
+    pool.set_target_ph.side_effect = TimeoutError
+    await coordinator.writes.async_write("target_ph", 7.4)
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+    pool.set_target_ph.side_effect = None
+    pool.set_target_ph.reset_mock()
+    with patch.object(Pool, "get_all_pools", AsyncMock(return_value=[pool])):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done(wait_background_tasks=True)
+
+    pool.set_target_ph.assert_awaited_once_with(7.4)
+    coordinator = hass.data[DOMAIN][entry.entry_id][COORDINATORS][pool.id]
+    assert coordinator.writes.pending == {}